@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# coding: utf-8
+
+r"""Benchmarking of the cold start (import time) of the aerodynamics modules.
+
+Each module is imported in a fresh interpreter with python -X importtime,
+the output is parsed and the cumulative import time of the module and its
+heaviest dependencies are reported.
+
+"""
+
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+MODULES = ("ydeos_aerodynamics.air",
+           "ydeos_aerodynamics.apparent",
+           "ydeos_aerodynamics.true",
+           "ydeos_aerodynamics.profiles",
+           "ydeos_aerodynamics.distribution",
+           "ydeos_aerodynamics.windage",
+           "ydeos_aerodynamics.model",
+           "ydeos_aerodynamics.force",
+           "ydeos_aerodynamics.polar",
+           "ydeos_aerodynamics.sweep",
+           "ydeos_aerodynamics.crossover",
+           "ydeos_aerodynamics.optimisation",
+           "ydeos_aerodynamics.cache",
+           "ydeos_aerodynamics.logs",
+           "ydeos_aerodynamics.storage",
+           "ydeos_aerodynamics.strips",
+           "ydeos_aerodynamics.total",
+           "ydeos_aerodynamics.registry",
+           "ydeos_aerodynamics.fleet",
+           "ydeos_aerodynamics.climate")
+
+
+def import_times(module: str) -> List[Tuple[str, int, int]]:
+    r"""Import times of a module imported in a fresh interpreter.
+
+    Returns a list of (imported package, self [us], cumulative [us])
+
+    """
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                               capture_output=True, text=True, check=True)
+    times = []
+    for line in completed.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_time, cumulative_time, package = line[len("import time:"):].split("|")
+        times.append((package.strip(), int(self_time), int(cumulative_time)))
+    return times
+
+
+def import_time_report(modules=MODULES, nb_runs: int = 5, nb_heaviest: int = 5) -> Dict[str, Dict]:
+    r"""Best cumulative import time of each module over nb_runs cold starts.
+
+    Returns a dict, keys are the module names, values are dicts with the
+    "cumulative" time [us] of the module and its "heaviest" imports
+
+    """
+    report = {}
+    for module in modules:
+        best = None
+        for _ in range(nb_runs):
+            times = import_times(module)
+            total = next(cumulative for package, _, cumulative in times if package == module)
+            if best is None or total < best[0]:
+                best = (total, times)
+        total, times = best
+        heaviest = sorted(((package, cumulative) for package, _, cumulative in times
+                           if not package.startswith("ydeos_aerodynamics")),
+                          key=lambda item: item[1], reverse=True)[:nb_heaviest]
+        report[module] = {"cumulative": total, "heaviest": heaviest}
+    return report
+
+
+if __name__ == "__main__":
+    for module_name, module_report in import_time_report().items():
+        print(f"{module_name:<35} {module_report['cumulative'] / 1000.:8.1f} ms")
+        for package_name, cumulative_us in module_report["heaviest"]:
+            print(f"    {package_name:<31} {cumulative_us / 1000.:8.1f} ms")
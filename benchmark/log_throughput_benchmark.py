@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# coding: utf-8
+
+r"""Throughput [rows/s] of the streaming true wind reconstruction from logs.
+
+A synthetic CSV log (with a few malformed rows and excessive heel angles)
+is written to a temporary directory, then processed with
+true_wind_from_log() and, for reference, row by row with true_wind().
+
+"""
+
+import os
+import tempfile
+from time import perf_counter
+
+import numpy as np
+
+from ydeos_aerodynamics.logs import true_wind_from_log
+from ydeos_aerodynamics.true import true_wind
+
+NB_ROWS = 1000000
+NB_ROWS_ROW_BY_ROW = 100000
+
+
+def write_log(path: str, nb_rows: int, seed: int = 0) -> None:
+    r"""Synthetic log of aws, awa, boatspeed and heel, 1 row in 10000 is malformed."""
+    rng = np.random.default_rng(seed)
+    data = np.column_stack([rng.uniform(0., 20., nb_rows),
+                            rng.uniform(-180., 180., nb_rows),
+                            rng.uniform(0., 8., nb_rows),
+                            rng.uniform(-30., 30., nb_rows)])
+    data[::5000, 3] = 95.
+    with open(path, 'w') as f:
+        f.write("aws,awa,bsp,heel\n")
+        for i, row in enumerate(data):
+            if i % 10000 == 1:
+                f.write("nan,,\n")
+            else:
+                f.write("%.3f,%.3f,%.3f,%.3f\n" % tuple(row))
+
+
+def row_by_row(path: str) -> float:
+    r"""Rows/s of a row by row processing with true_wind()."""
+    start = perf_counter()
+    nb_rows = 0
+    with open(path) as f:
+        f.readline()
+        for line in f:
+            try:
+                true_wind(*(float(field) for field in line.split(",")))
+            except (ValueError, TypeError):
+                pass
+            nb_rows += 1
+    return nb_rows / (perf_counter() - start)
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as directory:
+        log = os.path.join(directory, "log.csv")
+        write_log(log, NB_ROWS)
+        report = true_wind_from_log(log, os.path.join(directory, "out"))
+        print(f"streaming   : {report['rows_per_second']:12.0f} rows/s "
+              f"({report['rows']} rows, {report['malformed_rows']} malformed, {report['invalid_rows']} invalid)")
+
+        small_log = os.path.join(directory, "small_log.csv")
+        write_log(small_log, NB_ROWS_ROW_BY_ROW)
+        print(f"row by row  : {row_by_row(small_log):12.0f} rows/s")
@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+# coding: utf-8
+
+r"""Scaling of the parallel sweep with the number of worker processes.
+
+All the sail combinations of a rig are swept on a grid of sailing states
+with 1, 2, 4, ... workers, up to the number of CPUs.
+
+"""
+
+import os
+from time import perf_counter
+
+import numpy as np
+
+from ydeos_aerodynamics.model import Rig
+from ydeos_aerodynamics.sweep import sweep, sail_combinations
+
+RIGS = sail_combinations(Rig("main", 0.3, (0.4, 0., 0.68), "jib", 0.2, (0.8, 0., 0.45), 1.7))
+AXES = (np.linspace(2., 15., 14),
+        np.linspace(30., 180., 31),
+        np.linspace(0., 4., 9),
+        np.linspace(0., 30., 7),
+        np.linspace(0.6, 1., 5))
+
+
+if __name__ == "__main__":
+    nb_workers = 1
+    reference_time = None
+    while nb_workers <= os.cpu_count():
+        start = perf_counter()
+        sweep(RIGS, *AXES, nb_workers=nb_workers)
+        elapsed = perf_counter() - start
+        reference_time = reference_time or elapsed
+        print(f"{nb_workers:3d} workers: {elapsed:8.2f} s, speedup {reference_time / elapsed:5.2f}")
+        nb_workers *= 2
@@ -5,8 +5,11 @@ r"""tests for the air.py module."""
 
 import math
 
+import numpy as np
+
 from ydeos_aerodynamics.air import density_air, densities_air, \
-    kinematic_viscosity_air, kinematic_viscosities_air, temperatures
+    kinematic_viscosity_air, kinematic_viscosities_air, temperatures, \
+    density_air_array, kinematic_viscosity_air_array, RHO_AIR_20C
 
 
 def test_temperature_bounds():
@@ -37,3 +40,28 @@ def test_wrong_temperature():
 
     assert math.isnan(kinematic_viscosity_air(temperature=max(temperatures) + 1e-6))
     assert math.isnan(kinematic_viscosity_air(temperature=min(temperatures) - 1e-6))
+
+
+def test_scalar_and_array_paths():
+    r"""Scalar and array paths.
+
+    Check that the scalar path returns floats identical to the array path
+
+    """
+    temperature_array = np.linspace(min(temperatures), max(temperatures), 1001)
+    densities = density_air_array(temperature_array)
+    kinematic_viscosities = kinematic_viscosity_air_array(temperature_array)
+    for temperature, density, kinematic_viscosity in zip(temperature_array,
+                                                          densities,
+                                                          kinematic_viscosities):
+        assert isinstance(density_air(float(temperature)), float)
+        assert density_air(float(temperature)) == density
+        assert kinematic_viscosity_air(float(temperature)) == kinematic_viscosity
+
+
+def test_array_path_wrong_temperatures():
+    r"""NaN outside of the temperature range, element by element"""
+    densities = density_air(np.array([min(temperatures) - 1, 20., max(temperatures) + 1]))
+    assert np.isnan(densities[0])
+    assert densities[1] == RHO_AIR_20C
+    assert np.isnan(densities[2])
@@ -5,10 +5,15 @@ r"""Tests for the apparent.py module."""
 
 import math
 
+import itertools
+
+import numpy as np
 import pytest
 
 from ydeos_aerodynamics.apparent import apparent_wind_angle, \
-    apparent_wind_speed, apparent_wind
+    apparent_wind_speed, apparent_wind, apparent_wind_angle_array, \
+    apparent_wind_speed_array, apparent_wind_validity, apparent_wind_array, \
+    apparent_wind_jacobian_array, apparent_wind_jacobian, phi_up, WindState
 
 
 def test_awa_unrealistic_heel_angle():
@@ -220,3 +225,164 @@ def test_apparent_wind():
                              boatspeed=10.)
     assert apparent["speed"] == 10 * math.sqrt(2)
     assert apparent["angle"] == 45.
+
+
+# Vectorized versions
+
+
+def test_apparent_wind_arrays_match_scalar():
+    r"""Vectorized apparent wind has the same values as the scalar functions"""
+    states = np.array(list(itertools.product([0., 1., 10.],
+                                             [-180., -165., -90., -45., 0., 45., 90., 170., 180.],
+                                             [-10., -1., 0., 1., 10.],
+                                             [-40., 0., 40., 90.])))
+    awas = apparent_wind_angle_array(*states.T)
+    awss = apparent_wind_speed_array(*states.T)
+    for state, awa, aws in zip(states, awas, awss):
+        assert np.isclose(awa, apparent_wind_angle(*state), rtol=1e-12, atol=1e-12)
+        assert np.isclose(aws, apparent_wind_speed(*state), rtol=1e-12, atol=1e-12)
+
+
+def test_apparent_wind_arrays_exceptions():
+    r"""A single wrong element raises a ValueError"""
+    with pytest.raises(ValueError):
+        apparent_wind_angle_array(np.array([1., -1.]), 45., 0.)
+    with pytest.raises(ValueError):
+        apparent_wind_speed_array(1., np.array([45., 181.]), 0.)
+    with pytest.raises(ValueError):
+        apparent_wind_speed_array(1., 45., 0., np.array([0., 90.1]), check_heel_angle=True)
+
+
+def test_apparent_wind_arrays_invalid_rows():
+    r"""A single ValueError with the indices, or NaN at the invalid rows"""
+    true_wind_speeds = np.array([[1., -1.], [2., -3.]])
+    assert apparent_wind_validity(true_wind_speeds, 45.).tolist() == [[True, False], [True, False]]
+    with pytest.raises(ValueError, match=r"2 invalid rows at indices \[\(0, 1\), \(1, 1\)\]"):
+        apparent_wind_angle_array(true_wind_speeds, 45., 0.)
+    awss = apparent_wind_speed_array(true_wind_speeds, 45., 0., errors='nan')
+    assert np.isnan(awss[0, 1]) and np.isnan(awss[1, 1])
+    assert awss[1, 0] == 2.
+
+
+def test_apparent_wind_array_floats():
+    r"""Float inputs (0-d arrays) give the values of the scalar functions, inputs are not modified"""
+    for state in ((10., 45., 2., 10.), (10., -135., 2., -10.), (3., 100., -3., 0.), (0., 0., 0., 0.)):
+        batch = apparent_wind_array(*state)
+        assert float(batch.speed) == pytest.approx(apparent_wind_speed(*state), rel=1e-12)
+        assert float(batch.angle) == pytest.approx(apparent_wind_angle(*state), rel=1e-12, abs=1e-12)
+    true_wind_angles = np.array([-120., 30., 200.])
+    apparent_wind_angle_array(5., true_wind_angles, 1., errors='nan')
+    assert true_wind_angles.tolist() == [-120., 30., 200.]
+
+
+def test_fused_apparent_wind():
+    r"""The fused functions return the same values as the separate ones"""
+    states = np.array(list(itertools.product([0., 1., 10.],
+                                             [-180., -165., -90., -45., 0., 45., 90., 170., 180.],
+                                             [-10., -1., 0., 1., 10.],
+                                             [-40., 0., 40., 90.])))
+    batch = apparent_wind_array(*states.T)
+    assert not hasattr(batch, '__dict__')
+    assert np.array_equal(batch.speed, apparent_wind_speed_array(*states.T))
+    assert np.array_equal(batch.angle, apparent_wind_angle_array(*states.T))
+    for state in states:
+        assert apparent_wind(*state) == {"speed": apparent_wind_speed(*state),
+                                         "angle": apparent_wind_angle(*state)}
+    with pytest.raises(ValueError):
+        apparent_wind(-1., 45., 0.)
+
+
+def test_apparent_wind_jacobian_array_finite_differences():
+    r"""The derivatives match centred finite differences"""
+    rng = np.random.default_rng(0)
+    states = {"true_wind_speed": rng.uniform(1., 20., 500),
+              "true_wind_angle": rng.uniform(-179., 179., 500),
+              "boatspeed": rng.uniform(0., 8., 500),
+              "heel_angle": rng.uniform(-40., 40., 500)}
+    jacobian = apparent_wind_jacobian_array(**states)
+    apparent = apparent_wind_array(**states)
+    assert np.array_equal(jacobian.speed, apparent.speed)
+    assert np.array_equal(jacobian.angle, apparent.angle)
+    step = 1e-6
+    for name in states:
+        upper = apparent_wind_array(**dict(states, **{name: states[name] + step}))
+        lower = apparent_wind_array(**dict(states, **{name: states[name] - step}))
+        assert np.allclose(jacobian.speed_derivatives[name], (upper.speed - lower.speed) / (2. * step),
+                           rtol=1e-5, atol=1e-6)
+        assert np.allclose(jacobian.angle_derivatives[name], (upper.angle - lower.angle) / (2. * step),
+                           rtol=1e-5, atol=1e-6)
+
+
+def test_apparent_wind_jacobian_null_angle():
+    r"""At twa = 0 (awa = 0), the derivatives match centred finite differences (scalar and arrays)"""
+    states = {"true_wind_speed": np.array([10., 5., 12.]),
+              "true_wind_angle": np.zeros(3),
+              "boatspeed": np.array([2., 0., 6.]),
+              "heel_angle": np.array([10., 0., -25.])}
+    jacobian = apparent_wind_jacobian_array(**states)
+    step = 1e-6
+    for name in states:
+        upper = apparent_wind_array(**dict(states, **{name: states[name] + step}))
+        lower = apparent_wind_array(**dict(states, **{name: states[name] - step}))
+        expected = (upper.angle - lower.angle) / (2. * step)
+        assert np.allclose(jacobian.angle_derivatives[name], expected, rtol=1e-5, atol=1e-6)
+        for i in range(3):
+            scalar = apparent_wind_jacobian(*(values[i] for values in states.values()))
+            assert scalar["angle_derivatives"][name] == pytest.approx(expected[i], rel=1e-5, abs=1e-6)
+    # 10 cos(10 deg) / 12 degree per degree
+    assert apparent_wind_jacobian(10., 0., 2., 10.)["angle_derivatives"]["true_wind_angle"] == \
+        pytest.approx(10. * math.cos(math.radians(10.)) / 12., rel=1e-12)
+
+
+def test_apparent_wind_jacobian_array_invalid_rows():
+    r"""Invalid rows raise or are NaN"""
+    with pytest.raises(ValueError):
+        apparent_wind_jacobian_array(np.array([10., -1.]), 45., 2.)
+    jacobian = apparent_wind_jacobian_array(np.array([10., -1.]), 45., 2., errors='nan')
+    assert np.isnan(jacobian.speed[1]) and np.isnan(jacobian.angle_derivatives["boatspeed"][1])
+    assert not np.isnan(jacobian.speed_derivatives["heel_angle"][0])
+
+
+def test_apparent_wind_jacobian_scalar():
+    r"""Scalar version, same values as the vectorized version"""
+    states = list(itertools.product([0.5, 10.], [-150., -30., 0., 60., 180.], [-1., 0., 3.], [-20., 0., 15.]))
+    jacobian_array = apparent_wind_jacobian_array(*np.array(states).T)
+    for i, state in enumerate(states):
+        jacobian = apparent_wind_jacobian(*state)
+        assert jacobian["speed"] == apparent_wind(*state)["speed"]
+        assert jacobian["angle"] == apparent_wind(*state)["angle"]
+        for name, derivative in jacobian["speed_derivatives"].items():
+            assert derivative == pytest.approx(jacobian_array.speed_derivatives[name][i], rel=1e-12, abs=1e-12)
+        for name, derivative in jacobian["angle_derivatives"].items():
+            assert derivative == pytest.approx(jacobian_array.angle_derivatives[name][i], rel=1e-12, abs=1e-12)
+    assert math.isnan(apparent_wind_jacobian(0., 45., 0.)["speed_derivatives"]["boatspeed"])
+
+
+def test_wind_state():
+    r"""The apparent winds of a WindState are those of the apparent wind functions"""
+    states = list(itertools.product([0., 3., 10.], [-180., -45., 0., 30., 150.], [-2., 0., 2.], [-30., 0., 10.]))
+    for tws, twa, boatspeed, heel_angle in states:
+        wind_state = WindState(tws, twa, boatspeed, heel_angle)
+        for apparent, heel in ((wind_state.upright, 0.), (wind_state.heeled, heel_angle)):
+            expected = apparent_wind(tws, twa, boatspeed, heel)
+            assert apparent.speed == expected["speed"]
+            assert apparent.angle == expected["angle"]
+        assert abs(wind_state.phi_up.angle) == apparent_wind_angle(tws, abs(twa), boatspeed, phi_up(heel_angle))
+
+    tws, twa, boatspeed, heel_angle = np.array(states).T
+    wind_state = WindState(tws, twa, boatspeed, heel_angle)
+    for apparent, heel in ((wind_state.upright, 0.), (wind_state.heeled, heel_angle),
+                           (wind_state.phi_up, phi_up(heel_angle))):
+        expected = apparent_wind_array(tws, twa, boatspeed, heel)
+        np.testing.assert_array_equal(apparent.speed, expected.speed)
+        np.testing.assert_array_equal(apparent.angle, expected.angle)
+
+
+def test_wind_state_wrong_input():
+    r"""Invalid true winds raise a ValueError"""
+    with pytest.raises(ValueError):
+        WindState(-1., 45., 2.)
+    with pytest.raises(ValueError):
+        WindState(10., 181., 2.)
+    with pytest.raises(ValueError):
+        WindState(np.array([10., -1.]), 45., 2.)
@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+r"""Tests for the cache.py module"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from ydeos_aerodynamics.cache import AeroForceCache
+from ydeos_aerodynamics.force import Force
+from ydeos_aerodynamics.model import Rig, aero_force
+
+RIG = Rig(mainsail_type='main',
+          mainsail_area=0.3,
+          mainsail_coe=(0.4, 0., 0.68),
+          frontsail_type='jib',
+          frontsail_area=0.2,
+          frontsail_coe=(0.8, 0., 0.45),
+          rig_z_max=1.7)
+
+
+def test_cache_same_as_aero_force():
+    r"""The cached force is aero_force at the quantized inputs"""
+    cache = AeroForceCache(quanta={'tws': 0.5, 'twa': 1.})
+    force = cache(10.2, 45.4, 2., 10., 0., **RIG._asdict())
+    assert isinstance(force, Force)
+    assert force == aero_force(10., 45., 2., 10., 0., **RIG._asdict())
+
+
+def test_cache_hits_misses():
+    r"""Inputs sharing a quantized key are hits"""
+    cache = AeroForceCache()
+    first = cache(10., 45., 2., 10., 0., **RIG._asdict())
+    second = cache(10.0001, 45.001, 2., 10., 0., **RIG._asdict())
+    cache(10.01, 45., 2., 10., 0., **RIG._asdict())
+    cache(10., 45., 2., 10., 0., **RIG._replace(frontsail_type='jib_high')._asdict())
+    assert second is first
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["size"]) == (1, 3, 3)
+    assert stats["hit_rate"] == pytest.approx(0.25)
+    cache.clear()
+    assert len(cache) == 0 and cache.stats()["hits"] == 0
+
+
+def test_cache_lru_eviction():
+    r"""The least recently used force is evicted"""
+    cache = AeroForceCache(maxsize=2)
+    cache(8., 45., 2., 10., 0., **RIG._asdict())
+    cache(9., 45., 2., 10., 0., **RIG._asdict())
+    cache(8., 45., 2., 10., 0., **RIG._asdict())  # 8 m/s becomes the most recently used
+    cache(10., 45., 2., 10., 0., **RIG._asdict())  # evicts 9 m/s
+    assert len(cache) == 2 and cache.evictions == 1
+    cache(8., 45., 2., 10., 0., **RIG._asdict())
+    assert cache.hits == 2
+    cache(9., 45., 2., 10., 0., **RIG._asdict())
+    assert cache.misses == 4
+
+
+def test_cache_immutable():
+    r"""Cached forces cannot be modified"""
+    force = AeroForceCache()(10., 45., 2., 10., 0., **RIG._asdict())
+    with pytest.raises(AttributeError):
+        force.fx = 0.
+
+
+def test_cache_threads():
+    r"""Concurrent use from several threads"""
+    cache = AeroForceCache(maxsize=50)
+    states = [(5. + i % 70, 45., 2., 10., 0.) for i in range(2000)]
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        forces = list(executor.map(lambda state: cache(*state, **RIG._asdict()), states))
+    assert forces[0] == aero_force(*states[0], **RIG._asdict())
+    stats = cache.stats()
+    assert stats["hits"] + stats["misses"] == len(states)
+    assert stats["size"] <= 50
+    assert stats["evictions"] <= stats["misses"] - stats["size"]
+
+
+def test_cache_exceptions():
+    r"""Wrong cache parameters, aero_force errors are not cached"""
+    with pytest.raises(ValueError):
+        AeroForceCache(maxsize=0)
+    with pytest.raises(ValueError):
+        AeroForceCache(quanta={'mainsail_type': 1.})
+    with pytest.raises(ValueError):
+        AeroForceCache(quanta={'tws': -1.})
+    cache = AeroForceCache()
+    with pytest.raises(ValueError):
+        cache(10., 45., 2., 10., 0., **RIG._replace(mainsail_area=-1.)._asdict())
+    assert len(cache) == 0
+
+
+def test_cache_checks_raw_inputs():
+    r"""Invalid inputs within half a quantum of a valid value raise, as with aero_force"""
+    cache = AeroForceCache()
+    cache(0., 180., 2., 10., 0., **RIG._asdict())
+    for state, flat in (((-0.0004, 45., 2., 10., 0.), 1.),
+                        ((10., 180.004, 2., 10., 0.), 1.),
+                        ((10., -180.004, 2., 10., 0.), 1.),
+                        ((10., 45., 2., 10., 0.), 1.00004)):
+        with pytest.raises(ValueError):
+            aero_force(*state, flat=flat, **RIG._asdict())
+        with pytest.raises(ValueError):
+            cache(*state, flat=flat, **RIG._asdict())
+    assert cache.stats()["hits"] == 0
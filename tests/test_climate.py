@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+r"""Tests for the climate.py module"""
+
+import numpy as np
+import pytest
+
+from ydeos_aerodynamics.climate import RunningStatistics, climate_statistics
+from ydeos_aerodynamics.distribution import weibull_sample_chunks
+from ydeos_aerodynamics.model import Rig
+from ydeos_aerodynamics.total import total_aero_force
+from ydeos_aerodynamics.windage import HullWindageModel
+
+RIG = Rig(mainsail_type='main',
+          mainsail_area=0.3,
+          mainsail_coe=(0.4, 0., 0.68),
+          frontsail_type='jib',
+          frontsail_area=0.2,
+          frontsail_coe=(0.8, 0., 0.45),
+          rig_z_max=1.7)
+
+
+def test_running_statistics():
+    r"""Chunk updates and merges give the statistics of all the values"""
+    values = np.random.default_rng(0).normal(1e6, 2., 10001)
+    statistics = RunningStatistics()
+    for chunk in np.array_split(values, 7):
+        statistics.update(chunk)
+    assert statistics.count == len(values)
+    assert statistics.mean == pytest.approx(np.mean(values), rel=1e-15)
+    assert statistics.variance == pytest.approx(np.var(values, ddof=1), rel=1e-10)
+    assert statistics.standard_error == pytest.approx(np.std(values, ddof=1) / np.sqrt(len(values)), rel=1e-10)
+
+    merged = RunningStatistics().update(values[:100]).merge(RunningStatistics().update(values[100:]))
+    assert merged.mean == pytest.approx(statistics.mean, rel=1e-15)
+    assert merged.variance == pytest.approx(statistics.variance, rel=1e-10)
+    assert merged.merge(RunningStatistics()).count == len(values)
+    assert np.isnan(RunningStatistics().update([1.]).variance)
+
+
+def test_climate_statistics_match_direct_evaluation():
+    r"""The statistics are the ones of the forces of all the samples evaluated at once"""
+    hull_windage = HullWindageModel(0.07, 1., 0.2)
+    statistics = climate_statistics(RIG, 5., 1.65, [40., 90., 150.], lambda tws, twa: 0.3 * tws, 10.,
+                                    nb_samples=2500, twa_weights=[2., 1., 1.], hull_windage=hull_windage,
+                                    chunk_size=1000, seed=7)
+
+    tws = np.concatenate(list(weibull_sample_chunks(2500, 5., 1.65, chunk_size=1000, seed=7)))
+    assert statistics['tws'].mean == pytest.approx(np.mean(tws), rel=1e-12)
+    # The driving force only depends on the tws here, the twa is common to all the samples
+    force, _ = total_aero_force(RIG, tws, 40., 0.3 * tws, 10., hull_windage=hull_windage)
+    single_twa = climate_statistics(RIG, 5., 1.65, 40., lambda tws, twa: 0.3 * tws, 10., nb_samples=2500,
+                                    hull_windage=hull_windage, chunk_size=1000, seed=7)
+    assert single_twa['driving_force'].count == 2500
+    assert single_twa['driving_force'].mean == pytest.approx(np.mean(force.fx), rel=1e-12)
+    assert single_twa['driving_force'].variance == pytest.approx(np.var(force.fx, ddof=1), rel=1e-10)
+    assert single_twa['vmg'].mean == pytest.approx(np.mean(0.3 * tws) * np.cos(np.radians(40.)), rel=1e-12)
+    # Negative vmg downwind, twice as many samples at 40 degrees
+    assert statistics['vmg'].mean < single_twa['vmg'].mean
+
+
+def test_climate_statistics_heeling_force_both_tacks():
+    r"""The heeling force is unsigned: mirrored directions give the statistics of a single tack"""
+    both_tacks = climate_statistics(RIG, 5., 1.65, [-60., 60.], 2., nb_samples=3000, chunk_size=1000, seed=5)
+    starboard = climate_statistics(RIG, 5., 1.65, 60., 2., nb_samples=3000, chunk_size=1000, seed=5)
+    assert both_tacks['heeling_force'].mean > 0.
+    for name in ('driving_force', 'heeling_force'):
+        assert both_tacks[name].mean == pytest.approx(starboard[name].mean, rel=1e-12)
+        assert both_tacks[name].variance == pytest.approx(starboard[name].variance, rel=1e-10)
+
+
+def test_climate_statistics_workers():
+    r"""Chunks split between workers give the statistics of a single run"""
+    arguments = (RIG, 6., 2., [-60., 45., 120.], 2.)
+    single = climate_statistics(*arguments, nb_samples=5000, chunk_size=512, seed=11)
+    workers = [climate_statistics(*arguments, nb_samples=5000, chunk_size=512, seed=11, chunks=range(i, 10, 3))
+               for i in range(3)]
+    for name, statistics in single.items():
+        merged = RunningStatistics()
+        for worker in workers:
+            merged.merge(worker[name])
+        assert merged.count == statistics.count == 5000
+        assert merged.mean == pytest.approx(statistics.mean, rel=1e-12)
+        assert merged.variance == pytest.approx(statistics.variance, rel=1e-10)
+    other_seed = climate_statistics(*arguments, nb_samples=5000, chunk_size=512, seed=12)
+    assert other_seed['driving_force'].mean != single['driving_force'].mean
+
+
+def test_climate_statistics_invalid():
+    r"""Invalid climates and direction distributions raise ValueError"""
+    with pytest.raises(ValueError):
+        climate_statistics(RIG, 0., 1.65, 45., 2.)
+    with pytest.raises(ValueError):
+        climate_statistics(RIG, 5., 1.65, [], 2.)
+    with pytest.raises(ValueError):
+        climate_statistics(RIG, 5., 1.65, [45., 90.], 2., twa_weights=[1.])
+    with pytest.raises(ValueError):
+        climate_statistics(RIG, 5., 1.65, [45., 90.], 2., twa_weights=[1., -1.])
@@ -3,6 +3,7 @@
 
 r"""Tests for the coefficients.py module"""
 
+import numpy as np
 import pytest
 
 from ydeos_aerodynamics.model import ImsAeroModelCoefficients
@@ -32,3 +33,66 @@ def test_shitty_calls():
 
     assert cl == 0
     assert cd == 0
+
+
+def test_coefficient_tables_match_interpolants():
+    r"""The precompiled tables have the same values as the interpolants"""
+    for sail_type, table in ImsAeroModelCoefficients.coefficient_tables().items():
+        c_lift, c_drag = ImsAeroModelCoefficients.coefficient_interp(sail_type)
+        awas = np.concatenate([np.linspace(-10., 190., 401), c_lift._x, c_drag._x])
+        cls, cds = table(awas)
+        for awa, cl, cd in zip(awas, cls, cds):
+            assert cl == c_lift(awa)
+            assert cd == c_drag(awa)
+            assert table(float(awa)) == (cl, cd)
+
+
+def test_coefficient_table_derivative():
+    r"""The derivatives of the tables are the ones of the PCHIP interpolants"""
+    for sail_type, table in ImsAeroModelCoefficients.coefficient_tables().items():
+        c_lift, c_drag = ImsAeroModelCoefficients.coefficient_interp(sail_type)
+        awas = np.linspace(-10., 190., 401)
+        d_cls, d_cds = table.derivative(awas)
+        for interpolant, derivatives in ((c_lift, d_cls), (c_drag, d_cds)):
+            in_range = (awas >= interpolant._x[0]) & (awas <= interpolant._x[-1])
+            assert np.allclose(derivatives[in_range], interpolant._interpolant.derivative()(awas[in_range]),
+                               rtol=1e-12, atol=1e-12)
+            assert np.all(derivatives[~in_range] == 0.)
+        assert table.derivative(45.) == (d_cls[110], d_cds[110])
+
+
+def test_coefficient_table_types():
+    r"""Plain floats for a scalar, arrays for an array"""
+    table = ImsAeroModelCoefficients.coefficient_table('main')
+    cl, cd = table(45.)
+    assert isinstance(cl, float)
+    assert isinstance(cd, float)
+    awas = np.array([[10., 45., 120.], [-1., 181., 170.]])
+    cls, cds = table(awas)
+    assert cls.shape == (2, 3)
+    assert cds[1, 0] == 0.
+    assert cls[1, 1] == 0.
+    for awa, cl, cd in zip(awas.ravel(), cls.ravel(), cds.ravel()):
+        assert table(awa) == (cl, cd)
+
+
+def test_coefficient_table_nd_out_of_range():
+    r"""n-d awas outside of the range of one curve only: 0 for that curve, as in the 1-D path"""
+    for sail_type, awas in (('main', [[[10., 175.], [45., 15.]], [[175., 10.], [19., 171.]]]),
+                            ('jib', [[[12., 155.], [45., 9.]], [[160., 15.], [8., 151.]]])):
+        table = ImsAeroModelCoefficients.coefficient_table(sail_type)
+        awas = np.array(awas)
+        for values, flat_values, (lower, upper) in zip(table(awas), table(awas.ravel()), table.bounds):
+            assert values.shape == awas.shape
+            assert np.array_equal(values.ravel(), flat_values)
+            out_of_range = (awas < lower) | (awas > upper)
+            assert np.any(out_of_range) and not np.all(out_of_range)
+            assert np.all(values[out_of_range] == 0.)
+        for values, flat_values in zip(table.derivative(awas), table.derivative(awas.ravel())):
+            assert np.array_equal(values.ravel(), flat_values)
+
+
+def test_coefficient_table_unknown_sail_type():
+    r"""Unknown sail type"""
+    with pytest.raises(ValueError):
+        ImsAeroModelCoefficients.coefficient_table('unknown_sail_type')
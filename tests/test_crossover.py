@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+r"""Tests for the crossover.py module"""
+
+import numpy as np
+import pytest
+
+from ydeos_aerodynamics.crossover import CrossoverEngine, sail_crossover
+from ydeos_aerodynamics.model import Rig, aero_force
+from ydeos_aerodynamics.sweep import sail_combinations
+
+RIGS = sail_combinations(Rig(mainsail_type='main',
+                             mainsail_area=0.3,
+                             mainsail_coe=(0.4, 0., 0.68),
+                             frontsail_type='jib',
+                             frontsail_area=0.2,
+                             frontsail_coe=(0.8, 0., 0.45),
+                             rig_z_max=1.7))
+
+TWS = np.linspace(2., 14., 4)
+TWA = np.linspace(30., 180., 6)
+
+
+def test_sail_crossover_brute_force():
+    r"""The best rig is the one with the largest driving force"""
+    crossover = sail_crossover(RIGS, TWS, TWA, boatspeed=2., heel_angle=10.)
+    for i, tws in enumerate(TWS):
+        for j, twa in enumerate(TWA):
+            driving_forces = [aero_force(tws, twa, 2., 10., 0., **rig._asdict()).fx for rig in RIGS]
+            assert crossover.best_index[i, j] == int(np.argmax(driving_forces))
+            assert crossover.best_driving_force[i, j] == pytest.approx(max(driving_forces))
+            assert crossover.best_rigs()[i][j] == RIGS[int(np.argmax(driving_forces))]
+
+
+def test_sail_crossover_heeling_moment_limit():
+    r"""The best rigs satisfy the heeling moment limit, None if no rig does"""
+    crossover = sail_crossover(RIGS, TWS, TWA, boatspeed=2., heel_angle=10., max_heeling_moment=5.)
+    best_sails = crossover.best_sails()
+    for i in range(len(TWS)):
+        for j in range(len(TWA)):
+            index = crossover.best_index[i, j]
+            if index >= 0:
+                assert crossover.heeling_moment[index, i, j] <= 5.
+                assert best_sails[i][j] == (RIGS[index].mainsail_type, RIGS[index].frontsail_type)
+            else:
+                assert np.all(crossover.heeling_moment[:, i, j] > 5.)
+                assert np.isnan(crossover.best_driving_force[i, j])
+                assert best_sails[i][j] is None
+    assert np.any(crossover.best_index == -1)
+
+
+def test_sail_crossover_cache():
+    r"""A repeated query is answered from the cache of the engine, bounded by maxsize"""
+    engine = CrossoverEngine(maxsize=len(RIGS) + 1)
+    crossover = sail_crossover(RIGS, TWS, TWA, boatspeed=1.5, engine=engine)
+    assert engine.stats()["misses"] == len(RIGS)
+    cached = sail_crossover(RIGS, TWS, TWA, boatspeed=1.5, max_heeling_moment=10., engine=engine)
+    assert engine.hits == len(RIGS)
+    np.testing.assert_array_equal(cached.driving_force, crossover.driving_force)
+    np.testing.assert_array_equal(cached.driving_force, sail_crossover(RIGS, TWS, TWA, boatspeed=1.5).driving_force)
+
+    sail_crossover(RIGS[:2], TWS, TWA, boatspeed=2.5, engine=engine)
+    assert len(engine) == len(RIGS) + 1
+    assert engine.evictions == 1
+    engine.clear()
+    assert len(engine) == 0 and engine.stats()["hits"] == 0
+    with pytest.raises(ValueError):
+        CrossoverEngine(maxsize=0)
+
+
+def test_sail_crossover_exceptions():
+    r"""No rig, negative heeling moment limit"""
+    with pytest.raises(ValueError):
+        sail_crossover([], TWS, TWA, boatspeed=2.)
+    with pytest.raises(ValueError):
+        sail_crossover(RIGS, TWS, TWA, boatspeed=2., max_heeling_moment=-1.)
@@ -3,10 +3,15 @@
 
 r"""Tests for the distribution.py module"""
 
+import subprocess
+import sys
+
 import numpy as np
+import pytest
 
 from ydeos_aerodynamics.distribution import weibull_pdf, weibull_cdf, \
-    weibull_mean, plot_weibull, weibull_random_samples
+    weibull_mean, plot_weibull, weibull_random_samples, weibull_pdf_array, \
+    weibull_cdf_array, weibull_sf_array, weibull_ppf_array, weibull_sample_chunks
 
 
 def test_weibull_pdf():
@@ -40,3 +45,47 @@ def test_weibull_ransom_samples():
     r"""Just make sure it works"""
     samples = weibull_random_samples()
     assert isinstance(samples, np.ndarray)
+
+
+def test_no_matplotlib_import():
+    r"""Importing the module does not import matplotlib"""
+    code = "import sys, ydeos_aerodynamics.distribution; " \
+           "assert 'matplotlib' not in sys.modules"
+    subprocess.run([sys.executable, "-c", code], check=True)
+
+
+def test_weibull_arrays():
+    r"""The array functions have the same values as the scalar ones"""
+    xs = np.linspace(-2., 30., 321)
+    for lambda_, k in ((1., 1.65), (7., 2.), (5., 0.9)):
+        pdfs = weibull_pdf_array(xs, lambda_, k)
+        cdfs = weibull_cdf_array(xs, lambda_, k)
+        for x, pdf, cdf in zip(xs, pdfs, cdfs):
+            if x != 0.:
+                assert np.isclose(pdf, weibull_pdf(x, lambda_, k), rtol=1e-12, atol=0.)
+            assert np.isclose(cdf, weibull_cdf(x, lambda_, k), rtol=1e-12, atol=0.)
+        assert np.allclose(weibull_sf_array(xs, lambda_, k), 1. - cdfs, rtol=0., atol=1e-15)
+    assert weibull_pdf_array(-1.) == 0.
+    assert weibull_cdf_array(-1.) == 0.
+
+
+def test_weibull_ppf():
+    r"""The percent point function is the inverse of the cdf"""
+    qs = np.linspace(0., 0.999, 1000)
+    assert np.allclose(weibull_cdf_array(weibull_ppf_array(qs, 7., 2.), 7., 2.), qs, rtol=0., atol=1e-12)
+    assert weibull_ppf_array(0.) == 0.
+    assert np.isinf(weibull_ppf_array(1.))
+    assert np.all(np.isnan(weibull_ppf_array([-0.1, 1.1])))
+
+
+def test_weibull_sample_chunks():
+    r"""The chunks have the requested sizes, only depend on the seed and follow the distribution"""
+    chunks = list(weibull_sample_chunks(250001, 7., 2., chunk_size=100000, seed=3))
+    assert [len(chunk) for chunk in chunks] == [100000, 100000, 50001]
+    again = list(weibull_sample_chunks(250001, 7., 2., chunk_size=100000, seed=3))
+    assert all(np.array_equal(chunk, chunk_again) for chunk, chunk_again in zip(chunks, again))
+    assert not np.array_equal(chunks[0], next(weibull_sample_chunks(100000, 7., 2., 100000, seed=4)))
+    assert np.mean(np.concatenate(chunks)) == pytest.approx(weibull_mean(7., 2.), rel=1e-2)
+    assert list(weibull_sample_chunks(0)) == []
+    with pytest.raises(ValueError):
+        next(weibull_sample_chunks(10, chunk_size=0))
@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+r"""Tests for the fleet.py module"""
+
+import numpy as np
+import pytest
+
+from ydeos_aerodynamics.fleet import StackedCoefficientTables, aero_force_fleet
+from ydeos_aerodynamics.model import ImsAeroModelCoefficients, aero_force_array
+from ydeos_aerodynamics.registry import SailCoefficientRegistry
+
+
+def test_stacked_tables_match_tables():
+    r"""The stacked tables give the values of the table of each sail, at and around the breakpoints"""
+    tables = StackedCoefficientTables.from_registry()
+    assert tables.sail_types == tuple(ImsAeroModelCoefficients.sail_types())
+    breakpoints = np.concatenate([table.breakpoints
+                                  for table in ImsAeroModelCoefficients.coefficient_tables().values()])
+    awa = np.concatenate([np.linspace(-10., 190., 401), breakpoints,
+                          np.nextafter(breakpoints, -np.inf), np.nextafter(breakpoints, np.inf)])
+    for sail_id, sail_type in enumerate(tables.sail_types):
+        cl, cd = tables(sail_id, awa)
+        expected_cl, expected_cd = ImsAeroModelCoefficients.coefficient_table(sail_type)(awa)
+        np.testing.assert_array_equal(cl, expected_cl)
+        np.testing.assert_array_equal(cd, expected_cd)
+    with pytest.raises(ValueError):
+        tables(len(tables), 45.)
+
+
+def test_aero_force_fleet_matches_aero_force_array():
+    r"""Each row has the force of its own rig"""
+    sail_types = ImsAeroModelCoefficients.sail_types()
+    rng = np.random.default_rng(0)
+    nb_rows = 500
+    mainsail_ids = rng.choice([sail_types.index(name) for name in ImsAeroModelCoefficients.mainsail_types()], nb_rows)
+    frontsail_ids = rng.choice([sail_types.index(name) for name in ImsAeroModelCoefficients.frontsail_types()], nb_rows)
+    states = [rng.uniform(2., 15., nb_rows), rng.uniform(-180., 180., nb_rows),
+              rng.uniform(0., 4., nb_rows), rng.uniform(-10., 30., nb_rows), rng.uniform(-2., 2., nb_rows)]
+    mainsail_areas = rng.uniform(0.2, 0.4, nb_rows)
+    mainsail_coes = np.column_stack([rng.uniform(0.3, 0.5, nb_rows), np.zeros(nb_rows), rng.uniform(0.6, 0.8, nb_rows)])
+    rig_z_max = rng.uniform(1.5, 1.9, nb_rows)
+    flat = rng.uniform(0.6, 1., nb_rows)
+
+    forces = aero_force_fleet(*states, mainsail_ids, mainsail_areas, mainsail_coes,
+                              frontsail_ids, 0.2, (0.8, 0., 0.45), rig_z_max, flat=flat)
+    for i in range(0, nb_rows, 25):
+        expected = aero_force_array(*(state[i] for state in states),
+                                    sail_types[mainsail_ids[i]], mainsail_areas[i], tuple(mainsail_coes[i]),
+                                    sail_types[frontsail_ids[i]], 0.2, (0.8, 0., 0.45), rig_z_max[i], flat=flat[i])
+        assert [field[i] for field in forces] == [float(field) for field in expected]
+
+
+def test_aero_force_fleet_with_registry():
+    r"""Sail ids refer to the stacked tables of a custom registry"""
+    registry = SailCoefficientRegistry(builtin=False)
+    main = ImsAeroModelCoefficients.coefficient_interp("main_low")
+    jib = ImsAeroModelCoefficients.coefficient_interp("jib_high")
+    registry.register("my_jib", jib[0]._x, jib[0]._y, jib[1]._x, jib[1]._y)
+    registry.register("my_main", main[0]._x, main[0]._y, main[1]._x, main[1]._y)
+    tables = StackedCoefficientTables.from_registry(registry)
+
+    forces = aero_force_fleet([8., 10.], [45., -60.], 2., 10., 0., 1, 0.3, (0.4, 0., 0.68),
+                              0, 0.2, (0.8, 0., 0.45), 1.7, tables=tables)
+    expected = aero_force_array([8., 10.], [45., -60.], 2., 10., 0., "main_low", 0.3, (0.4, 0., 0.68),
+                                "jib_high", 0.2, (0.8, 0., 0.45), 1.7)
+    for field, expected_field in zip(forces, expected):
+        np.testing.assert_array_equal(field, expected_field)
+
+
+def test_aero_force_fleet_errors():
+    r"""Invalid per-row parameters raise a ValueError"""
+    with pytest.raises(ValueError):
+        aero_force_fleet(10., 45., 2., 0., 0., 0, [0.3, -0.3], (0.4, 0., 0.68), 5, 0.2, (0.8, 0., 0.45), 1.7)
+    with pytest.raises(ValueError):
+        aero_force_fleet(10., 45., 2., 0., 0., 0, 0.3, (0.4, 0., 0.68), 5, 0.2, (0.8, 0., 0.45), 1.7,
+                         fractionality=[0.8, 1.2])
@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+r"""Tests for the force.py module"""
+
+import numpy as np
+import pytest
+
+from ydeos_aerodynamics.force import Force, ForceBatch, resultant_force
+from ydeos_aerodynamics.model import aero_force_array
+
+
+def test_force_batch_wrong_shape():
+    r"""The data must be a (N, 6) array"""
+    with pytest.raises(ValueError):
+        ForceBatch(np.zeros((3, 5)))
+
+
+def test_force_batch_conversions():
+    r"""Round trip between lists of Force and ForceBatch"""
+    forces = [Force(1., 2., 3., 4., 5., 6.), Force(-1., 0., 1., 0.5, 0., 2.)]
+    batch = ForceBatch.from_forces(forces)
+    assert len(batch) == 2
+    assert batch.data.flags['C_CONTIGUOUS']
+    assert batch.to_forces() == forces
+    assert batch[1] == forces[1]
+    assert list(batch.fy) == [2., 0.]
+
+
+def test_force_batch_field_views():
+    r"""Fields are views on the underlying array"""
+    batch = ForceBatch.zeros(4)
+    batch.fx[:] = 2.
+    assert np.all(batch.data[:, 0] == 2.)
+    assert np.shares_memory(batch.to_force().pz, batch.data)
+
+
+def test_force_batch_from_struct_of_arrays():
+    r"""Batch from a Force whose fields are arrays"""
+    force = aero_force_array(tws=np.array([5., 10.])[:, None], twa=np.array([45., 90., 135.]),
+                             boatspeed=2., heel_angle=10., trim_angle=0., mainsail_type='main',
+                             mainsail_area=0.3, mainsail_coe=(0.4, 0., 0.68), frontsail_type='jib',
+                             frontsail_area=0.2, frontsail_coe=(0.8, 0., 0.45), rig_z_max=1.7)
+    batch = ForceBatch.from_force(force)
+    assert len(batch) == 6
+    assert np.array_equal(batch.fx, force.fx.ravel())
+    assert np.array_equal(batch.pz, force.pz.ravel())
+
+
+def test_force_batch_addition():
+    r"""Sum of forces, the point of application is exact for parallel forces"""
+    first = ForceBatch.from_forces([Force(0., 1., 0., 0., 0., 1.), Force(0., 0., 0., 1., 1., 1.)])
+    second = ForceBatch.from_forces([Force(0., 3., 0., 0., 0., 3.), Force(0., 0., 0., 3., 3., 3.)])
+    total = first + second
+    assert total[0] == Force(0., 4., 0., 0., 0., 2.5)
+    assert np.allclose(total.moment()[0], first.moment()[0] + second.moment()[0])
+    # null forces: mean of the points of application
+    assert total[1] == Force(0., 0., 0., 2., 2., 2.)
+
+
+def test_force_batch_addition_opposing_forces():
+    r"""The point of application of the sum of opposing or skewed forces gives their exact moment"""
+    first = ForceBatch.from_forces([Force(10., 0., 0., 0., 0., 10.), Force(10., 0., 2., 0.5, 0., 10.)])
+    second = ForceBatch.from_forces([Force(-4., 0., 0., 0., 0., 1.), Force(-4., 0., 1., 0., 0., 1.)])
+    total = first + second
+    assert total[0] == Force(6., 0., 0., 0., 0., 16.)
+    assert np.allclose(np.cross(total.points, total.forces), first.moment() + second.moment(),
+                       rtol=0., atol=1e-12)
+    point = (1., -2., 3.)
+    assert np.allclose(total.moment(point), first.moment(point) + second.moment(point), rtol=0., atol=1e-12)
+
+
+def test_force_batch_resultant():
+    r"""Non coplanar forces: the exact moment less its component along the summed force"""
+    batches = [ForceBatch(np.random.default_rng(seed).normal(size=(50, 6))) for seed in range(3)]
+    total = ForceBatch.resultant(batches)
+    assert np.allclose(total.forces, sum(batch.forces for batch in batches), rtol=0., atol=1e-12)
+    moment = sum(batch.moment() for batch in batches)
+    direction = total.forces / np.linalg.norm(total.forces, axis=1, keepdims=True)
+    expected = moment - np.sum(moment * direction, axis=1, keepdims=True) * direction
+    assert np.allclose(total.moment(), expected, rtol=0., atol=1e-10)
+    assert ForceBatch.resultant(batches[:2]) == batches[0] + batches[1]
+    for i in range(len(total)):
+        assert resultant_force([batch[i] for batch in batches]) == pytest.approx(total[i], rel=1e-12, abs=1e-12)
+    assert resultant_force([Force(0., 0., 0., 1., 1., 1.), Force(0., 0., 0., 3., 3., 3.)]) == \
+        Force(0., 0., 0., 2., 2., 2.)
+
+
+def test_force_batch_moment():
+    r"""Moment about a point"""
+    batch = ForceBatch.from_forces([Force(1., 0., 0., 0., 0., 2.)])
+    assert np.array_equal(batch.moment(), [[0., 2., 0.]])
+    assert np.array_equal(batch.moment((0., 0., 2.)), [[0., 0., 0.]])
@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+r"""Tests for the logs.py module"""
+
+import io
+import math
+import warnings
+
+import numpy as np
+import pytest
+
+from ydeos_aerodynamics.logs import read_log_chunks, true_wind_from_log, OUTPUT_COLUMNS
+from ydeos_aerodynamics.true import true_wind
+
+LOG = """time,aws,awa,bsp,heel
+0,10.0,45.0,2.0,10.0
+1,12.5,-60.0,2.5,-15.0
+
+2,8.0,170.0,3.0,5.0
+3,8.0,not a number,3.0,5.0
+4,9.0,30.0
+5,9.0,30.0,1.0,95.0
+6,0.0,0.0,0.0,0.0
+"""
+
+
+def test_read_log_chunks():
+    r"""Fixed size chunks, blank lines skipped, malformed rows flagged"""
+    chunks = list(read_log_chunks(io.StringIO(LOG), chunk_size=3, columns=('aws', 'awa', 'bsp', 'heel')))
+    assert [len(chunk) for chunk in chunks] == [2, 3, 2]
+    malformed = np.concatenate([chunk.malformed for chunk in chunks])
+    assert malformed.tolist() == [False, False, False, True, True, False, False]
+    assert np.isnan(chunks[1].apparent_wind_angle[1])
+    assert chunks[0].heel_angle.tolist() == [10., -15.]
+    # Row i is the i-th non-blank data line
+    non_blank = [line for line in LOG.splitlines()[1:] if line.strip()]
+    aws = np.concatenate([chunk.apparent_wind_speed for chunk in chunks])
+    assert len(aws) == len(non_blank)
+    for line, value, is_malformed in zip(non_blank, aws, malformed):
+        assert is_malformed or value == float(line.split(',')[1])
+
+
+def test_read_log_chunks_blank_chunk():
+    r"""A chunk of blank lines only is empty, without warning"""
+    log = "aws,awa,bsp,heel\n10.0,45.0,2.0,10.0\n\n\n\n8.0,170.0,3.0,5.0\n"
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        chunks = list(read_log_chunks(io.StringIO(log), chunk_size=2))
+    assert [len(chunk) for chunk in chunks] == [1, 0, 1]
+    assert chunks[1].apparent_wind_speed.shape == (0,) and chunks[1].malformed.dtype == bool
+
+
+def test_read_log_chunks_bisection():
+    r"""A malformed row in a large chunk"""
+    lines = [f"{i % 20}.0,{i % 180}.0,2.0,5.0\n" for i in range(1000)]
+    lines[537] = "1.0,2.0,x,4.0\n"
+    chunk, = read_log_chunks(io.StringIO("".join(lines)), header=False)
+    assert np.flatnonzero(chunk.malformed).tolist() == [537]
+    assert chunk.apparent_wind_speed[538] == 18. and chunk.apparent_wind_angle[999] == 99.
+
+
+def test_read_log_chunks_column_indices():
+    r"""Columns given by index, no header"""
+    chunks = list(read_log_chunks(io.StringIO(LOG.split("\n", 1)[1]), columns=(1, 2, 3, 4), header=False))
+    assert len(chunks) == 1 and len(chunks[0]) == 7
+
+
+def test_true_wind_from_log(tmp_path):
+    r"""Same values as true_wind() row by row, invalid and malformed rows are NaN"""
+    report = true_wind_from_log(io.StringIO(LOG), tmp_path / "out", chunk_size=2,
+                                columns=('aws', 'awa', 'bsp', 'heel'))
+    assert (report["rows"], report["malformed_rows"], report["invalid_rows"]) == (7, 2, 1)
+    assert report["rows_per_second"] > 0.
+    columns = {name: np.load(tmp_path / "out" / f"{name}.npy", mmap_mode='r') for name in OUTPUT_COLUMNS}
+    assert all(len(values) == 7 for values in columns.values())
+    for i in (0, 1, 2, 6):
+        expected = true_wind(*(float(columns[name][i]) for name in OUTPUT_COLUMNS[:4]))
+        assert columns['true_wind_speed'][i] == expected["speed"]
+        assert columns['true_wind_angle'][i] == expected["angle"]
+    for i in (3, 4, 5):
+        assert math.isnan(columns['true_wind_speed'][i])
+        assert math.isnan(columns['true_wind_angle'][i])
+
+
+def test_true_wind_from_log_file(tmp_path):
+    r"""Log read from a path, empty log"""
+    path = tmp_path / "log.csv"
+    path.write_text("aws,awa,bsp,heel\n")
+    report = true_wind_from_log(path, tmp_path / "out")
+    assert report["rows"] == 0
+    assert np.load(tmp_path / "out" / "true_wind_speed.npy").shape == (0,)
+
+
+def test_read_log_chunks_exceptions():
+    r"""Unknown column name, names without header, wrong chunk size"""
+    with pytest.raises(ValueError):
+        list(read_log_chunks(io.StringIO(LOG), columns=('aws', 'awa', 'boatspeed', 'heel')))
+    with pytest.raises(ValueError):
+        list(read_log_chunks(io.StringIO(LOG), columns=('aws', 'awa', 'bsp', 'heel'), header=False))
+    with pytest.raises(ValueError):
+        list(read_log_chunks(io.StringIO(LOG), chunk_size=0))
@@ -3,9 +3,13 @@
 
 r"""Tests for the aero_model_orc2013_like.py module"""
 
+import itertools
+
+import numpy as np
 import pytest
 
-from ydeos_aerodynamics.model import aero_force
+from ydeos_aerodynamics.model import aero_force, aero_force_array, aero_force_jacobian, \
+    JACOBIAN_VARIABLES
 
 
 def test_aero_model_exceptions():
@@ -141,3 +145,75 @@ def test_twa_symmetry():
     assert force_stb.fx == force_port.fx
     assert force_stb.fy == -force_port.fy
     assert force_stb.py == -force_port.py
+
+
+RIG = dict(mainsail_type='main',
+           mainsail_area=0.3,
+           mainsail_coe=(0.4, 0., 0.68),
+           frontsail_type='jib',
+           frontsail_area=0.2,
+           frontsail_coe=(0.8, 0., 0.45),
+           rig_z_max=1.7)
+
+
+def test_aero_force_array_matches_scalar():
+    r"""The vectorized aero force has the same values as the scalar one"""
+    states = np.array(list(itertools.product([0., 3., 10.],
+                                             [-180., -120., -45., 0., 30., 90., 150., 180.],
+                                             [-2., 0., 2.],
+                                             [-20., 0., 10., 30.],
+                                             [-5., 0., 5.],
+                                             [0.6, 0.8, 1.])))
+    force_array = aero_force_array(*states[:, :5].T, flat=states[:, 5], **RIG)
+    for i, state in enumerate(states):
+        force = aero_force(*state[:5], flat=state[5], **RIG)
+        for field in force._fields:
+            assert np.isclose(getattr(force_array, field)[i], getattr(force, field),
+                              rtol=1e-12, atol=1e-12)
+
+
+def test_aero_force_array_broadcasting():
+    r"""Inputs broadcast together"""
+    force = aero_force_array(tws=np.array([5., 10.])[:, None],
+                             twa=np.array([45., 90., 135.])[None, :],
+                             boatspeed=2.,
+                             heel_angle=10.,
+                             trim_angle=0.,
+                             **RIG)
+    assert force.fx.shape == (2, 3)
+    assert force.pz.shape == (2, 3)
+
+
+def test_aero_force_array_exceptions():
+    r"""Wrong flat value somewhere in the array"""
+    with pytest.raises(ValueError):
+        aero_force_array(tws=10., twa=45., boatspeed=2., heel_angle=10., trim_angle=0.,
+                         flat=np.array([0.8, 1.2]), **RIG)
+    with pytest.raises(ValueError):
+        aero_force_array(tws=np.array([10., -1.]), twa=45., boatspeed=2., heel_angle=10.,
+                         trim_angle=0., **RIG)
+
+
+@pytest.mark.parametrize("mainsail_type, frontsail_type", [('main', 'jib'),
+                                                           ('main_high', 'code_zero'),
+                                                           ('main_low', 'A_spinnaker_on_pole')])
+def test_aero_force_jacobian_finite_differences(mainsail_type, frontsail_type):
+    r"""Same force as aero_force_array, derivatives match centred finite differences"""
+    rig = dict(RIG, mainsail_type=mainsail_type, frontsail_type=frontsail_type)
+    rng = np.random.default_rng(0)
+    states = {"tws": rng.uniform(2., 15., 500),
+              "twa": rng.uniform(-175., 175., 500),
+              "boatspeed": rng.uniform(0., 4., 500),
+              "heel_angle": rng.uniform(-30., 30., 500),
+              "trim_angle": rng.uniform(-5., 5., 500),
+              "flat": rng.uniform(0.65, 0.95, 500)}
+    force, derivatives = aero_force_jacobian(**states, **rig)
+    assert all(np.array_equal(field, field_array)
+               for field, field_array in zip(force, aero_force_array(**states, **rig)))
+    assert tuple(derivatives) == JACOBIAN_VARIABLES
+    step = 1e-6
+    for name in JACOBIAN_VARIABLES:
+        upper = aero_force_array(**dict(states, **{name: states[name] + step}), **rig)
+        lower = aero_force_array(**dict(states, **{name: states[name] - step}), **rig)
+        for derivative, field_upper, field_lower in zip(derivatives[name], upper, lower):
+            assert np.allclose(derivative, (field_upper - field_lower) / (2. * step), rtol=1e-5, atol=1e-6)
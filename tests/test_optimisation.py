@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+r"""Tests for the optimisation.py module"""
+
+import numpy as np
+import pytest
+
+from ydeos_aerodynamics.model import Rig, aero_force
+from ydeos_aerodynamics.optimisation import maximise_driving_force, heeling_moment
+
+RIG = Rig(mainsail_type='main',
+          mainsail_area=0.3,
+          mainsail_coe=(0.4, 0., 0.68),
+          frontsail_type='jib',
+          frontsail_area=0.2,
+          frontsail_coe=(0.8, 0., 0.45),
+          rig_z_max=1.7)
+
+TWS = np.array([[4.], [10.], [14.]])
+TWA = np.array([[40., 60., 90., 150., 180.]])
+
+
+def _brute_force_flat(tws, twa, heel_angle, max_heeling_moment):
+    r"""Best flat on a fine grid of flat values, with scalar calls (largest flat first for ties)"""
+    flats = np.linspace(1., 0.6, 2001)
+    values = []
+    for flat in flats:
+        force = aero_force(tws, twa, 2., heel_angle, 0., flat=flat, **RIG._asdict())
+        feasible = max_heeling_moment is None or heeling_moment(force) <= max_heeling_moment
+        values.append(force.fx if feasible else -np.inf)
+    return flats[int(np.argmax(values))], max(values)
+
+
+@pytest.mark.parametrize("max_heeling_moment", [None, 15.])
+def test_maximise_driving_force_brute_force(max_heeling_moment):
+    r"""Same optimum as a brute force search with scalar calls"""
+    trim = maximise_driving_force(RIG, TWS, TWA, boatspeed=2., heel_angle=10.,
+                                  max_heeling_moment=max_heeling_moment)
+    assert trim.flat.shape == (3, 5)
+    for i, tws in enumerate(TWS[:, 0]):
+        for j, twa in enumerate(TWA[0]):
+            flat, driving_force = _brute_force_flat(tws, twa, 10., max_heeling_moment)
+            if np.isfinite(driving_force):
+                assert trim.feasible[i, j]
+                assert trim.flat[i, j] == pytest.approx(flat, abs=1e-3)
+                assert trim.driving_force[i, j] >= driving_force - 1e-9
+            else:
+                assert not trim.feasible[i, j]
+
+
+def test_maximise_driving_force_heeling_moment_limit():
+    r"""The heeling moment limit is satisfied where feasible"""
+    trim = maximise_driving_force(RIG, TWS, TWA, boatspeed=2., heel_bounds=(0., 30.), max_heeling_moment=15.)
+    assert np.all(trim.heeling_moment[trim.feasible] <= 15.)
+    assert np.all((trim.heel_angle >= 0.) & (trim.heel_angle <= 30.))
+    assert np.all((trim.flat >= 0.6) & (trim.flat <= 1.))
+
+
+def test_maximise_driving_force_ties():
+    r"""The largest flat wins when the driving force does not depend on flat (dead downwind)"""
+    trim = maximise_driving_force(RIG, 10., 180., boatspeed=2.)
+    assert trim.flat == 1.
+
+
+def test_maximise_driving_force_exceptions():
+    r"""Wrong bounds and parameters"""
+    with pytest.raises(ValueError):
+        maximise_driving_force(RIG, 10., 45., 2., flat_bounds=(0.8, 0.6))
+    with pytest.raises(ValueError):
+        maximise_driving_force(RIG, 10., 45., 2., heel_bounds=(0., 90.))
+    with pytest.raises(ValueError):
+        maximise_driving_force(RIG, 10., 45., 2., nb_candidates=1)
+    with pytest.raises(ValueError):
+        maximise_driving_force(RIG, 10., 45., 2., max_heeling_moment=-1.)
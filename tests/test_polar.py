@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+r"""Tests for the polar.py module"""
+
+import numpy as np
+import pytest
+
+from ydeos_aerodynamics.model import Rig
+from ydeos_aerodynamics.polar import PolarGrid
+from ydeos_aerodynamics.windage import HullWindageModel, MastWindageModel
+
+RIG = Rig(mainsail_type='main',
+          mainsail_area=0.3,
+          mainsail_coe=(0.4, 0., 0.68),
+          frontsail_type='jib',
+          frontsail_area=0.2,
+          frontsail_coe=(0.8, 0., 0.45),
+          rig_z_max=1.7)
+
+
+@pytest.fixture(scope="module")
+def grid():
+    r"""Small polar grid with hull and mast windage"""
+    return PolarGrid(RIG,
+                     tws=np.linspace(2., 14., 7),
+                     twa=np.linspace(30., 180., 16),
+                     boatspeed=np.linspace(0., 4., 5),
+                     heel_angle=np.linspace(0., 30., 4),
+                     flat=(0.8, 1.),
+                     hull_windage=HullWindageModel(freeboard_average=0.07, loa=1., beam_max=0.2),
+                     mast_windage=MastWindageModel(mast_x=0.5, mast_z_bottom=0.07, mast_z_top=1.7,
+                                                   mast_front_area=0.017, mast_side_area=0.017))
+
+
+def test_polar_grid_shape(grid):
+    r"""Shape and memory footprint of the precomputed values"""
+    assert grid.shape == (7, 16, 5, 4, 2)
+    assert grid.values.shape == (7, 16, 5, 4, 2, 6)
+    assert grid.nbytes == 7 * 16 * 5 * 4 * 2 * (6 + 10) * 8
+    assert grid.build_time > 0.
+
+
+def test_polar_grid_exact_at_nodes(grid):
+    r"""The interpolation is exact on the grid nodes"""
+    states = np.meshgrid(*grid.axes, indexing='ij')
+    interpolated = grid(*states)
+    direct = grid.evaluate(*states)
+    for field in interpolated._fields:
+        assert np.allclose(getattr(interpolated, field), getattr(direct, field), rtol=1e-12, atol=1e-12)
+
+
+def test_polar_grid_linear_between_nodes(grid):
+    r"""Halfway between 2 nodes along a single axis: mean of the forces, of the moments for the points"""
+    interpolated = grid(5., 50., 2., 10., 1.)
+    lower = grid(4., 50., 2., 10., 1.)
+    upper = grid(6., 50., 2., 10., 1.)
+    for field in ('fx', 'fy', 'fz'):
+        assert getattr(interpolated, field) == pytest.approx((getattr(lower, field) + getattr(upper, field)) / 2.)
+    lower_magnitude = np.sqrt(lower.fx ** 2 + lower.fy ** 2 + lower.fz ** 2)
+    upper_magnitude = np.sqrt(upper.fx ** 2 + upper.fy ** 2 + upper.fz ** 2)
+    for field in ('px', 'py', 'pz'):
+        moment = (lower_magnitude * getattr(lower, field) + upper_magnitude * getattr(upper, field)) / 2.
+        assert getattr(interpolated, field) == pytest.approx(moment / ((lower_magnitude + upper_magnitude) / 2.))
+
+
+def test_polar_grid_blocks(grid, monkeypatch):
+    r"""The result does not depend on the size of the blocks of queries"""
+    rng = np.random.default_rng(3)
+    states = [rng.uniform(axis[0], axis[-1], 1000) for axis in grid.axes]
+    reference = grid(*states)
+    monkeypatch.setattr(grid, "block_size", 7)
+    for field, field_reference in zip(grid(*states), reference):
+        assert np.allclose(field, field_reference, rtol=1e-14, atol=1e-14)
+
+
+def test_polar_grid_broadcasting(grid):
+    r"""The queries are broadcast together"""
+    force = grid(np.array([[4.], [8.]]), np.array([45., 90., 135.]), 2., 10., 0.9)
+    assert force.fx.shape == (2, 3)
+
+
+def test_polar_grid_outside():
+    r"""Queries outside of the grid are rejected"""
+    grid = PolarGrid(RIG, tws=(5., 10.), twa=(40., 90.), boatspeed=(1., 2.), heel_angle=(0.,))
+    with pytest.raises(ValueError):
+        grid(12., 50., 1.5, 0., 1.)
+    with pytest.raises(ValueError):
+        grid(6., 50., 1.5, 5., 1.)
+
+
+def test_polar_grid_not_increasing():
+    r"""Axes must be strictly increasing"""
+    with pytest.raises(ValueError):
+        PolarGrid(RIG, tws=(10., 5.), twa=(40., 90.), boatspeed=(1., 2.), heel_angle=(0.,))
+
+
+def test_polar_grid_error_report(grid):
+    r"""The error report is consistent with the grid"""
+    report = grid.error_report(nb_samples=1000)
+    assert report["nbytes"] == grid.nbytes
+    assert report["interpolation_time"] > 0.
+    assert report["fy_max_error"] >= report["fy_rms_error"] >= 0.
+    assert report["fy_max_error"] < 1.
@@ -3,9 +3,11 @@
 
 r"""Tests for the profile.py module"""
 
+import numpy as np
 import pytest
 
-from ydeos_aerodynamics.profiles import power_law, logarithmic
+from ydeos_aerodynamics.profiles import power_law, logarithmic, power_law_array, \
+    logarithmic_array, HeightFactorTable
 
 
 def test_power_law():
@@ -71,3 +73,63 @@ def test_logarithmic_wrong_input():
                     height_reference=10.,
                     height=1.,
                     roughness_length=0.)
+
+
+def test_power_law_array():
+    r"""The vectorized power law matches the scalar version."""
+    wind_speeds = np.array([0., 5., 12.])
+    heights = np.array([0., 1., 10., 20.])
+    result = power_law_array(wind_speeds[:, None], 10., heights[None, :], alpha=0.14)
+    assert result.shape == (3, 4)
+    for i, wind_speed in enumerate(wind_speeds):
+        for j, height in enumerate(heights):
+            assert result[i, j] == pytest.approx(power_law(wind_speed, 10., height, alpha=0.14), rel=1e-14)
+
+
+def test_logarithmic_array():
+    r"""The vectorized logarithmic profile matches the scalar version."""
+    wind_speeds = np.array([0., 5., 12.])
+    heights = np.array([0.5, 1., 10., 20.])
+    result = logarithmic_array(wind_speeds[:, None], 10., heights[None, :])
+    for i, wind_speed in enumerate(wind_speeds):
+        for j, height in enumerate(heights):
+            assert result[i, j] == pytest.approx(logarithmic(wind_speed, 10., height), rel=1e-14)
+
+
+def test_profile_arrays_wrong_input():
+    r"""Any invalid value in the arrays raises a ValueError."""
+    with pytest.raises(ValueError):
+        power_law_array([1., -1.], 10., 5.)
+    with pytest.raises(ValueError):
+        power_law_array(1., 10., [5., -1.])
+    with pytest.raises(ValueError):
+        power_law_array(1., 10., 5., alpha=[0.1, 0.])
+    with pytest.raises(ValueError):
+        logarithmic_array(1., [10., 0.], 5.)
+    with pytest.raises(ValueError):
+        logarithmic_array(1., 10., [5., 0.])
+    with pytest.raises(ValueError):
+        logarithmic_array(1., 10., 5., roughness_length=-1.)
+
+
+def test_height_factor_table():
+    r"""The table corrects wind speeds from the reference height in one multiply."""
+    table = HeightFactorTable(height_reference=1.7, heights=(10., 0.5), parameters=(0.11, 0.16))
+    assert table.factors.shape == (2, 2)
+    assert table.factor(10., 0.16) == pytest.approx(power_law(1., 1.7, 10., alpha=0.16))
+    tws = np.array([[3., 6.], [9., 12.]])
+    corrected = table(tws, parameter=0.11)
+    assert corrected.shape == (2, 2, 2)
+    np.testing.assert_allclose(corrected[..., 0], power_law_array(tws, 1.7, 10.), rtol=1e-14)
+
+    logarithmic_table = HeightFactorTable(1.7, 10., parameters=0.0002, profile='logarithmic')
+    np.testing.assert_allclose(logarithmic_table(tws)[..., 0], logarithmic_array(tws, 1.7, 10.), rtol=1e-14)
+
+    with pytest.raises(ValueError):
+        table(tws)
+    with pytest.raises(ValueError):
+        table.factor(5., 0.11)
+    with pytest.raises(ValueError):
+        table(tws, parameter=0.2)
+    with pytest.raises(ValueError):
+        HeightFactorTable(1.7, 10., profile='unknown')
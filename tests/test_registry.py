@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+r"""Tests for the registry.py module"""
+
+import json
+
+import numpy as np
+import pytest
+
+from ydeos_aerodynamics.model import ImsAeroModelCoefficients, aero_force, aero_force_array
+from ydeos_aerodynamics.registry import SailCoefficientRegistry
+
+MAIN_HIGH = ImsAeroModelCoefficients.main_high_cl._x, ImsAeroModelCoefficients.main_high_cl._y, \
+    ImsAeroModelCoefficients.main_high_cd._x, ImsAeroModelCoefficients.main_high_cd._y
+
+AWA = np.linspace(0., 180., 181)
+
+
+def write_csv(path, awa_cl, cl, awa_cd, cd):
+    r"""CSV coefficients file, empty cells where a curve is not defined"""
+    rows = {}
+    for awa, value in zip(awa_cl, cl):
+        rows.setdefault(awa, ["", ""])[0] = repr(value)
+    for awa, value in zip(awa_cd, cd):
+        rows.setdefault(awa, ["", ""])[1] = repr(value)
+    path.write_text("awa,cl,cd\n" + "".join(f"{awa!r},{values[0]},{values[1]}\n"
+                                             for awa, values in sorted(rows.items())))
+
+
+def write_json(path, awa_cl, cl, awa_cd, cd):
+    r"""JSON coefficients file"""
+    path.write_text(json.dumps({"cl": {"awa": list(awa_cl), "value": list(cl)},
+                                "cd": {"awa": list(awa_cd), "value": list(cd)}}))
+
+
+def test_builtin_sail_types():
+    r"""The built-in sail types are registered with the ImsAeroModelCoefficients order"""
+    registry = SailCoefficientRegistry()
+    assert registry.sail_types() == ImsAeroModelCoefficients.sail_types()
+    for sail_id, sail_type in enumerate(ImsAeroModelCoefficients.sail_types()):
+        assert registry.sail_id(sail_type) == sail_id
+        assert registry.sail_name(sail_id) == sail_type
+        for value, expected in zip(registry.coefficient(sail_id, AWA),
+                                   ImsAeroModelCoefficients.coefficient(sail_type, AWA)):
+            np.testing.assert_array_equal(value, expected)
+    assert len(SailCoefficientRegistry(builtin=False)) == 0
+
+
+def test_files_are_loaded_lazily(tmp_path):
+    r"""Files are read on first use only, then the table is cached"""
+    write_csv(tmp_path / "csv_main.csv", *MAIN_HIGH)
+    write_json(tmp_path / "json_main.json", *MAIN_HIGH)
+    (tmp_path / "broken.json").write_text("{}")
+    (tmp_path / "notes.txt").write_text("not a coefficients file")
+
+    registry = SailCoefficientRegistry(builtin=False)
+    assert registry.register_directory(tmp_path) == [0, 1, 2]
+    assert registry.sail_types() == ["broken", "csv_main", "json_main"]
+    assert not any(registry.is_loaded(sail_id) for sail_id in range(3))
+
+    table = registry.coefficient_table("csv_main")
+    assert registry.is_loaded("csv_main") and not registry.is_loaded("json_main")
+    assert registry.coefficient_table(1) is table
+
+    for sail_type in ("csv_main", "json_main"):
+        for value, expected in zip(registry.coefficient(sail_type, AWA),
+                                   ImsAeroModelCoefficients.coefficient("main_high", AWA)):
+            np.testing.assert_allclose(value, expected, rtol=1e-14)
+
+    with pytest.raises(ValueError):
+        registry.coefficient_table("broken")
+
+
+def test_registry_errors(tmp_path):
+    r"""Unknown, duplicated and invalid sail types raise a ValueError"""
+    registry = SailCoefficientRegistry()
+    with pytest.raises(ValueError):
+        registry.sail_id("unknown")
+    with pytest.raises(ValueError):
+        registry.sail_id(len(registry))
+    with pytest.raises(ValueError):
+        registry.register("main", *MAIN_HIGH)
+    with pytest.raises(ValueError):
+        registry.register("decreasing", [10., 0.], [1., 0.], [0., 10.], [0., 1.])
+    with pytest.raises(ValueError):
+        registry.register_file(tmp_path / "coefficients.txt")
+    assert "main" in registry and 0 in registry and "unknown" not in registry
+
+
+def test_aero_force_with_registry():
+    r"""aero_force resolves the sail types (names or ids) with the registry"""
+    registry = SailCoefficientRegistry()
+    custom = registry.register("custom_main", *MAIN_HIGH)
+    rig = dict(mainsail_area=0.3, mainsail_coe=(0.4, 0., 0.68),
+               frontsail_type="jib", frontsail_area=0.2, frontsail_coe=(0.8, 0., 0.45), rig_z_max=1.7)
+    expected = aero_force(10., 45., 2., 10., 0., mainsail_type="main_high", **rig)
+    assert aero_force(10., 45., 2., 10., 0., mainsail_type=custom, registry=registry, **rig) == expected
+    result = aero_force_array([10., 12.], 45., 2., 10., 0., mainsail_type="custom_main", registry=registry, **rig)
+    assert [field[0] for field in result] == pytest.approx(expected, rel=1e-14)
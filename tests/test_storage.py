@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+r"""Tests for the storage.py module"""
+
+import numpy as np
+import pytest
+
+from ydeos_aerodynamics.model import ImsAeroModelCoefficients, Rig, _COEFFICIENT_TABLES
+from ydeos_aerodynamics.polar import PolarGrid
+from ydeos_aerodynamics.storage import read_arrays, write_arrays, save_coefficient_tables, \
+    load_coefficient_tables, save_polar_grid, load_polar_grid, ALIGNMENT
+from ydeos_aerodynamics.windage import HullWindageModel, MastWindageModel
+
+RIG = Rig(mainsail_type='main',
+          mainsail_area=0.3,
+          mainsail_coe=(0.4, 0., 0.68),
+          frontsail_type='jib',
+          frontsail_area=0.2,
+          frontsail_coe=(0.8, 0., 0.45),
+          rig_z_max=1.7)
+
+
+@pytest.fixture(scope="module")
+def grid():
+    r"""Small polar grid with hull and mast windage"""
+    return PolarGrid(RIG,
+                     tws=np.linspace(2., 14., 7),
+                     twa=np.linspace(30., 180., 16),
+                     boatspeed=np.linspace(0., 4., 5),
+                     heel_angle=(0., 15.),
+                     trim_angle=1.,
+                     hull_windage=HullWindageModel(0.07, 1., 0.2),
+                     mast_windage=MastWindageModel(0.5, 0.07, 1.7, 0.017, 0.017))
+
+
+def test_arrays_round_trip(tmp_path):
+    r"""The arrays are memory mapped at aligned offsets, read-only and unchanged"""
+    path = tmp_path / "arrays.bin"
+    arrays = {"a": np.arange(5.), "b": np.arange(12, dtype=np.int32).reshape(3, 4)}
+    write_arrays(path, "test", arrays, "checksum", {"answer": 42})
+    loaded, metadata = read_arrays(path, "test", "checksum")
+    assert metadata == {"answer": 42}
+    for name, array in arrays.items():
+        assert loaded[name].dtype == array.dtype
+        np.testing.assert_array_equal(loaded[name], array)
+        assert isinstance(loaded[name].base, np.memmap)
+        assert not loaded[name].flags.writeable
+        assert loaded[name].ctypes.data % ALIGNMENT == 0
+
+
+def test_read_arrays_errors(tmp_path):
+    r"""Bad magic, version, kind and checksum raise ValueError"""
+    path = tmp_path / "arrays.bin"
+    write_arrays(path, "test", {"a": np.arange(5.)}, "checksum")
+    with pytest.raises(ValueError):
+        read_arrays(path, "other")
+    with pytest.raises(ValueError):
+        read_arrays(path, "test", "other checksum")
+
+    content = bytearray(path.read_bytes())
+    content[8] = 99
+    path.write_bytes(bytes(content))
+    with pytest.raises(ValueError):
+        read_arrays(path, "test")
+
+    path.write_bytes(b"not a ydeos file")
+    with pytest.raises(ValueError):
+        read_arrays(path, "test")
+
+
+def test_coefficient_tables_round_trip(tmp_path):
+    r"""The loaded tables evaluate as the built tables"""
+    path = tmp_path / "tables.bin"
+    save_coefficient_tables(path)
+    tables = load_coefficient_tables(path, install=False)
+    awa = np.linspace(0., 180., 1001)
+    assert set(tables) == set(ImsAeroModelCoefficients.sail_types())
+    for sail_type, table in tables.items():
+        assert isinstance(table.coefficients.base, np.memmap)
+        for loaded, built in zip(table(awa), ImsAeroModelCoefficients.coefficient_table(sail_type)(awa)):
+            np.testing.assert_array_equal(loaded, built)
+
+
+def test_coefficient_tables_install(tmp_path):
+    r"""Installed tables are used by coefficient_table()"""
+    path = tmp_path / "tables.bin"
+    save_coefficient_tables(path)
+    previous = dict(_COEFFICIENT_TABLES)
+    try:
+        tables = load_coefficient_tables(path)
+        assert ImsAeroModelCoefficients.coefficient_table("main") is tables["main"]
+    finally:
+        _COEFFICIENT_TABLES.clear()
+        _COEFFICIENT_TABLES.update(previous)
+
+
+def test_polar_grid_round_trip(tmp_path, grid):
+    r"""The loaded grid interpolates as the saved grid, without copying the values"""
+    path = tmp_path / "grid.bin"
+    save_polar_grid(path, grid)
+    loaded = load_polar_grid(path, rig=RIG)
+    assert isinstance(loaded.values.base, np.memmap)
+    assert loaded.rig == RIG
+    assert loaded.trim_angle == grid.trim_angle
+    assert loaded.hull_windage.loa == grid.hull_windage.loa
+    assert loaded.mast_windage.mast_z_top == grid.mast_windage.mast_z_top
+    np.testing.assert_array_equal(loaded.values, grid.values)
+    for loaded_field, field in zip(loaded([5., 9.], [45., 120.], 2., 10.), grid([5., 9.], [45., 120.], 2., 10.)):
+        np.testing.assert_array_equal(loaded_field, field)
+
+
+def test_polar_grid_stale(tmp_path, grid, monkeypatch):
+    r"""A grid computed for another rig or from other inputs is rejected"""
+    path = tmp_path / "grid.bin"
+    save_polar_grid(path, grid)
+    with pytest.raises(ValueError):
+        load_polar_grid(path, rig=RIG._replace(mainsail_area=0.31))
+
+    monkeypatch.setattr("ydeos_aerodynamics.storage.__version__", "0.0.0")
+    with pytest.raises(ValueError):
+        load_polar_grid(path)
+
+
+def test_polar_grid_stale_model(tmp_path, grid, monkeypatch):
+    r"""A grid computed with another force model is rejected, the version being the same"""
+    path = tmp_path / "grid.bin"
+    save_polar_grid(path, grid)
+    load_polar_grid(path, rig=RIG)
+    monkeypatch.setattr("ydeos_aerodynamics.model.effective_span_correction",
+                        lambda roach, fractionality, overlap: 1.2)
+    with pytest.raises(ValueError):
+        load_polar_grid(path, rig=RIG)
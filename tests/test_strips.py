@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+r"""Tests for the strips.py module"""
+
+import numpy as np
+import pytest
+
+from ydeos_aerodynamics.model import Rig, aero_force_array
+from ydeos_aerodynamics.strips import aero_force_strips, strip_heights
+
+RIG = Rig(mainsail_type='main',
+          mainsail_area=0.3,
+          mainsail_coe=(0.4, 0., 0.68),
+          frontsail_type='jib',
+          frontsail_area=0.2,
+          frontsail_coe=(0.8, 0., 0.45),
+          rig_z_max=1.7)
+
+TWS = np.linspace(2., 15., 5)[:, None]
+TWA = np.linspace(-170., 170., 8)[None, :]
+
+
+def test_strip_heights():
+    r"""The strips cover the rig and their area fractions sum to 1"""
+    z, area_fractions = strip_heights(1.7, 10)
+    assert len(z) == len(area_fractions) == 10
+    assert 0. < z[0] < z[-1] < 1.7
+    assert np.sum(area_fractions) == pytest.approx(1.)
+    assert np.all(np.diff(area_fractions) < 0.)
+    with pytest.raises(ValueError):
+        strip_heights(1.7, 0)
+
+
+@pytest.mark.parametrize("nb_strips", [1, 20])
+def test_uniform_wind_is_aero_force(nb_strips):
+    r"""Without wind gradient, the strip model is the single point model"""
+    expected = aero_force_array(TWS, TWA, 2., 10., 1., flat=0.9, **RIG._asdict())
+    result = aero_force_strips(TWS, TWA, 2., 10., 1., flat=0.9, **RIG._asdict(),
+                               nb_strips=nb_strips, profile=None)
+    for field, expected_field in zip(result, expected):
+        assert field.shape == (5, 8)
+        np.testing.assert_allclose(field, expected_field, rtol=1e-12, atol=1e-12)
+
+
+def test_wind_gradient():
+    r"""With tws known at the masthead, the lower strips see less wind:
+    smaller force and higher centre of effort than the single point model"""
+    uniform = aero_force_array(10., 45., 2., 0., 0., **RIG._asdict())
+    for profile, parameter in (('power_law', 0.11), ('logarithmic', 0.0002)):
+        gradient = aero_force_strips(10., 45., 2., 0., 0., **RIG._asdict(),
+                                     profile=profile, profile_parameter=parameter,
+                                     height_reference=RIG.rig_z_max)
+        assert abs(gradient.fx) < abs(uniform.fx)
+        assert abs(gradient.fy) < abs(uniform.fy)
+        assert gradient.pz > uniform.pz
+
+
+def test_converges_with_nb_strips():
+    r"""The integrated force converges as the number of strips increases"""
+    forces = [aero_force_strips(10., 60., 2., 10., 0., **RIG._asdict(), nb_strips=nb_strips).fx
+              for nb_strips in (10, 20, 2000)]
+    assert abs(forces[1] - forces[2]) < abs(forces[0] - forces[2])
+    assert forces[1] == pytest.approx(forces[2], rel=1e-2)
+
+
+def test_wrong_profile():
+    r"""An unknown profile raises a ValueError"""
+    with pytest.raises(ValueError):
+        aero_force_strips(10., 45., 2., 0., 0., **RIG._asdict(), profile='unknown')
@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+r"""Tests for the sweep.py module"""
+
+import numpy as np
+import pytest
+
+from ydeos_aerodynamics.model import ImsAeroModelCoefficients, Rig, aero_force_array
+from ydeos_aerodynamics import sweep as sweep_module
+from ydeos_aerodynamics.sweep import sail_combinations, sweep
+
+RIG = Rig(mainsail_type='main',
+          mainsail_area=0.3,
+          mainsail_coe=(0.4, 0., 0.68),
+          frontsail_type='jib',
+          frontsail_area=0.2,
+          frontsail_coe=(0.8, 0., 0.45),
+          rig_z_max=1.7)
+
+AXES = (np.linspace(2., 14., 5),
+        np.linspace(30., 180., 7),
+        (0., 2.),
+        (0., 20.),
+        (0.8, 1.))
+
+
+def test_sail_combinations():
+    r"""Every mainsail x frontsail pair, the rest of the rig unchanged"""
+    rigs = sail_combinations(RIG)
+    assert len(rigs) == len(ImsAeroModelCoefficients.mainsail_types()) * \
+        len(ImsAeroModelCoefficients.frontsail_types())
+    assert len(set(rigs)) == len(rigs)
+    assert all(rig.mainsail_type.startswith('main') for rig in rigs)
+    assert all(rig.rig_z_max == RIG.rig_z_max for rig in rigs)
+
+
+def test_sweep_matches_aero_force_array():
+    r"""The sweep values are those of aero_force_array"""
+    rigs = [RIG, RIG._replace(frontsail_type='spi')]
+    values = sweep(rigs, *AXES, nb_workers=1, chunk_size=17)
+    assert values.shape == (2, 5, 7, 2, 2, 2, 6)
+    states = np.meshgrid(*AXES, indexing='ij')
+    for rig_index, rig in enumerate(rigs):
+        force = aero_force_array(*states[:4], 0., flat=states[4], **rig._asdict())
+        for i, field in enumerate(force):
+            assert np.array_equal(values[rig_index, ..., i], field)
+
+
+def test_sweep_deterministic():
+    r"""The results do not depend on the number of workers"""
+    rigs = sail_combinations(RIG)[:4]
+    assert np.array_equal(sweep(rigs, *AXES, nb_workers=1, chunk_size=50),
+                          sweep(rigs, *AXES, nb_workers=2, chunk_size=50))
+
+
+def test_sweep_without_shared_memory(monkeypatch):
+    r"""Without multiprocessing.shared_memory (Python < 3.8), the results are returned by the workers"""
+    rigs = sail_combinations(RIG)[:3]
+    expected = sweep(rigs, *AXES, nb_workers=1, chunk_size=50)
+    monkeypatch.setattr(sweep_module, "shared_memory", None)
+    assert np.array_equal(sweep(rigs, *AXES, nb_workers=1, chunk_size=50), expected)
+    assert np.array_equal(sweep(rigs, *AXES, nb_workers=2, chunk_size=50), expected)
+
+
+def test_sweep_exceptions():
+    r"""Wrong parameters and errors raised in the workers"""
+    with pytest.raises(ValueError):
+        sweep([], *AXES)
+    with pytest.raises(ValueError):
+        sweep([RIG], *AXES, chunk_size=0)
+    with pytest.raises(ValueError):
+        sweep([RIG._replace(mainsail_area=-1.)], *AXES, nb_workers=2)
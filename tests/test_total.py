@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+r"""Tests for the total.py module"""
+
+import itertools
+
+import numpy as np
+import pytest
+
+from ydeos_aerodynamics.force import ForceBatch
+from ydeos_aerodynamics.model import Rig, aero_force
+from ydeos_aerodynamics.total import total_aero_force
+from ydeos_aerodynamics.windage import HullWindageModel, MastWindageModel
+
+RIG = Rig(mainsail_type='main',
+          mainsail_area=0.3,
+          mainsail_coe=(0.4, 0., 0.68),
+          frontsail_type='jib',
+          frontsail_area=0.2,
+          frontsail_coe=(0.8, 0., 0.45),
+          rig_z_max=1.7)
+HULL = HullWindageModel(0.07, 1., 0.2)
+MAST = MastWindageModel(0.5, 0.07, 1.7, 0.017, 0.017)
+POINT = (0.5, 0., -0.2)
+
+STATES = np.array(list(itertools.product([0., 3., 10.],
+                                         [-150., -45., 0., 30., 90., 180.],
+                                         [0., 2.],
+                                         [-10., 0., 20.])))
+
+
+def test_total_aero_force_is_the_sum_of_the_models():
+    r"""The total is the ForceBatch sum of the separately computed forces"""
+    for tws, twa, boatspeed, heel_angle in STATES:
+        forces = [aero_force(tws, twa, boatspeed, heel_angle, 1., flat=0.9, **RIG._asdict()),
+                  HULL(tws, twa, boatspeed, heel_angle),
+                  MAST(tws, twa, boatspeed, heel_angle, 1.)]
+        batches = [ForceBatch.from_forces([force]) for force in forces]
+        expected = ForceBatch.resultant(batches)
+        expected_moment = sum(batch.moment(POINT) for batch in batches)[0]
+
+        total, moment = total_aero_force(RIG, tws, twa, boatspeed, heel_angle, 1., 0.9, HULL, MAST, POINT)
+        assert total == pytest.approx(expected[0], rel=1e-12, abs=1e-12)
+        assert moment == pytest.approx(expected_moment, rel=1e-12, abs=1e-12)
+
+
+def test_total_aero_force_point_of_application():
+    r"""The moment of the summed force is the exact moment, less its component along the force"""
+    for states in (STATES.T, [10., 40., 9., 0.]):
+        total, moment = total_aero_force(RIG, *states, 1., 0.9, HULL, MAST, POINT)
+        force = np.stack(total[:3], axis=-1)
+        point = np.stack(total[3:], axis=-1)
+        norm_squared = np.sum(force ** 2, axis=-1, keepdims=True)
+        along = np.sum(moment * force, axis=-1, keepdims=True) / np.where(norm_squared > 0., norm_squared, 1.) * force
+        assert np.allclose(np.cross(point - POINT, force), moment - along, rtol=0., atol=1e-9)
+
+
+def test_total_aero_force_array():
+    r"""The vectorized total matches the scalar total"""
+    tws, twa, boatspeed, heel_angle = STATES.T
+    total, moment = total_aero_force(RIG, tws, twa, boatspeed, heel_angle, 1., 0.9, HULL, MAST, POINT)
+    assert moment.shape == (len(STATES), 3)
+    for i, state in enumerate(STATES):
+        expected, expected_moment = total_aero_force(RIG, *state, 1., 0.9, HULL, MAST, POINT)
+        assert [field[i] for field in total] == pytest.approx(expected, rel=1e-12, abs=1e-12)
+        assert moment[i] == pytest.approx(expected_moment, rel=1e-12, abs=1e-12)
+
+
+def test_total_aero_force_sails_only():
+    r"""Without windage models the total is the sails force"""
+    total, moment = total_aero_force(RIG, 10., 45., 2., 10.)
+    expected = aero_force(10., 45., 2., 10., 0., **RIG._asdict())
+    assert total == pytest.approx(expected)
+    assert moment == pytest.approx(ForceBatch.from_forces([expected]).moment()[0])
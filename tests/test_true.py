@@ -3,11 +3,15 @@
 
 r"""Tests for the true.py module"""
 
+import itertools
 import math
 
+import numpy as np
 import pytest
 
-from ydeos_aerodynamics.true import true_wind_angle, true_wind_speed, true_wind
+from ydeos_aerodynamics.true import true_wind_angle, true_wind_speed, true_wind, \
+    true_wind_angle_array, true_wind_speed_array, true_wind_validity, true_wind_array, \
+    true_wind_jacobian, true_wind_jacobian_array
 
 
 # true_wind_angle() tests
@@ -185,3 +189,127 @@ def test_symmetry():
                                boatspeed=3.)
     assert true_wind_port["speed"] == true_wind_starboard["speed"]
     assert true_wind_port["angle"] == -true_wind_starboard["angle"]
+
+
+# Vectorized versions
+
+
+def test_true_wind_arrays_match_scalar():
+    r"""Vectorized true wind has the same values as the scalar functions"""
+    states = np.array(list(itertools.product([0., 1., 10. * math.sqrt(2.)],
+                                             [-180., -135., -90., -45., 0., 45., 120., 180.],
+                                             [-10., 0., 3., 10.],
+                                             [-40., 0., 40., 89.])))
+    twas = true_wind_angle_array(*states.T)
+    twss = true_wind_speed_array(*states.T)
+    for state, twa, tws in zip(states, twas, twss):
+        assert np.isclose(twa, true_wind_angle(*state), rtol=1e-12, atol=1e-12)
+        assert np.isclose(tws, true_wind_speed(*state), rtol=1e-12, atol=1e-12)
+
+
+def test_true_wind_arrays_invalid_rows():
+    r"""A single ValueError with the indices, or NaN at the invalid rows"""
+    heel_angles = np.array([0., 10., 89.5, 20., -90.])
+    assert list(true_wind_validity(10., 45., heel_angles)) == [True, True, False, True, False]
+    with pytest.raises(ValueError, match=r"2 invalid rows at indices \[2, 4\]"):
+        true_wind_speed_array(10., 45., 3., heel_angles)
+    twas = true_wind_angle_array(10., 45., 3., heel_angles, errors='nan')
+    assert np.isnan(twas[2]) and np.isnan(twas[4])
+    assert twas[0] == true_wind_angle(10., 45., 3., 0.)
+    with pytest.raises(ValueError):
+        true_wind_angle_array(10., 45., 3., heel_angles, errors='ignore')
+
+
+def test_true_wind_array_floats():
+    r"""Float inputs (0-d arrays) give the values of the scalar functions, inputs are not modified"""
+    for state in ((10., 45., 2., 10.), (10., -135., 2., -10.), (3., 100., -3., 0.), (0., 0., 0., 0.)):
+        batch = true_wind_array(*state)
+        assert float(batch.speed) == pytest.approx(true_wind_speed(*state), rel=1e-12)
+        assert float(batch.angle) == pytest.approx(true_wind_angle(*state), rel=1e-12, abs=1e-12)
+    apparent_wind_angles = np.array([-120., 30., 200.])
+    true_wind_angle_array(5., apparent_wind_angles, 1., errors='nan')
+    assert apparent_wind_angles.tolist() == [-120., 30., 200.]
+
+
+def test_fused_true_wind():
+    r"""The fused functions return the same values as the separate ones"""
+    states = np.array(list(itertools.product([0., 1., 10. * math.sqrt(2.)],
+                                             [-180., -135., -90., -45., 0., 45., 120., 180.],
+                                             [-10., 0., 3., 10.],
+                                             [-40., 0., 40., 89.])))
+    batch = true_wind_array(*states.T)
+    assert not hasattr(batch, '__dict__')
+    assert np.array_equal(batch.speed, true_wind_speed_array(*states.T))
+    assert np.array_equal(batch.angle, true_wind_angle_array(*states.T))
+    for state in states:
+        assert true_wind(*state) == {"speed": true_wind_speed(*state),
+                                     "angle": true_wind_angle(*state)}
+    with pytest.raises(ValueError):
+        true_wind(10., 45., 3., 90.)
+
+
+def test_true_wind_jacobian_array_finite_differences():
+    r"""Same values as true_wind_array, derivatives match centred finite differences"""
+    rng = np.random.default_rng(0)
+    states = {"apparent_wind_speed": rng.uniform(1., 20., 500),
+              "apparent_wind_angle": rng.uniform(-150., 150., 500),
+              "boatspeed": rng.uniform(0., 8., 500),
+              "heel_angle": rng.uniform(-40., 40., 500)}
+    jacobian = true_wind_jacobian_array(**states)
+    true = true_wind_array(**states)
+    assert np.array_equal(jacobian.speed, true.speed)
+    assert np.array_equal(jacobian.angle, true.angle)
+    step = 1e-6
+    for name in states:
+        upper = true_wind_array(**dict(states, **{name: states[name] + step}))
+        lower = true_wind_array(**dict(states, **{name: states[name] - step}))
+        assert np.allclose(jacobian.speed_derivatives[name], (upper.speed - lower.speed) / (2. * step),
+                           rtol=1e-5, atol=1e-6)
+        assert np.allclose(jacobian.angle_derivatives[name], (upper.angle - lower.angle) / (2. * step),
+                           rtol=1e-5, atol=1e-6)
+
+
+def test_true_wind_jacobian_null_angle():
+    r"""At awa = 0, the derivatives match centred finite differences (scalar and arrays)"""
+    states = {"apparent_wind_speed": np.array([10., 5., 12.]),
+              "apparent_wind_angle": np.zeros(3),
+              "boatspeed": np.array([2., 0., 6.]),
+              "heel_angle": np.array([10., 0., -25.])}
+    jacobian = true_wind_jacobian_array(**states)
+    step = 1e-6
+    for name in states:
+        upper = true_wind_array(**dict(states, **{name: states[name] + step}))
+        lower = true_wind_array(**dict(states, **{name: states[name] - step}))
+        expected = (upper.angle - lower.angle) / (2. * step)
+        assert np.allclose(jacobian.angle_derivatives[name], expected, rtol=1e-5, atol=1e-6)
+        for i in range(3):
+            scalar = true_wind_jacobian(*(values[i] for values in states.values()))
+            assert scalar["angle_derivatives"][name] == pytest.approx(expected[i], rel=1e-5, abs=1e-6)
+    assert true_wind_jacobian(10., 0., 2., 10.)["angle_derivatives"]["apparent_wind_angle"] == \
+        pytest.approx(1.27, abs=5e-3)
+
+
+def test_true_wind_jacobian_scalar():
+    r"""Scalar version, same values as the vectorized version"""
+    states = list(itertools.product([0.5, 10.], [-150., -30., 60., 170.], [-1., 0., 3.], [-20., 0., 15.]))
+    jacobian_array = true_wind_jacobian_array(*np.array(states).T)
+    for i, state in enumerate(states):
+        jacobian = true_wind_jacobian(*state)
+        assert jacobian["speed"] == true_wind(*state)["speed"]
+        assert jacobian["angle"] == true_wind(*state)["angle"]
+        for name, derivative in jacobian["speed_derivatives"].items():
+            assert derivative == pytest.approx(jacobian_array.speed_derivatives[name][i], rel=1e-12, abs=1e-12)
+        for name, derivative in jacobian["angle_derivatives"].items():
+            assert derivative == pytest.approx(jacobian_array.angle_derivatives[name][i], rel=1e-12, abs=1e-12)
+
+
+def test_true_wind_jacobian_invalid_rows():
+    r"""Invalid rows raise or are NaN"""
+    with pytest.raises(ValueError):
+        true_wind_jacobian(10., 45., 2., heel_angle=89.5)
+    with pytest.raises(ValueError):
+        true_wind_jacobian_array(np.array([10., 10.]), 45., 2., heel_angle=np.array([10., 89.5]))
+    jacobian = true_wind_jacobian_array(np.array([10., 10.]), 45., 2., heel_angle=np.array([10., 89.5]),
+                                        errors='nan')
+    assert np.isnan(jacobian.angle_derivatives["heel_angle"][1])
+    assert not np.isnan(jacobian.angle_derivatives["heel_angle"][0])
@@ -3,9 +3,20 @@
 
 r"""Tests for the windage.py module"""
 
+import itertools
+
+import numpy as np
 import pytest
+from scipy.interpolate import UnivariateSpline
+
+from ydeos_aerodynamics.apparent import WindState
+from ydeos_aerodynamics.windage import windage_hull, windage_mast_with_sail, \
+    HullWindageModel, MastWindageModel
 
-from ydeos_aerodynamics.windage import windage_hull, windage_mast_with_sail
+STATES = np.array(list(itertools.product([0., 3., 10.],
+                                         [-180., -120., -45., 0., 30., 90., 150., 180.],
+                                         [-2., 0., 2.],
+                                         [-30., 0., 10., 60.])))
 
 
 def test_windage_hull_negative_freeboard():
@@ -42,6 +53,44 @@ def test_windage_hull_square_downwind_running():
     force = windage_hull(tws=10., twa=180., boatspeed=5., heel_angle=0., freeboard_average=0.07, loa=1.0, beam_max=0.2)
     assert force.fx > 0
 
+
+# Values of windage_hull before HullWindageModel, for freeboard_average=0.07, loa=1.0, beam_max=0.2
+HULL_WINDAGE_GOLDEN = (
+    ((10., 45., 2., 10.), (-1.8264252610674518, 1.4237328109727931, 0., 0.5, 0., 0.06912155945203481)),
+    ((3., -120., 0., -30.), (0.13765919999999998, -0.23843272852928568, 0., 0.5, 0., -0.01979999999999999)),
+    ((10., 180., 2., 0.), (0.3670912000000002, 4.4955706307516105e-17, 0., 0.5, 0., 0.046200000000000005)),
+    ((6., 90., -2., 60.), (0.55313099637268, 1.6593929891180408, 0., 0.5, 0., 0.16051535329954592)),
+    ((0., 30., 2., 10.), (-0.022943200000000014, 0., 0., 0.5, 0., 0.06912155945203481)))
+
+
+def test_hull_windage_golden_values():
+    r"""windage_hull and the model (scalar and arrays) keep the values of the original implementation"""
+    model = HullWindageModel(freeboard_average=0.07, loa=1.0, beam_max=0.2)
+    states = np.array([state for state, _ in HULL_WINDAGE_GOLDEN])
+    force_array = model(*states.T)
+    for i, (state, expected) in enumerate(HULL_WINDAGE_GOLDEN):
+        assert windage_hull(*state, freeboard_average=0.07, loa=1.0, beam_max=0.2) == \
+            pytest.approx(expected, rel=1e-12, abs=1e-14)
+        assert model(*state) == pytest.approx(expected, rel=1e-12, abs=1e-14)
+        assert [field[i] for field in force_array] == pytest.approx(expected, rel=1e-12, abs=1e-14)
+
+
+def test_hull_windage_model_matches_function():
+    r"""The model evaluates arrays with the same values as windage_hull"""
+    model = HullWindageModel(freeboard_average=0.07, loa=1.0, beam_max=0.2)
+    force_array = model(*STATES.T)
+    for i, state in enumerate(STATES):
+        force = windage_hull(*state, freeboard_average=0.07, loa=1.0, beam_max=0.2)
+        for field in force._fields:
+            assert np.isclose(getattr(force_array, field)[i], getattr(force, field), rtol=1e-12, atol=1e-12)
+
+
+def test_hull_windage_model_exceptions():
+    r"""The hull dimensions are checked when building the model"""
+    with pytest.raises(ValueError):
+        HullWindageModel(freeboard_average=0.07, loa=0., beam_max=0.2)
+
+
 # Mast windage
 
 
@@ -137,3 +186,69 @@ def test_windage_mast_with_trim_angle():
                                        mast_z_bottom=0.07,  mast_z_top=1.7,  mast_front_area=0.017,
                                        mast_side_area=0.017)
     assert force_por.px > 0.5
+
+
+def test_mast_windage_model_drag_area():
+    r"""The closed form drag area is the quadratic fitted on the 3 AWA points"""
+    model = MastWindageModel(mast_x=0.5, mast_z_bottom=0.07, mast_z_top=1.7, mast_front_area=0.017,
+                             mast_side_area=0.023)
+    spline = UnivariateSpline([0., 90., 180.], [0.4 * 0.017, 0.6 * 0.023, 0.4 * 0.017], k=2, s=0)
+    awas = np.linspace(-180., 180., 361)
+    assert np.allclose(model.s_times_c_drag(awas), spline(np.abs(awas)), rtol=1e-12, atol=0.)
+
+
+# Values of windage_mast_with_sail before MastWindageModel (spline of the drag coefficient)
+MAST_WINDAGE_GOLDEN = (
+    ((10., 45., 2., 10., 0.),
+     (-0.5696460677801014, 0.4440498139333444, 0., 0.5, 0.15367863723523334, 0.8715548614158041)),
+    ((3., -120., 0., -30., 5.),
+     (0.02663049999999999, -0.04612537903096299, 0., 0.42286716766832255, 0., 0.7664324823492282)),
+    ((10., 180., 2., 0., -5.),
+     (0.26220800000000005, 3.211121879108292e-17, 0., 0.5771328323316774, 0., 0.885)),
+    ((6., 90., -2., 60., 0.),
+     (0.0766479460669029, 0.22994383820070877, 0., 0.5, 0.7664324823492281, 0.4425000000000001)),
+    ((0., 30., 2., 10., 5.),
+     (-0.016388000000000003, 0., 0., 0.42286716766832255, 0.15367863723523334, 0.8715548614158041)))
+
+
+def test_mast_windage_golden_values():
+    r"""windage_mast_with_sail and the model (scalar and arrays) keep the values of the original implementation"""
+    dimensions = dict(mast_x=0.5, mast_z_bottom=0.07, mast_z_top=1.7, mast_front_area=0.017, mast_side_area=0.017)
+    model = MastWindageModel(**dimensions)
+    states = np.array([state for state, _ in MAST_WINDAGE_GOLDEN])
+    force_array = model(*states.T)
+    for i, (state, expected) in enumerate(MAST_WINDAGE_GOLDEN):
+        assert windage_mast_with_sail(*state, **dimensions) == pytest.approx(expected, rel=1e-12, abs=1e-14)
+        assert model(*state) == pytest.approx(expected, rel=1e-12, abs=1e-14)
+        assert [field[i] for field in force_array] == pytest.approx(expected, rel=1e-12, abs=1e-14)
+
+
+def test_mast_windage_model_matches_function():
+    r"""The model evaluates arrays with the same values as windage_mast_with_sail"""
+    model = MastWindageModel(mast_x=0.5, mast_z_bottom=0.07, mast_z_top=1.7, mast_front_area=0.017,
+                             mast_side_area=0.017)
+    trim_angles = np.resize([-5., 0., 5.], len(STATES))
+    force_array = model(*STATES.T, trim_angles)
+    for i, (state, trim_angle) in enumerate(zip(STATES, trim_angles)):
+        force = windage_mast_with_sail(*state, trim_angle, mast_x=0.5, mast_z_bottom=0.07, mast_z_top=1.7,
+                                       mast_front_area=0.017, mast_side_area=0.017)
+        for field in force._fields:
+            assert np.isclose(getattr(force_array, field)[i], getattr(force, field), rtol=1e-12, atol=1e-12)
+
+
+def test_windage_models_with_wind_state():
+    r"""A precomputed WindState gives the same windage"""
+    hull = HullWindageModel(0.1, 1., 0.2)
+    mast = MastWindageModel(0.5, 0.1, 1.2, 0.05, 0.05)
+    tws, twa, boatspeed, heel_angle = STATES.T
+    wind_state = WindState(tws, twa, boatspeed, heel_angle)
+    for field, expected in zip(hull(tws, twa, boatspeed, heel_angle, wind_state=wind_state),
+                               hull(tws, twa, boatspeed, heel_angle)):
+        np.testing.assert_array_equal(field, expected)
+    for field, expected in zip(mast(tws, twa, boatspeed, heel_angle, 2., wind_state=wind_state),
+                               mast(tws, twa, boatspeed, heel_angle, 2.)):
+        np.testing.assert_array_equal(field, expected)
+    for state in STATES[::7]:
+        wind_state = WindState(*state)
+        assert hull(*state, wind_state=wind_state) == hull(*state)
+        assert mast(*state, 2., wind_state=wind_state) == mast(*state, 2.)
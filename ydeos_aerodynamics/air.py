@@ -2,6 +2,8 @@
 
 r"""Air characteristics."""
 
+from bisect import bisect_right
+from typing import Callable, List, Tuple
 import numpy as np
 from scipy.interpolate import PchipInterpolator
 
@@ -13,6 +15,46 @@ kinematic_viscosities_air = np.array([9.55e-6, 13.30e-6, 15.11e-6, 16.97e-6,
 RHO_AIR_20C = 1.205
 
 
+def _scalar_evaluator(interpolator: PchipInterpolator) -> Callable[[float], float]:
+    r"""Pure Python evaluation of a piecewise cubic interpolator.
+
+    The breakpoints and segment polynomial coefficients are extracted once.
+    The polynomial is evaluated in the same order as scipy's PPoly,
+    so that the results are identical to interpolator(value),
+    without the numpy overhead on a single value.
+
+    """
+    breakpoints: List[float] = interpolator.x.tolist()
+    coefficients: List[Tuple[float, ...]] = [tuple(column) for column in interpolator.c.T.tolist()]
+    last_segment = len(breakpoints) - 2
+
+    def evaluate(value: float) -> float:
+        if not breakpoints[0] <= value <= breakpoints[-1]:
+            return float('nan')
+        segment = min(bisect_right(breakpoints, value) - 1, last_segment)
+        c_3, c_2, c_1, c_0 = coefficients[segment]
+        dx = value - breakpoints[segment]
+        dx_power = dx
+        result = c_0 + c_1 * dx_power
+        dx_power *= dx
+        result = result + c_2 * dx_power
+        dx_power *= dx
+        return result + c_3 * dx_power
+
+    return evaluate
+
+
+# The interpolators only depend on the module level tables: build them once
+_density_interpolator = PchipInterpolator(temperatures,
+                                          densities_air,
+                                          extrapolate=False)
+_kinematic_viscosity_interpolator = PchipInterpolator(temperatures,
+                                                      kinematic_viscosities_air,
+                                                      extrapolate=False)
+_density_scalar = _scalar_evaluator(_density_interpolator)
+_kinematic_viscosity_scalar = _scalar_evaluator(_kinematic_viscosity_interpolator)
+
+
 def density_air(temperature: float) -> float:
     r"""Air density as a function of temperature.
 
@@ -21,12 +63,28 @@ def density_air(temperature: float) -> float:
     temperature : The temperature in degrees celsius
 
     Returns the density in kg/m**3
+    (NaN outside of the temperatures range)
 
     """
-    density_interpolator = PchipInterpolator(temperatures,
-                                             densities_air,
-                                             extrapolate=False)
-    return density_interpolator(temperature)
+    if isinstance(temperature, (int, float)):
+        return _density_scalar(temperature)
+    if np.ndim(temperature) != 0:
+        return density_air_array(temperature)
+    return _density_scalar(float(temperature))
+
+
+def density_air_array(temperature: np.ndarray) -> np.ndarray:
+    r"""Air density for an array of temperatures.
+
+    Parameters
+    ----------
+    temperature : The temperatures in degrees celsius
+
+    Returns the densities in kg/m**3
+    (NaN outside of the temperatures range)
+
+    """
+    return _density_interpolator(temperature)
 
 
 def kinematic_viscosity_air(temperature: float) -> float:
@@ -37,9 +95,25 @@ def kinematic_viscosity_air(temperature: float) -> float:
     temperature : The temperature in degrees celsius
 
     Returns the kinematic viscosity in m**2/s
+    (NaN outside of the temperatures range)
+
+    """
+    if isinstance(temperature, (int, float)):
+        return _kinematic_viscosity_scalar(temperature)
+    if np.ndim(temperature) != 0:
+        return kinematic_viscosity_air_array(temperature)
+    return _kinematic_viscosity_scalar(float(temperature))
+
+
+def kinematic_viscosity_air_array(temperature: np.ndarray) -> np.ndarray:
+    r"""Air kinematic viscosity for an array of temperatures.
+
+    Parameters
+    ----------
+    temperature : The temperatures in degrees celsius
+
+    Returns the kinematic viscosities in m**2/s
+    (NaN outside of the temperatures range)
 
     """
-    kinematic_viscosity_interpolator = PchipInterpolator(temperatures,
-                                                         kinematic_viscosities_air,
-                                                         extrapolate=False)
-    return kinematic_viscosity_interpolator(temperature)
+    return _kinematic_viscosity_interpolator(temperature)
@@ -2,8 +2,9 @@
 
 r"""Apparent wind from true."""
 
-from typing import Dict
-from math import cos, sin, radians, degrees, atan, sqrt
+from typing import Dict, List, Tuple
+from math import cos, sin, radians, degrees, atan, sqrt, pi
+import numpy as np
 
 
 def apparent_wind_angle(true_wind_speed: float,
@@ -145,14 +146,522 @@ def apparent_wind(true_wind_speed: float,
                        should be possible to disable the check on
                        the heel angle.
 
+    Returns a dict with the apparent wind "speed" [m/s] and "angle" [degrees],
+    same values as apparent_wind_speed() and apparent_wind_angle(),
+    but the inputs are checked once and the trigonometric terms
+    are computed once.
+
+    """
+    if true_wind_speed < 0.:
+        raise ValueError("The true wind speed must be positive")
+    if true_wind_angle < -180. or true_wind_angle > 180.:
+        raise ValueError("The true wind angle must be between -180 and 180")
+    if check_heel_angle is True:
+        if heel_angle < -90. or heel_angle > 90.:
+            raise ValueError("Unrealistic heel angle")
+
+    sign = true_wind_angle / abs(true_wind_angle) if true_wind_angle != 0. else 0.
+
+    abs_true_wind_angle = radians(abs(true_wind_angle))
+    # Components of the apparent wind along and across the boat
+    along = true_wind_speed * cos(abs_true_wind_angle) + boatspeed
+    across = true_wind_speed * sin(abs_true_wind_angle) * cos(radians(heel_angle))
+
+    awa = degrees(atan(across / along)) if along != 0. else 0.
+
+    # math.atan will return a negative angle for awa between 90 and 180
+    if awa < 0:
+        awa += 180.
+
+    return {"speed": sqrt(across ** 2 + along ** 2),
+            "angle": awa * sign}
+
+
+def _apparent_wind_components_derivatives(true_wind_speed,
+                                          sign,
+                                          cos_twa,
+                                          sin_twa,
+                                          cos_heel,
+                                          sin_heel,
+                                          zero=0.,
+                                          one=1.) -> Dict:
+    r"""Derivatives (d along, d across) of the apparent wind components with respect to each variable.
+
+    Works with floats and arrays (pass arrays of zeros and ones
+    for zero and one), sign is the sign of the true wind angle
+    (1 for a null angle, the limit of the derivatives on both sides).
+
+    """
+    return {"true_wind_speed": (cos_twa, sin_twa * cos_heel),
+            "true_wind_angle": (-true_wind_speed * sin_twa * sign * (pi / 180.),
+                                true_wind_speed * cos_twa * cos_heel * sign * (pi / 180.)),
+            "boatspeed": (one, zero),
+            "heel_angle": (zero, -true_wind_speed * sin_twa * sin_heel * (pi / 180.))}
+
+
+def apparent_wind_jacobian(true_wind_speed: float,
+                           true_wind_angle: float,
+                           boatspeed: float,
+                           heel_angle: float = 0.,
+                           check_heel_angle: bool = False) -> Dict:
+    r"""Apparent wind with its partial derivatives.
+
+    The parameters are the same as for apparent_wind().
+
+    Returns a dict with the apparent wind "speed" [m/s] and "angle" [degrees],
+    same values as apparent_wind(), and the "speed_derivatives" and
+    "angle_derivatives" dicts keyed by the names of the variables
+    (true_wind_speed, true_wind_angle, boatspeed, heel_angle).
+    The derivatives with respect to angles are per degree,
+    they are NaN if the apparent wind speed is 0.
+
+    """
+    if true_wind_speed < 0.:
+        raise ValueError("The true wind speed must be positive")
+    if true_wind_angle < -180. or true_wind_angle > 180.:
+        raise ValueError("The true wind angle must be between -180 and 180")
+    if check_heel_angle is True:
+        if heel_angle < -90. or heel_angle > 90.:
+            raise ValueError("Unrealistic heel angle")
+
+    sign = true_wind_angle / abs(true_wind_angle) if true_wind_angle != 0. else 0.
+    abs_true_wind_angle = radians(abs(true_wind_angle))
+    heel = radians(heel_angle)
+    cos_twa, sin_twa = cos(abs_true_wind_angle), sin(abs_true_wind_angle)
+    cos_heel = cos(heel)
+    # same expressions as apparent_wind()
+    along = true_wind_speed * cos_twa + boatspeed
+    across = true_wind_speed * sin_twa * cos_heel
+    awa = degrees(atan(across / along)) if along != 0. else 0.
+    if awa < 0:
+        awa += 180.
+    speed = sqrt(across ** 2 + along ** 2)
+    apparent = {"speed": speed, "angle": awa * sign}
+
+    # The angle derivatives are the same on both sides of a null angle
+    sign = sign if true_wind_angle != 0. else 1.
+    apparent["speed_derivatives"], apparent["angle_derivatives"] = {}, {}
+    for name, (d_along, d_across) in _apparent_wind_components_derivatives(true_wind_speed, sign,
+                                                                           cos_twa, sin_twa,
+                                                                           cos_heel, sin(heel)).items():
+        if speed == 0.:
+            apparent["speed_derivatives"][name] = apparent["angle_derivatives"][name] = float('nan')
+            continue
+        apparent["speed_derivatives"][name] = (along * d_along + across * d_across) / speed
+        apparent["angle_derivatives"][name] = sign * degrees((along * d_across - across * d_along) / speed ** 2)
+    return apparent
+
+
+class ApparentWind:
+    r"""Apparent wind speeds [m/s] and angles [degrees] of a batch."""
+
+    __slots__ = ('speed', 'angle')
+
+    def __init__(self, speed: np.ndarray, angle: np.ndarray):
+        self.speed = speed
+        self.angle = angle
+
+    def __repr__(self) -> str:
+        return f"ApparentWind(speed={self.speed!r}, angle={self.angle!r})"
+
+
+_INVALID_TRUE_WIND_MESSAGE = "The true wind speed must be positive, the true wind " \
+                              "angle between -180 and 180 and the heel angle " \
+                              "between -90 and 90 (if checked)"
+
+
+def _raise_on_invalid_rows(invalid: np.ndarray, message: str) -> None:
+    r"""Raise a single ValueError listing the indices of the invalid rows."""
+    if not np.any(invalid):
+        return
+    if invalid.ndim == 0:
+        raise ValueError(message)
+    invalid = np.argwhere(invalid)
+    if invalid.shape[1] == 1:
+        invalid = invalid[:, 0]
+    nb_invalid = len(invalid)
+    indices = ", ".join(str(index) if np.ndim(index) == 0 else str(tuple(index))
+                        for index in invalid[:10].tolist())
+    if nb_invalid > 10:
+        indices += ", ..."
+    raise ValueError(f"{message} ({nb_invalid} invalid rows at indices [{indices}])")
+
+
+def _check_errors(errors: str) -> None:
+    if errors not in ('raise', 'nan'):
+        raise ValueError("errors must be 'raise' or 'nan'")
+
+
+def _apply_validity(invalid: np.ndarray,
+                    values: np.ndarray,
+                    errors: str,
+                    message: str) -> np.ndarray:
+    r"""Raise or set NaN at the invalid rows (True in the invalid mask), depending on errors.
+
+    The values are returned as they are (no copy) when all the rows are valid.
+
     """
-    return {"speed": apparent_wind_speed(true_wind_speed,
-                                         true_wind_angle,
-                                         boatspeed,
-                                         heel_angle,
-                                         check_heel_angle),
-            "angle": apparent_wind_angle(true_wind_speed,
-                                         true_wind_angle,
-                                         boatspeed,
-                                         heel_angle,
-                                         check_heel_angle)}
+    _check_errors(errors)
+    if not np.any(invalid):
+        return values
+    if errors == 'raise':
+        _raise_on_invalid_rows(invalid, message)
+    return np.where(invalid, np.nan, values)
+
+
+def _outside(values: np.ndarray, bound: float, out: np.ndarray) -> np.ndarray:
+    r"""In place |values| > bound or'ed into the out mask (False for NaN, as the scalar checks)."""
+    return np.logical_or(out, np.greater(np.abs(values), bound), out=out)
+
+
+def _apparent_wind_invalid(true_wind_speed: np.ndarray,
+                           true_wind_angle: np.ndarray,
+                           heel_angle: np.ndarray,
+                           check_heel_angle: bool) -> np.ndarray:
+    r"""Single mask of the invalid rows (broadcast float arrays)."""
+    invalid = np.asarray(np.less(true_wind_speed, 0.))
+    _outside(true_wind_angle, 180., invalid)
+    if check_heel_angle is True:
+        _outside(heel_angle, 90., invalid)
+    return invalid
+
+
+def apparent_wind_validity(true_wind_speed: np.ndarray,
+                           true_wind_angle: np.ndarray,
+                           heel_angle: np.ndarray = 0.,
+                           check_heel_angle: bool = False) -> np.ndarray:
+    r"""Mask of the valid inputs of the apparent wind computations.
+
+    true_wind_speed : true wind speed [m/s], must be >= 0
+    true_wind_angle : true wind angle [degrees], must be between -180 and 180
+    heel_angle : the heel angle [degrees], must be between -90 and 90
+                 if check_heel_angle is True
+    check_heel_angle : Should the heel angle be checked for validity
+
+    Returns a boolean array, True where the scalar functions
+    would not raise a ValueError
+
+    """
+    true_wind_speed, true_wind_angle, heel_angle = \
+        _broadcast_floats(true_wind_speed, true_wind_angle, heel_angle)
+    return ~_apparent_wind_invalid(true_wind_speed, true_wind_angle, heel_angle, check_heel_angle)
+
+
+def _apparent_wind_components(true_wind_speed: np.ndarray,
+                               true_wind_angle: np.ndarray,
+                               boatspeed: np.ndarray,
+                               heel_angle: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    r"""Components of the apparent wind along and across the boat.
+
+    The across component is positive (computed from the absolute
+    value of the true wind angle). The temporaries are reused in place.
+
+    """
+    abs_true_wind_angle = np.asarray(np.radians(np.abs(true_wind_angle)))
+    along = np.cos(abs_true_wind_angle)
+    along *= true_wind_speed
+    along += boatspeed
+    across = np.sin(abs_true_wind_angle, out=abs_true_wind_angle)
+    across *= true_wind_speed
+    across *= np.cos(np.radians(heel_angle))
+    return along, across
+
+
+def _apparent_wind_speed_from_components(along: np.ndarray, across: np.ndarray) -> np.ndarray:
+    r"""Apparent wind speed [m/s] from its components, sqrt(across ** 2 + along ** 2)."""
+    speed = np.asarray(np.square(across))
+    speed += np.square(along)
+    return np.sqrt(speed, out=speed)
+
+
+def _apparent_wind_angle_from_components(true_wind_angle: np.ndarray,
+                                         along: np.ndarray,
+                                         across: np.ndarray) -> np.ndarray:
+    r"""Signed apparent wind angle [degrees] from its components, computed in place."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        awa = np.asarray(np.divide(across, along))
+    np.arctan(awa, out=awa)
+    np.degrees(awa, out=awa)
+    np.copyto(awa, 0., where=along == 0.)
+
+    # np.arctan returns a negative angle for awa between 90 and 180
+    np.add(awa, 180., out=awa, where=awa < 0)
+
+    awa *= np.sign(true_wind_angle)
+    return awa
+
+
+def _broadcast_floats(*values) -> List[np.ndarray]:
+    r"""Broadcast the values together as float arrays."""
+    return np.broadcast_arrays(*[np.asarray(value, dtype=float) for value in values])
+
+
+def apparent_wind_angle_array(true_wind_speed: np.ndarray,
+                              true_wind_angle: np.ndarray,
+                              boatspeed: np.ndarray,
+                              heel_angle: np.ndarray = 0.,
+                              check_heel_angle: bool = False,
+                              errors: str = 'raise') -> np.ndarray:
+    r"""Apparent wind angle, vectorized version of apparent_wind_angle().
+
+    The parameters are the same as for apparent_wind_angle()
+    but can be any arrays that broadcast together.
+    errors : 'raise' to raise a single ValueError listing the invalid rows,
+             'nan' to return NaN for the invalid rows
+             (see apparent_wind_validity())
+
+    Returns an array of apparent wind angles [degrees]
+
+    Raises
+    ------
+    ValueError
+        if any of the inputs is invalid (see apparent_wind_angle())
+        and errors is 'raise'
+
+    """
+    true_wind_speed, true_wind_angle, boatspeed, heel_angle = \
+        _broadcast_floats(true_wind_speed, true_wind_angle, boatspeed, heel_angle)
+    invalid = _apparent_wind_invalid(true_wind_speed, true_wind_angle, heel_angle, check_heel_angle)
+
+    along, across = _apparent_wind_components(true_wind_speed, true_wind_angle,
+                                              boatspeed, heel_angle)
+    awa = _apparent_wind_angle_from_components(true_wind_angle, along, across)
+    return _apply_validity(invalid, awa, errors, _INVALID_TRUE_WIND_MESSAGE)
+
+
+def apparent_wind_speed_array(true_wind_speed: np.ndarray,
+                              true_wind_angle: np.ndarray,
+                              boatspeed: np.ndarray,
+                              heel_angle: np.ndarray = 0.,
+                              check_heel_angle: bool = False,
+                              errors: str = 'raise') -> np.ndarray:
+    r"""Apparent wind speed, vectorized version of apparent_wind_speed().
+
+    The parameters are the same as for apparent_wind_speed()
+    but can be any arrays that broadcast together.
+    errors : 'raise' to raise a single ValueError listing the invalid rows,
+             'nan' to return NaN for the invalid rows
+             (see apparent_wind_validity())
+
+    Returns an array of apparent wind speeds [m/s]
+
+    Raises
+    ------
+    ValueError
+        if any of the inputs is invalid (see apparent_wind_speed())
+        and errors is 'raise'
+
+    """
+    true_wind_speed, true_wind_angle, boatspeed, heel_angle = \
+        _broadcast_floats(true_wind_speed, true_wind_angle, boatspeed, heel_angle)
+    invalid = _apparent_wind_invalid(true_wind_speed, true_wind_angle, heel_angle, check_heel_angle)
+
+    along, across = _apparent_wind_components(true_wind_speed, true_wind_angle,
+                                              boatspeed, heel_angle)
+    aws = _apparent_wind_speed_from_components(along, across)
+    return _apply_validity(invalid, aws, errors, _INVALID_TRUE_WIND_MESSAGE)
+
+
+def apparent_wind_array(true_wind_speed: np.ndarray,
+                        true_wind_angle: np.ndarray,
+                        boatspeed: np.ndarray,
+                        heel_angle: np.ndarray = 0.,
+                        check_heel_angle: bool = False,
+                        errors: str = 'raise') -> ApparentWind:
+    r"""Apparent wind speed and angle, vectorized version of apparent_wind().
+
+    The parameters are the same as for apparent_wind_speed_array().
+    The inputs are checked once and the trigonometric terms
+    are computed once for the speed and the angle.
+
+    Returns an ApparentWind with the speed [m/s] and angle [degrees] arrays
+
+    """
+    true_wind_speed, true_wind_angle, boatspeed, heel_angle = \
+        _broadcast_floats(true_wind_speed, true_wind_angle, boatspeed, heel_angle)
+    invalid = _apparent_wind_invalid(true_wind_speed, true_wind_angle, heel_angle, check_heel_angle)
+
+    along, across = _apparent_wind_components(true_wind_speed, true_wind_angle,
+                                              boatspeed, heel_angle)
+    return ApparentWind(_apply_validity(invalid,
+                                        _apparent_wind_speed_from_components(along, across),
+                                        errors,
+                                        _INVALID_TRUE_WIND_MESSAGE),
+                        _apply_validity(invalid,
+                                        _apparent_wind_angle_from_components(true_wind_angle, along, across),
+                                        errors,
+                                        _INVALID_TRUE_WIND_MESSAGE))
+
+
+class ApparentWindJacobian:
+    r"""Apparent wind speeds [m/s] and angles [degrees] of a batch with their partial derivatives.
+
+    speed_derivatives and angle_derivatives are dicts of arrays keyed by the
+    names of the variables: true_wind_speed, true_wind_angle, boatspeed and
+    heel_angle. The derivatives with respect to angles are per degree.
+
+    """
+
+    __slots__ = ('speed', 'angle', 'speed_derivatives', 'angle_derivatives')
+
+    def __init__(self,
+                 speed: np.ndarray,
+                 angle: np.ndarray,
+                 speed_derivatives: Dict[str, np.ndarray],
+                 angle_derivatives: Dict[str, np.ndarray]):
+        self.speed = speed
+        self.angle = angle
+        self.speed_derivatives = speed_derivatives
+        self.angle_derivatives = angle_derivatives
+
+    def __repr__(self) -> str:
+        return f"ApparentWindJacobian(speed={self.speed!r}, angle={self.angle!r})"
+
+
+def apparent_wind_jacobian_array(true_wind_speed: np.ndarray,
+                                 true_wind_angle: np.ndarray,
+                                 boatspeed: np.ndarray,
+                                 heel_angle: np.ndarray = 0.,
+                                 check_heel_angle: bool = False,
+                                 errors: str = 'raise') -> ApparentWindJacobian:
+    r"""Apparent wind speed and angle with their partial derivatives.
+
+    The parameters are the same as for apparent_wind_array(), the speeds
+    and angles are identical to the ones of apparent_wind_array().
+    The derivatives are computed in closed form from the along and across
+    components of the apparent wind and share their trigonometric terms.
+    They are NaN where the apparent wind speed is 0.
+
+    Returns an ApparentWindJacobian
+
+    """
+    true_wind_speed, true_wind_angle, boatspeed, heel_angle = \
+        _broadcast_floats(true_wind_speed, true_wind_angle, boatspeed, heel_angle)
+    invalid = _apparent_wind_invalid(true_wind_speed, true_wind_angle, heel_angle, check_heel_angle)
+
+    abs_true_wind_angle = np.radians(np.abs(true_wind_angle))
+    heel = np.radians(heel_angle)
+    cos_twa, sin_twa = np.cos(abs_true_wind_angle), np.sin(abs_true_wind_angle)
+    cos_heel = np.cos(heel)
+    # same expressions as _apparent_wind_components()
+    along = true_wind_speed * cos_twa + boatspeed
+    across = true_wind_speed * sin_twa * cos_heel
+    speed = _apparent_wind_speed_from_components(along, across)
+    angle = _apparent_wind_angle_from_components(true_wind_angle, along, across)
+
+    # The angle derivatives are the same on both sides of a null angle
+    sign = np.where(true_wind_angle < 0., -1., 1.)
+    speed_derivatives, angle_derivatives = {}, {}
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for name, (d_along, d_across) in _apparent_wind_components_derivatives(true_wind_speed, sign,
+                                                                               cos_twa, sin_twa,
+                                                                               cos_heel, np.sin(heel),
+                                                                               np.zeros_like(along),
+                                                                               np.ones_like(along)).items():
+            speed_derivatives[name] = _apply_validity(invalid,
+                                                      (along * d_along + across * d_across) / speed,
+                                                      errors, _INVALID_TRUE_WIND_MESSAGE)
+            angle_derivatives[name] = _apply_validity(invalid,
+                                                      sign * np.degrees((along * d_across - across * d_along)
+                                                                        / speed ** 2),
+                                                      errors, _INVALID_TRUE_WIND_MESSAGE)
+
+    return ApparentWindJacobian(_apply_validity(invalid, speed, errors, _INVALID_TRUE_WIND_MESSAGE),
+                                _apply_validity(invalid, angle, errors, _INVALID_TRUE_WIND_MESSAGE),
+                                speed_derivatives,
+                                angle_derivatives)
+
+
+def phi_up(phi: float) -> float:
+    """Correction for the heel_angle used to interpolate the coefficient curves.
+
+    Defined on p49 (eqn. [43]) of ORC VPP documentation 2013
+
+    In the VPP as the yacht heels the apparent wind angle seen
+    by the sails reduces, but on the water the crew have traveler and jib
+    lead controls that permit adjustment of angle of attack.
+    To reflect this the PHI_UP function modifies the heel angle
+    that is used in the calculation of the
+    apparent wind angle at which the collective curves of lift and drag
+    coefficient are evaluated.
+
+    """
+    return 10 * (phi / 30.) ** 2
+
+
+class WindState:
+    r"""Apparent winds of sailing states, computed once for all the force models.
+
+    The sails force model uses the apparent wind at the heel angle and at
+    the phi_up() heel angle, the windage models use the upright apparent wind.
+    The inputs are checked once and the components of the 3 apparent winds
+    share their trigonometric terms.
+
+    Parameters
+    ----------
+    tws : true wind speed [m/s], positive
+    twa : true wind angle [degrees], between -180 and 180
+    boatspeed : [m/s]
+    heel_angle : [degrees]
+
+    The parameters are floats (the apparent winds are floats, as from
+    apparent_wind()) or arrays that broadcast together (the apparent
+    winds are arrays, as from apparent_wind_array()).
+    The apparent wind angles are signed as twa.
+
+    Raises
+    ------
+    ValueError
+        if tws is negative or twa is not between -180 and 180
+
+    """
+
+    __slots__ = ('tws', 'twa', 'boatspeed', 'heel_angle', 'upright', 'heeled', 'phi_up')
+
+    def __init__(self,
+                 tws: np.ndarray,
+                 twa: np.ndarray,
+                 boatspeed: np.ndarray,
+                 heel_angle: np.ndarray = 0.):
+        if all(np.ndim(value) == 0 for value in (tws, twa, boatspeed, heel_angle)):
+            self._init_scalar(float(tws), float(twa), float(boatspeed), float(heel_angle))
+            return
+
+        tws, twa, boatspeed, heel_angle = _broadcast_floats(tws, twa, boatspeed, heel_angle)
+        _raise_on_invalid_rows(_apparent_wind_invalid(tws, twa, heel_angle, False), _INVALID_TRUE_WIND_MESSAGE)
+        self.tws, self.twa, self.boatspeed, self.heel_angle = tws, twa, boatspeed, heel_angle
+
+        along, across = _apparent_wind_components(tws, twa, boatspeed, 0.)
+        self.upright = ApparentWind(_apparent_wind_speed_from_components(along, across),
+                                    _apparent_wind_angle_from_components(twa, along, across))
+        across_heeled = across * np.cos(np.radians(heel_angle))
+        self.heeled = ApparentWind(_apparent_wind_speed_from_components(along, across_heeled),
+                                   _apparent_wind_angle_from_components(twa, along, across_heeled))
+        across_phi_up = across * np.cos(np.radians(phi_up(heel_angle)))
+        self.phi_up = ApparentWind(_apparent_wind_speed_from_components(along, across_phi_up),
+                                   _apparent_wind_angle_from_components(twa, along, across_phi_up))
+
+    def _init_scalar(self, tws: float, twa: float, boatspeed: float, heel_angle: float) -> None:
+        r"""Same values as apparent_wind() for each of the 3 heel angles."""
+        if tws < 0.:
+            raise ValueError("The true wind speed must be positive")
+        if twa < -180. or twa > 180.:
+            raise ValueError("The true wind angle must be between -180 and 180")
+        self.tws, self.twa, self.boatspeed, self.heel_angle = tws, twa, boatspeed, heel_angle
+
+        sign = twa / abs(twa) if twa != 0. else 0.
+        abs_twa = radians(abs(twa))
+        along = tws * cos(abs_twa) + boatspeed
+        across = tws * sin(abs_twa)
+
+        winds = []
+        for across_heeled in (across * cos(0.), across * cos(radians(heel_angle)),
+                              across * cos(radians(phi_up(heel_angle)))):
+            awa = degrees(atan(across_heeled / along)) if along != 0. else 0.
+            if awa < 0:
+                awa += 180.
+            winds.append(ApparentWind(sqrt(across_heeled ** 2 + along ** 2), awa * sign))
+        self.upright, self.heeled, self.phi_up = winds
+
+    def __repr__(self) -> str:
+        return f"WindState(upright={self.upright!r}, heeled={self.heeled!r}, phi_up={self.phi_up!r})"
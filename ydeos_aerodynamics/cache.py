@@ -0,0 +1,188 @@
+# coding: utf-8
+
+r"""Opt-in memoization of aero_force with quantized keys.
+
+The inputs of aero_force are quantized (rounded to a multiple of a quantum
+per parameter) to build the cache key and aero_force is evaluated at the
+quantized inputs, so that the cached Force does not depend on which of
+the inputs sharing a key was seen first. The raw inputs are checked
+before they are quantized: the cache raises the ValueError of aero_force
+for invalid inputs, even within half a quantum of a valid value.
+
+The cache is a bounded LRU and is safe to use from several threads.
+
+"""
+
+from collections import OrderedDict
+from threading import Lock
+from typing import Dict, Optional, Tuple
+from ydeos_aerodynamics.air import RHO_AIR_20C
+from ydeos_aerodynamics.force import Force
+from ydeos_aerodynamics.model import _check_parameters, aero_force
+
+# Names of the parameters of aero_force, in order
+_PARAMETERS = ('tws', 'twa', 'boatspeed', 'heel_angle', 'trim_angle',
+               'mainsail_type', 'mainsail_area', 'mainsail_coe',
+               'frontsail_type', 'frontsail_area', 'frontsail_coe',
+               'rig_z_max', 'flat', 'fractionality', 'overlap', 'roach', 'rho_air')
+
+# Sail types are never quantized
+_NOT_QUANTIZABLE = ('mainsail_type', 'frontsail_type')
+
+DEFAULT_QUANTA = {'tws': 1e-3,
+                  'twa': 1e-2,
+                  'boatspeed': 1e-3,
+                  'heel_angle': 1e-2,
+                  'trim_angle': 1e-2,
+                  'flat': 1e-4}
+
+
+def _quantize(value: float, quantum: float):
+    r"""Cache key part of a parameter value, exact if quantum is 0."""
+    return round(value / quantum) if quantum else value
+
+
+def _dequantize(key, quantum: float) -> float:
+    r"""Parameter value represented by a cache key part."""
+    return key * quantum if quantum else key
+
+
+class AeroForceCache:
+    r"""Memoized aero_force, called with the same parameters as aero_force.
+
+    Parameters
+    ----------
+    maxsize : Maximum number of cached forces, the least recently used
+              force is evicted beyond
+    quanta : Quantum per aero_force parameter name, the parameters not in
+             quanta are not quantized (exact keys). For the coe tuples,
+             the quantum applies to each coordinate. The default is
+             DEFAULT_QUANTA.
+
+    """
+
+    def __init__(self, maxsize: int = 65536, quanta: Optional[Dict[str, float]] = None):
+        if maxsize < 1:
+            raise ValueError("maxsize must be strictly positive")
+        quanta = DEFAULT_QUANTA if quanta is None else quanta
+        for name, quantum in quanta.items():
+            if name not in _PARAMETERS or name in _NOT_QUANTIZABLE:
+                raise ValueError(f"{name} is not a quantizable aero_force parameter")
+            if quantum < 0.:
+                raise ValueError("A quantum must be positive or zero")
+        self.maxsize = maxsize
+        self.quanta = dict(quanta)
+        self._quanta = tuple(float(quanta.get(name, 0.)) for name in _PARAMETERS if name not in _NOT_QUANTIZABLE)
+        self._forces: OrderedDict = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __call__(self,
+                 tws: float,
+                 twa: float,
+                 boatspeed: float,
+                 heel_angle: float,
+                 trim_angle: float,
+                 mainsail_type: str,
+                 mainsail_area: float,
+                 mainsail_coe: Tuple[float, float, float],
+                 frontsail_type: str,
+                 frontsail_area: float,
+                 frontsail_coe: Tuple[float, float, float],
+                 rig_z_max: float,
+                 flat: float = 1.0,
+                 fractionality: float = 0.8,
+                 overlap: float = 1.1,
+                 roach: float = 0.2,
+                 rho_air: float = RHO_AIR_20C) -> Force:
+        r"""aero_force at the quantized inputs, from the cache if possible.
+
+        Raises
+        ------
+        ValueError
+            for the inputs aero_force raises a ValueError for (checked before quantization)
+
+        """
+        if tws < 0.:
+            raise ValueError("The true wind speed must be positive")
+        if twa < -180. or twa > 180.:
+            raise ValueError("The true wind angle must be between -180 and 180")
+        _check_parameters(mainsail_area, frontsail_area, flat, fractionality, overlap, roach, rho_air)
+
+        (q_tws, q_twa, q_boatspeed, q_heel_angle, q_trim_angle, q_mainsail_area, q_mainsail_coe,
+         q_frontsail_area, q_frontsail_coe, q_rig_z_max, q_flat, q_fractionality, q_overlap, q_roach,
+         q_rho_air) = self._quanta
+        key = (_quantize(tws, q_tws),
+               _quantize(twa, q_twa),
+               _quantize(boatspeed, q_boatspeed),
+               _quantize(heel_angle, q_heel_angle),
+               _quantize(trim_angle, q_trim_angle),
+               mainsail_type,
+               _quantize(mainsail_area, q_mainsail_area),
+               tuple([_quantize(coordinate, q_mainsail_coe) for coordinate in mainsail_coe]),
+               frontsail_type,
+               _quantize(frontsail_area, q_frontsail_area),
+               tuple([_quantize(coordinate, q_frontsail_coe) for coordinate in frontsail_coe]),
+               _quantize(rig_z_max, q_rig_z_max),
+               _quantize(flat, q_flat),
+               _quantize(fractionality, q_fractionality),
+               _quantize(overlap, q_overlap),
+               _quantize(roach, q_roach),
+               _quantize(rho_air, q_rho_air))
+        with self._lock:
+            force = self._forces.get(key)
+            if force is not None:
+                self._forces.move_to_end(key)
+                self.hits += 1
+                return force
+            self.misses += 1
+
+        # computed outside of the lock, errors are raised and not cached
+        force = Force(*(float(value) for value in aero_force(*self._representative(key))))
+
+        with self._lock:
+            # another thread may have computed the same force in the meantime
+            force = self._forces.setdefault(key, force)
+            if len(self._forces) > self.maxsize:
+                self._forces.popitem(last=False)
+                self.evictions += 1
+        return force
+
+    def _representative(self, key: tuple) -> list:
+        r"""aero_force parameters represented by a cache key."""
+        quanta = iter(self._quanta)
+        values = []
+        for name, part in zip(_PARAMETERS, key):
+            if name in _NOT_QUANTIZABLE:
+                values.append(part)
+                continue
+            quantum = next(quanta)
+            if isinstance(part, tuple):
+                values.append(tuple(_dequantize(coordinate, quantum) for coordinate in part))
+            else:
+                values.append(_dequantize(part, quantum))
+        return values
+
+    def __len__(self) -> int:
+        return len(self._forces)
+
+    def clear(self) -> None:
+        r"""Remove all cached forces and reset the counters."""
+        with self._lock:
+            self._forces.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def stats(self) -> Dict[str, float]:
+        r"""Counters for monitoring: hits, misses, evictions, size and hit_rate."""
+        with self._lock:
+            calls = self.hits + self.misses
+            return {"hits": self.hits,
+                    "misses": self.misses,
+                    "evictions": self.evictions,
+                    "size": len(self._forces),
+                    "maxsize": self.maxsize,
+                    "hit_rate": self.hits / calls if calls else 0.}
@@ -0,0 +1,163 @@
+# coding: utf-8
+
+r"""Aero forces weighted by a wind climate (Monte Carlo).
+
+The true wind speeds are drawn from a Weibull distribution (see distribution.py)
+and the true wind angles from an optional discrete direction distribution.
+The samples are drawn and evaluated in fixed-size chunks, and the
+statistics are accumulated online: the memory used does not depend on
+the number of samples.
+
+Each chunk has its own seeded generator (see chunk_generators()), so that
+the chunks can be split between parallel workers. The statistics of the
+workers are then combined with RunningStatistics.merge()::
+
+    # worker w of nb_workers
+    statistics = climate_statistics(rig, ..., seed=seed, chunks=range(w, nb_chunks, nb_workers))
+    # once all the workers are done
+    for name in statistics:
+        all_statistics[name].merge(statistics[name])
+
+"""
+
+from typing import Callable, Dict, Iterable, Optional, Sequence, Union
+import numpy as np
+from ydeos_aerodynamics.distribution import chunk_generators
+from ydeos_aerodynamics.model import Rig
+from ydeos_aerodynamics.total import total_aero_force
+from ydeos_aerodynamics.windage import HullWindageModel, MastWindageModel
+
+# Value, or function of the true wind speed and angle arrays (e.g. a VPP polar)
+StateFunction = Union[float, Callable[[np.ndarray, np.ndarray], np.ndarray]]
+
+
+class RunningStatistics:
+    r"""Count, mean and variance of values accumulated chunk by chunk.
+
+    The chunks are combined with the pairwise update of Chan et al.,
+    which keeps the precision of the two-pass variance.
+
+    """
+
+    __slots__ = ('count', 'mean', 'm2')
+
+    def __init__(self, count: int = 0, mean: float = 0., m2: float = 0.):
+        self.count = count
+        self.mean = mean
+        # Sum of the squared deviations from the mean
+        self.m2 = m2
+
+    def update(self, values: np.ndarray) -> 'RunningStatistics':
+        r"""Add a chunk of values."""
+        values = np.asarray(values, dtype=float).ravel()
+        if len(values) == 0:
+            return self
+        mean = float(np.mean(values))
+        return self.merge(RunningStatistics(len(values), mean, float(np.sum((values - mean) ** 2))))
+
+    def merge(self, other: 'RunningStatistics') -> 'RunningStatistics':
+        r"""Add the values accumulated by other (e.g. by another worker)."""
+        count = self.count + other.count
+        if other.count == 0:
+            return self
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta ** 2 * self.count * other.count / count
+        self.count = count
+        return self
+
+    @property
+    def variance(self) -> float:
+        r"""Sample variance (nan for less than 2 values)."""
+        return self.m2 / (self.count - 1) if self.count > 1 else float('nan')
+
+    @property
+    def std(self) -> float:
+        r"""Sample standard deviation."""
+        return float(np.sqrt(self.variance))
+
+    @property
+    def standard_error(self) -> float:
+        r"""Standard error of the mean."""
+        return self.std / np.sqrt(self.count) if self.count > 0 else float('nan')
+
+    def __repr__(self) -> str:
+        return f"RunningStatistics(count={self.count}, mean={self.mean}, std={self.std})"
+
+
+def _evaluate(value: StateFunction, tws: np.ndarray, twa: np.ndarray) -> np.ndarray:
+    return value(tws, twa) if callable(value) else value
+
+
+def climate_statistics(rig: Rig,
+                       lambda_: float,
+                       k: float,
+                       twa: Union[float, Sequence[float]],
+                       boatspeed: StateFunction,
+                       heel_angle: StateFunction = 0.,
+                       nb_samples: int = 1000000,
+                       twa_weights: Optional[Sequence[float]] = None,
+                       trim_angle: float = 0.,
+                       flat: float = 1.,
+                       hull_windage: Optional[HullWindageModel] = None,
+                       mast_windage: Optional[MastWindageModel] = None,
+                       chunk_size: int = 65536,
+                       seed: Optional[int] = None,
+                       chunks: Optional[Iterable[int]] = None) -> Dict[str, RunningStatistics]:
+    r"""Statistics of the total aero force of a rig over a wind climate.
+
+    Parameters
+    ----------
+    rig : The sail plan
+    lambda_ : The scale of the Weibull distribution of the true wind speed [m/s]
+    k : The shape of the Weibull distribution of the true wind speed
+    twa : The true wind angle [degrees], or the true wind angles of a
+          discrete direction distribution
+    boatspeed : [m/s], or a function of the tws and twa arrays (e.g. a polar)
+    heel_angle : [degrees], or a function of the tws and twa arrays
+    nb_samples : The total number of samples (of all the chunks)
+    twa_weights : The probabilities of the true wind angles (uniform if None)
+    trim_angle, flat, hull_windage, mast_windage : see total_aero_force()
+    chunk_size : The number of samples drawn and evaluated at once
+    seed : The seed of the SeedSequence the chunk generators are spawned from.
+           It must be set for results reproducible across runs and workers.
+    chunks : The indices of the chunks to evaluate (all if None),
+             to split a study between workers
+
+    Returns a dict of the RunningStatistics of the tws, of the driving force (fx)
+    and heeling force (absolute value of fy, so that the port and starboard
+    tacks do not cancel out) [N] and of the VMG [m/s] (boatspeed * cos(twa),
+    positive upwind)
+
+    """
+    if lambda_ <= 0. or k <= 0.:
+        raise ValueError("lambda_ and k must be strictly positive")
+    twa_values = np.atleast_1d(np.asarray(twa, dtype=float))
+    if twa_values.ndim != 1 or len(twa_values) == 0:
+        raise ValueError("twa must be a float or a non empty 1-D sequence")
+    if twa_weights is not None:
+        twa_weights = np.asarray(twa_weights, dtype=float)
+        if twa_weights.shape != twa_values.shape or np.any(twa_weights < 0.) or twa_weights.sum() <= 0.:
+            raise ValueError("twa_weights must be positive, with one weight per twa")
+        twa_weights = twa_weights / twa_weights.sum()
+
+    selected = None if chunks is None else set(chunks)
+    statistics = {name: RunningStatistics() for name in ('tws', 'driving_force', 'heeling_force', 'vmg')}
+    for index, size, rng in chunk_generators(nb_samples, chunk_size, seed):
+        if selected is not None and index not in selected:
+            continue
+        # The tws are drawn first: they are the samples of weibull_sample_chunks()
+        tws_chunk = lambda_ * rng.weibull(k, size)
+        if len(twa_values) == 1:
+            twa_chunk = np.full(size, twa_values[0])
+        else:
+            twa_chunk = rng.choice(twa_values, size, p=twa_weights)
+        boatspeed_chunk = _evaluate(boatspeed, tws_chunk, twa_chunk)
+        force, _ = total_aero_force(rig, tws_chunk, twa_chunk, boatspeed_chunk,
+                                    _evaluate(heel_angle, tws_chunk, twa_chunk),
+                                    trim_angle, flat, hull_windage, mast_windage)
+        statistics['tws'].update(tws_chunk)
+        statistics['driving_force'].update(force.fx)
+        statistics['heeling_force'].update(np.abs(force.fy))
+        statistics['vmg'].update(np.broadcast_to(boatspeed_chunk, (size,)) * np.cos(np.radians(twa_chunk)))
+    return statistics
@@ -0,0 +1,265 @@
+# coding: utf-8
+
+r"""Sail crossover charts: best sail combination per (TWS, TWA).
+
+Every rig (usually every sail combination of a sail plan, see
+sweep.sail_combinations()) is evaluated on a TWS x TWA grid and the rig
+with the largest driving force is selected at each grid point,
+optionally among the rigs whose heeling moment does not exceed a limit.
+
+The rigs are evaluated together in a single aero_force_fleet() call.
+A CrossoverEngine caches the forces of each rig on a grid, so that the
+same query, or a query with another heeling moment limit, is answered
+from memory.
+
+"""
+
+from collections import OrderedDict
+from threading import Lock
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from ydeos_aerodynamics.fleet import StackedCoefficientTables, aero_force_fleet, _default_tables
+from ydeos_aerodynamics.force import ForceBatch
+from ydeos_aerodynamics.model import Rig
+from ydeos_aerodynamics.registry import SailCoefficientRegistry
+
+
+class SailCrossover:
+    r"""Driving force and heeling moment of rigs on a TWS x TWA grid.
+
+    Parameters
+    ----------
+    rigs : The rigs
+    tws : true wind speeds [m/s] of the grid
+    twa : true wind angles [degrees] of the grid
+    driving_force : (len(rigs), len(tws), len(twa)) array [N]
+    heeling_moment : (len(rigs), len(tws), len(twa)) array of the absolute values
+                     of the heeling moments [N.m]
+    max_heeling_moment : The heeling moment limit [N.m], None for no limit
+
+    """
+
+    __slots__ = ('rigs', 'tws', 'twa', 'driving_force', 'heeling_moment', 'max_heeling_moment', 'best_index')
+
+    def __init__(self,
+                 rigs: Sequence[Rig],
+                 tws: np.ndarray,
+                 twa: np.ndarray,
+                 driving_force: np.ndarray,
+                 heeling_moment: np.ndarray,
+                 max_heeling_moment: Optional[float] = None):
+        self.rigs = tuple(rigs)
+        self.tws = tws
+        self.twa = twa
+        self.driving_force = driving_force
+        self.heeling_moment = heeling_moment
+        self.max_heeling_moment = max_heeling_moment
+
+        if max_heeling_moment is None:
+            allowed = np.ones(driving_force.shape, dtype=bool)
+        else:
+            allowed = heeling_moment <= max_heeling_moment
+        candidates = np.where(allowed, driving_force, -np.inf)
+        # index of the best rig, -1 where no rig satisfies the heeling moment limit
+        self.best_index = np.where(np.any(allowed, axis=0), np.argmax(candidates, axis=0), -1)
+
+    @property
+    def best_driving_force(self) -> np.ndarray:
+        r"""(len(tws), len(twa)) driving force of the best rigs, NaN if there is none."""
+        best = np.take_along_axis(self.driving_force, np.maximum(self.best_index, 0)[None], axis=0)[0]
+        return np.where(self.best_index >= 0, best, np.nan)
+
+    def best_rigs(self) -> List[List[Optional[Rig]]]:
+        r"""Best rig for each (tws, twa), None if there is none."""
+        return [[self.rigs[index] if index >= 0 else None for index in row]
+                for row in self.best_index.tolist()]
+
+    def best_sails(self) -> List[List[Optional[Tuple[str, str]]]]:
+        r"""(mainsail_type, frontsail_type) of the best rig for each (tws, twa), None if there is none."""
+        return [[(rig.mainsail_type, rig.frontsail_type) if rig is not None else None for rig in row]
+                for row in self.best_rigs()]
+
+
+class CrossoverEngine:
+    r"""Sail crossover charts, with a bounded cache of the forces of the rigs.
+
+    The driving force and heeling moment of a rig on a grid (the tws, twa,
+    boatspeed, heel angle, flat, trim angle and moment point of a query)
+    are cached, the rigs that are not in the cache are evaluated together.
+
+    Parameters
+    ----------
+    maxsize : Maximum number of cached (rig, grid) forces, the least
+              recently used forces are evicted beyond
+    registry : The registry of the sail types of the rigs, defaults to the
+               ImsAeroModelCoefficients sail types
+
+    The engine is safe to use from several threads.
+
+    """
+
+    def __init__(self, maxsize: int = 256, registry: Optional[SailCoefficientRegistry] = None):
+        if maxsize < 1:
+            raise ValueError("maxsize must be strictly positive")
+        self.maxsize = maxsize
+        self.registry = SailCoefficientRegistry() if registry is None else registry
+        self._tables: Optional[StackedCoefficientTables] = _default_tables() if registry is None else None
+        self._forces: OrderedDict = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __call__(self,
+                 rigs: Sequence[Rig],
+                 tws: Sequence[float],
+                 twa: Sequence[float],
+                 boatspeed: np.ndarray,
+                 heel_angle: np.ndarray = 0.,
+                 flat: np.ndarray = 1.,
+                 trim_angle: float = 0.,
+                 max_heeling_moment: Optional[float] = None,
+                 moment_point: Tuple[float, float, float] = (0., 0., 0.)) -> SailCrossover:
+        r"""Best rig (sail combination) for each (TWS, TWA) of a grid, see sail_crossover()."""
+        if len(rigs) == 0:
+            raise ValueError("At least one rig is required")
+        if max_heeling_moment is not None and max_heeling_moment < 0.:
+            raise ValueError("max_heeling_moment must be positive or zero")
+
+        tws = np.asarray(tws, dtype=float).ravel()
+        twa = np.asarray(twa, dtype=float).ravel()
+        shape = (len(tws), len(twa))
+        boatspeed, heel_angle, flat = (np.broadcast_to(np.asarray(value, dtype=float), shape)
+                                       for value in (boatspeed, heel_angle, flat))
+        moment_point = tuple(float(coordinate) for coordinate in moment_point)
+        grid_key = (tuple(tws.tolist()), tuple(twa.tolist()),
+                    *(tuple(map(tuple, value.tolist())) for value in (boatspeed, heel_angle, flat)),
+                    float(trim_angle), moment_point)
+
+        rigs = [Rig(*rig) for rig in rigs]
+        forces = self._cached([(rig, grid_key) for rig in rigs])
+        missing = [rig for rig, force in zip(rigs, forces) if force is None]
+        if missing:
+            computed = dict(zip(missing, self._rig_forces(missing, tws, twa, boatspeed, heel_angle, flat,
+                                                          float(trim_angle), moment_point)))
+            self._store({(rig, grid_key): force for rig, force in computed.items()})
+            forces = [computed[rig] if force is None else force for rig, force in zip(rigs, forces)]
+        return SailCrossover(rigs,
+                             tws,
+                             twa,
+                             np.stack([driving_force for driving_force, _ in forces]),
+                             np.stack([heeling_moment for _, heeling_moment in forces]),
+                             max_heeling_moment)
+
+    def _cached(self, keys: List[tuple]) -> List[Optional[Tuple[np.ndarray, np.ndarray]]]:
+        r"""Cached forces of the keys, None for the keys that are not cached."""
+        with self._lock:
+            forces = []
+            for key in keys:
+                force = self._forces.get(key)
+                if force is None:
+                    self.misses += 1
+                else:
+                    self._forces.move_to_end(key)
+                    self.hits += 1
+                forces.append(force)
+            return forces
+
+    def _store(self, forces: Dict[tuple, Tuple[np.ndarray, np.ndarray]]) -> None:
+        with self._lock:
+            self._forces.update(forces)
+            while len(self._forces) > self.maxsize:
+                self._forces.popitem(last=False)
+                self.evictions += 1
+
+    def _rig_forces(self,
+                    rigs: List[Rig],
+                    tws: np.ndarray,
+                    twa: np.ndarray,
+                    boatspeed: np.ndarray,
+                    heel_angle: np.ndarray,
+                    flat: np.ndarray,
+                    trim_angle: float,
+                    moment_point: Tuple[float, float, float]) -> List[Tuple[np.ndarray, np.ndarray]]:
+        r"""(len(tws), len(twa)) driving force and absolute heeling moment of each rig.
+
+        All the rigs are evaluated in a single aero_force_fleet() call,
+        the returned arrays are read-only.
+
+        """
+        if self._tables is None:
+            self._tables = StackedCoefficientTables.from_registry(self.registry)
+        parameters = {name: np.array([getattr(rig, name) for rig in rigs], dtype=float)
+                      for name in Rig._fields if name not in ('mainsail_type', 'frontsail_type')}
+        # One rig per row of the first axis
+        parameters = {name: value.reshape((len(rigs), 1, 1) + value.shape[1:]) for name, value in parameters.items()}
+        sail_ids = {name: np.array([self.registry.sail_id(getattr(rig, f"{name}_type")) for rig in rigs],
+                                   dtype=np.intp).reshape(-1, 1, 1)
+                    for name in ('mainsail', 'frontsail')}
+        states = np.meshgrid(tws, twa, indexing='ij')
+        force = ForceBatch.from_force(aero_force_fleet(*states, boatspeed, heel_angle, trim_angle,
+                                                       mainsail_id=sail_ids['mainsail'],
+                                                       frontsail_id=sail_ids['frontsail'],
+                                                       flat=flat, tables=self._tables, **parameters))
+        shape = (len(rigs),) + states[0].shape
+        rig_forces = []
+        # A copy per rig, so that an evicted rig does not keep the arrays of the others alive
+        for driving_force, heeling_moment in zip(force.fx.reshape(shape),
+                                                 np.abs(force.moment(moment_point)[:, 0]).reshape(shape)):
+            driving_force, heeling_moment = driving_force.copy(), heeling_moment.copy()
+            driving_force.flags.writeable = False
+            heeling_moment.flags.writeable = False
+            rig_forces.append((driving_force, heeling_moment))
+        return rig_forces
+
+    def __len__(self) -> int:
+        return len(self._forces)
+
+    def clear(self) -> None:
+        r"""Remove all cached forces and reset the counters."""
+        with self._lock:
+            self._forces.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def stats(self) -> Dict[str, float]:
+        r"""Counters for monitoring: hits, misses, evictions, size and hit_rate."""
+        with self._lock:
+            calls = self.hits + self.misses
+            return {"hits": self.hits,
+                    "misses": self.misses,
+                    "evictions": self.evictions,
+                    "size": len(self._forces),
+                    "maxsize": self.maxsize,
+                    "hit_rate": self.hits / calls if calls else 0.}
+
+
+def sail_crossover(rigs: Sequence[Rig],
+                   tws: Sequence[float],
+                   twa: Sequence[float],
+                   boatspeed: np.ndarray,
+                   heel_angle: np.ndarray = 0.,
+                   flat: np.ndarray = 1.,
+                   trim_angle: float = 0.,
+                   max_heeling_moment: Optional[float] = None,
+                   moment_point: Tuple[float, float, float] = (0., 0., 0.),
+                   engine: Optional[CrossoverEngine] = None) -> SailCrossover:
+    r"""Best rig (sail combination) for each (TWS, TWA) of a grid.
+
+    Parameters
+    ----------
+    rigs : The candidate rigs, see sweep.sail_combinations()
+    tws : true wind speeds [m/s] of the grid
+    twa : true wind angles [degrees] of the grid
+    boatspeed : [m/s], broadcastable to (len(tws), len(twa))
+    heel_angle : [degrees], broadcastable to (len(tws), len(twa))
+    flat : broadcastable to (len(tws), len(twa))
+    trim_angle : [degrees], bow up is positive, the same for the whole grid
+    max_heeling_moment : Optional limit of the absolute heeling moment [N.m]
+    moment_point : The x, y, z coordinates of the point the heeling moment is computed about
+    engine : The CrossoverEngine whose cache is used, None for a new engine (no cache across calls)
+
+    """
+    engine = CrossoverEngine(maxsize=len(rigs) or 1) if engine is None else engine
+    return engine(rigs, tws, twa, boatspeed, heel_angle, flat, trim_angle, max_heeling_moment, moment_point)
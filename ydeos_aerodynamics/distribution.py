@@ -28,12 +28,13 @@ As high as 3 or 4 for tropical trade winds
 
 """
 
-from typing import Tuple
+from typing import Iterator, Optional, Tuple, TYPE_CHECKING
 from math import exp
 import numpy as np
 from scipy.special import gamma
-import matplotlib.pyplot as plt
-from matplotlib.pyplot import Figure, Axes
+
+if TYPE_CHECKING:  # matplotlib is only imported when plotting
+    from matplotlib.pyplot import Figure, Axes
 
 
 def weibull_pdf(x: float, lambda_: float = 1, k: float = 1.65) -> float:
@@ -50,6 +51,48 @@ def weibull_cdf(x: float, lambda_: float = 1, k: float = 1.65) -> float:
     return 1 - exp(-(x / lambda_)**k)
 
 
+def weibull_pdf_array(x: np.ndarray, lambda_: float = 1, k: float = 1.65) -> np.ndarray:
+    r"""Probability distribution function for an array of wind speeds."""
+    x = np.asarray(x, dtype=float)
+    negative = x < 0
+    scaled = np.where(negative, 0., x) / lambda_
+    with np.errstate(divide='ignore'):
+        pdf = (k / lambda_) * scaled**(k - 1) * np.exp(-scaled**k)
+    return np.where(negative, 0., pdf)
+
+
+def weibull_cdf_array(x: np.ndarray, lambda_: float = 1, k: float = 1.65) -> np.ndarray:
+    r"""Cumulative distribution function for an array of wind speeds."""
+    x = np.asarray(x, dtype=float)
+    negative = x < 0
+    cdf = 1 - np.exp(-(np.where(negative, 0., x) / lambda_)**k)
+    return np.where(negative, 0., cdf)
+
+
+def weibull_sf_array(x: np.ndarray, lambda_: float = 1, k: float = 1.65) -> np.ndarray:
+    r"""Survival function (1 - cdf) for an array of wind speeds.
+
+    Computed directly, without the loss of precision of 1 - cdf
+    in the tail of the distribution.
+
+    """
+    x = np.asarray(x, dtype=float)
+    return np.exp(-(np.where(x < 0, 0., x) / lambda_)**k)
+
+
+def weibull_ppf_array(q: np.ndarray, lambda_: float = 1, k: float = 1.65) -> np.ndarray:
+    r"""Percent point function (inverse of cdf) for an array of probabilities.
+
+    Returns NaN for probabilities outside of [0, 1]
+
+    """
+    q = np.asarray(q, dtype=float)
+    outside = (q < 0.) | (q > 1.)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ppf = lambda_ * (-np.log1p(-np.where(outside, 0., q)))**(1 / k)
+    return np.where(outside, np.nan, ppf)
+
+
 def weibull_mean(lambda_: float = 1, k: float = 1.65) -> float:
     r"""Mean value."""
     return lambda_ * gamma(1 + 1 / k)
@@ -62,18 +105,23 @@ def plot_weibull(to_x: float = 3,
                  show_pdf: bool = True,
                  show_cdf: bool = False,
                  show_random_samples: bool = True,
-                 samples_info: bool = False) -> Tuple[Figure, Axes]:
-    r"""Plot the Weibull distribution."""
+                 samples_info: bool = False) -> Tuple['Figure', 'Axes']:
+    r"""Plot the Weibull distribution.
+
+    matplotlib is imported on the first call, so that the other functions
+    of the module can be used without importing it.
+
+    """
+    import matplotlib.pyplot as plt
+
     figure, axes = plt.subplots()
     xs = np.linspace(0, to_x, samples, endpoint=True)
 
     if show_pdf:
-        ys = [weibull_pdf(x, lambda_, k) for x in xs]
-        axes.plot(xs, ys, c="BLUE")
+        axes.plot(xs, weibull_pdf_array(xs, lambda_, k), c="BLUE")
 
     if show_cdf:
-        ys = [weibull_cdf(x, lambda_, k) for x in xs]
-        axes.plot(xs, ys, c="ORANGE")
+        axes.plot(xs, weibull_cdf_array(xs, lambda_, k), c="ORANGE")
 
     if show_random_samples:
         nb_samples = int(1e5)
@@ -97,9 +145,14 @@ def plot_weibull(to_x: float = 3,
 def weibull_random_samples(nb_samples: int = 10000,
                            lambda_: float = 1,
                            k: float = 1.65,
-                           samples_info: bool = False) -> np.ndarray:
-    r"""Generate random samples."""
-    random_samples = np.random.weibull(k, nb_samples)
+                           samples_info: bool = False,
+                           rng: Optional[np.random.Generator] = None) -> np.ndarray:
+    r"""Generate random samples.
+
+    rng : Optional random generator, the global np.random state is used if None
+
+    """
+    random_samples = (np.random if rng is None else rng).weibull(k, nb_samples)
     random_samples *= lambda_  # horizontal scaling
     if samples_info:
         print("Random samples avg : %.3f "
@@ -107,3 +160,37 @@ def weibull_random_samples(nb_samples: int = 10000,
         print("Random samples max : %.3f" % np.max(random_samples))
         print("Random samples min : %.3f" % np.min(random_samples))
     return random_samples
+
+
+def chunk_generators(nb_samples: int,
+                     chunk_size: int = 65536,
+                     seed: Optional[int] = None) -> Iterator[Tuple[int, int, np.random.Generator]]:
+    r"""Index, size and random generator of the chunks of a sampling.
+
+    The nb_samples samples are split in chunks of (at most) chunk_size samples.
+    Chunk i has its own generator, seeded with the i-th child of
+    np.random.SeedSequence(seed): the samples of a chunk only depend on
+    the seed and on the chunk index, whatever the process that draws them.
+
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+    if nb_samples < 0:
+        raise ValueError("nb_samples must be positive")
+    nb_chunks = -(-nb_samples // chunk_size)
+    for i, child in enumerate(np.random.SeedSequence(seed).spawn(nb_chunks)):
+        yield i, min(chunk_size, nb_samples - i * chunk_size), np.random.default_rng(child)
+
+
+def weibull_sample_chunks(nb_samples: int,
+                          lambda_: float = 1,
+                          k: float = 1.65,
+                          chunk_size: int = 65536,
+                          seed: Optional[int] = None) -> Iterator[np.ndarray]:
+    r"""Random samples generated in chunks of (at most) chunk_size samples.
+
+    Only one chunk is in memory at a time. See chunk_generators() for the seeding.
+
+    """
+    for _, size, rng in chunk_generators(nb_samples, chunk_size, seed):
+        yield lambda_ * rng.weibull(k, size)
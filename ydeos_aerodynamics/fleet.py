@@ -0,0 +1,181 @@
+# coding: utf-8
+
+r"""Aero forces of heterogeneous rigs in a single vectorized call.
+
+The coefficient tables of all the sail types of a registry are stacked
+into padded arrays indexed by the integer sail id, so that every row of a
+batch of sailing states can have its own mainsail and frontsail,
+sail areas and centres of effort.
+
+"""
+
+from functools import lru_cache
+from typing import Optional, Sequence, Tuple
+import numpy as np
+from ydeos_aerodynamics.air import RHO_AIR_20C
+from ydeos_aerodynamics.apparent import WindState
+from ydeos_aerodynamics.force import Force
+from ydeos_aerodynamics.model import CoefficientTable, _aero_force_from_coefficients, _check_parameters_array
+from ydeos_aerodynamics.registry import SailCoefficientRegistry
+
+
+class StackedCoefficientTables:
+    r"""Coefficient tables of several sail types stacked into padded arrays.
+
+    Row i of the arrays is the CoefficientTable of the sail id i.
+    The breakpoints are padded with +inf, the polynomials with zeros.
+
+    Parameters
+    ----------
+    tables : The coefficient tables, in sail id order
+    sail_types : The names of the sail types, in sail id order
+
+    """
+
+    __slots__ = ('sail_types', 'breakpoints', 'nb_segments', 'origins', 'coefficients', 'bounds',
+                 '_span', '_keys', '_key_starts')
+
+    def __init__(self, tables: Sequence[CoefficientTable], sail_types: Sequence[str]):
+        if len(tables) != len(sail_types) or len(tables) == 0:
+            raise ValueError("There must be one sail type name per table, and at least one table")
+        self.sail_types = tuple(sail_types)
+        self.nb_segments = np.array([len(table.breakpoints) - 1 for table in tables], dtype=np.intp)
+        max_segments = int(self.nb_segments.max())
+
+        self.breakpoints = np.full((len(tables), max_segments + 1), np.inf)
+        # (sail, segment, cl/cd) and (sail, segment, cl/cd, power) for row gathers
+        self.origins = np.zeros((len(tables), max_segments, 2))
+        self.coefficients = np.zeros((len(tables), max_segments, 2, 4))
+        self.bounds = np.empty((len(tables), 2, 2))
+        for i, table in enumerate(tables):
+            nb_segments = self.nb_segments[i]
+            self.breakpoints[i, :nb_segments + 1] = table.breakpoints
+            self.origins[i, :nb_segments] = table.origins.T
+            self.coefficients[i, :nb_segments] = table.coefficients.transpose(2, 0, 1)
+            self.bounds[i] = table.bounds
+
+        # The breakpoints of all the sails in a single sorted array: the
+        # breakpoints of sail i are shifted by i * span (a power of 2)
+        # and the segment of each row is found with a single search
+        max_abs = np.max(np.abs(np.concatenate([table.breakpoints for table in tables])))
+        self._span = 2. ** np.ceil(np.log2(4. * (max_abs + 360.)))
+        self._keys = np.concatenate([table.breakpoints + i * self._span for i, table in enumerate(tables)])
+        self._key_starts = np.concatenate([[0], np.cumsum(self.nb_segments + 1)[:-1]])
+
+    @classmethod
+    def from_registry(cls, registry: Optional[SailCoefficientRegistry] = None) -> 'StackedCoefficientTables':
+        r"""Stacked tables of all the sail types of a registry (all loaded now).
+
+        The default registry holds the ImsAeroModelCoefficients sail types.
+
+        """
+        registry = SailCoefficientRegistry() if registry is None else registry
+        return cls([registry.coefficient_table(sail_id) for sail_id in range(len(registry))],
+                   registry.sail_types())
+
+    def __len__(self) -> int:
+        return len(self.sail_types)
+
+    def __call__(self, sail_id: np.ndarray, awa: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        r"""Lift and drag coefficients of the sail ids at the apparent wind angles.
+
+        sail_id and awa can be any arrays that broadcast together.
+        The values are the same as the ones of the CoefficientTable of each sail.
+
+        Raises
+        ------
+        ValueError
+            if a sail id is not in the tables
+
+        """
+        sail_id, awa = np.broadcast_arrays(np.asarray(sail_id, dtype=np.intp), np.asarray(awa, dtype=float))
+        if np.any((sail_id < 0) | (sail_id >= len(self))):
+            raise ValueError(f"The sail ids must be between 0 and {len(self) - 1}")
+        # Segment of each row in its own breakpoints. The shifted awa can
+        # round onto the next shifted breakpoint, hence the correction
+        shifted = np.clip(awa, -self._span / 4., self._span / 4.) + sail_id * self._span
+        segments = np.searchsorted(self._keys, shifted, side='right') - 1 - self._key_starts[sail_id]
+        segments = np.clip(segments, 0, self.nb_segments[sail_id] - 1)
+        segments -= (segments > 0) & (awa < self.breakpoints[sail_id, segments])
+        rows = sail_id * self.origins.shape[1] + segments
+
+        # Same evaluation order as CoefficientTable for identical values
+        awa = awa[..., None]
+        dx = awa - np.take(self.origins.reshape(-1, 2), rows, axis=0)
+        coefficients = np.take(self.coefficients.reshape(-1, 2, 4), rows, axis=0)
+        values = coefficients[..., 3] + coefficients[..., 2] * dx
+        dx_power = dx * dx
+        values = values + coefficients[..., 1] * dx_power
+        dx_power = dx_power * dx
+        values = values + coefficients[..., 0] * dx_power
+        bounds = np.take(self.bounds, sail_id, axis=0)
+        values = np.where((awa >= bounds[..., 0]) & (awa <= bounds[..., 1]), values, 0.)
+        return values[..., 0], values[..., 1]
+
+
+def aero_force_fleet(tws: np.ndarray,
+                     twa: np.ndarray,
+                     boatspeed: np.ndarray,
+                     heel_angle: np.ndarray,
+                     trim_angle: np.ndarray,
+                     mainsail_id: np.ndarray,
+                     mainsail_area: np.ndarray,
+                     mainsail_coe: np.ndarray,
+                     frontsail_id: np.ndarray,
+                     frontsail_area: np.ndarray,
+                     frontsail_coe: np.ndarray,
+                     rig_z_max: np.ndarray,
+                     flat: np.ndarray = 1.0,
+                     fractionality: np.ndarray = 0.8,
+                     overlap: np.ndarray = 1.1,
+                     roach: np.ndarray = 0.2,
+                     rho_air: float = RHO_AIR_20C,
+                     tables: Optional[StackedCoefficientTables] = None) -> Force:
+    r"""Aero force of rows that each have their own rig.
+
+    The parameters are the ones of aero_force_array(), with integer sail
+    ids (see SailCoefficientRegistry) instead of sail type names.
+    All of them can be arrays that broadcast together, the centres of
+    effort being arrays of shape (..., 3).
+
+    tables : The stacked coefficient tables the sail ids refer to,
+             defaults to the ImsAeroModelCoefficients sail types
+
+    Returns a Force whose fields are arrays of the broadcast shape,
+    with the same values as aero_force_array() called with the rig of each row.
+
+    """
+    tables = _default_tables() if tables is None else tables
+    mainsail_coe = np.asarray(mainsail_coe, dtype=float)
+    frontsail_coe = np.asarray(frontsail_coe, dtype=float)
+    (tws, twa, boatspeed, heel_angle, trim_angle, flat, mainsail_id, frontsail_id,
+     mainsail_area, frontsail_area, x_coe_main, z_coe_main, x_coe_front, z_coe_front,
+     rig_z_max, fractionality, overlap, roach) = \
+        np.broadcast_arrays(*[np.asarray(value, dtype=float)
+                              for value in (tws, twa, boatspeed, heel_angle, trim_angle, flat)],
+                            np.asarray(mainsail_id), np.asarray(frontsail_id),
+                            *[np.asarray(value, dtype=float)
+                              for value in (mainsail_area, frontsail_area,
+                                            mainsail_coe[..., 0], mainsail_coe[..., 2],
+                                            frontsail_coe[..., 0], frontsail_coe[..., 2],
+                                            rig_z_max, fractionality, overlap, roach)])
+
+    _check_parameters_array(mainsail_area, frontsail_area, flat, fractionality, overlap, roach, rho_air)
+
+    wind_state = WindState(tws, twa, boatspeed, heel_angle)
+    awa_phi_up = np.abs(wind_state.phi_up.angle)
+
+    mainsail_cl, mainsail_cd = tables(mainsail_id, awa_phi_up)
+    frontsail_cl, frontsail_cd = tables(frontsail_id, awa_phi_up)
+
+    return _aero_force_from_coefficients(np.sign(twa), np.abs(wind_state.heeled.angle), wind_state.heeled.speed,
+                                         heel_angle, trim_angle, flat,
+                                         mainsail_cl, mainsail_cd, mainsail_area, x_coe_main, z_coe_main,
+                                         frontsail_cl, frontsail_cd, frontsail_area, x_coe_front, z_coe_front,
+                                         rig_z_max, fractionality, overlap, roach, rho_air)
+
+
+@lru_cache(maxsize=1)
+def _default_tables() -> StackedCoefficientTables:
+    r"""Stacked tables of the ImsAeroModelCoefficients sail types, built on first use."""
+    return StackedCoefficientTables.from_registry()
@@ -3,5 +3,201 @@
 r"""Shared force model."""
 
 import collections
+from math import sqrt
+from typing import List, Sequence, Tuple, Union
+import numpy as np
 
 Force = collections.namedtuple('Force', 'fx fy fz px py pz')
+
+
+class ForceBatch:
+    r"""Batch of forces backed by a single contiguous (N, 6) float64 array.
+
+    The columns are the fields of Force (fx, fy, fz, px, py, pz)
+    and the field properties are views on the columns (no copy).
+
+    Parameters
+    ----------
+    data : A (N, 6) array
+
+    """
+
+    __slots__ = ('data',)
+
+    def __init__(self, data: np.ndarray):
+        data = np.ascontiguousarray(data, dtype=np.float64)
+        if data.ndim != 2 or data.shape[1] != len(Force._fields):
+            raise ValueError("The data of a ForceBatch must be a (N, 6) array")
+        self.data = data
+
+    @classmethod
+    def zeros(cls, size: int) -> 'ForceBatch':
+        r"""Batch of size null forces applied at the origin."""
+        return cls(np.zeros((size, len(Force._fields))))
+
+    @classmethod
+    def from_forces(cls, forces: Sequence[Force]) -> 'ForceBatch':
+        r"""Batch from a sequence of (scalar) Force objects."""
+        return cls(np.array(forces, dtype=np.float64).reshape(-1, len(Force._fields)))
+
+    @classmethod
+    def from_force(cls, force: Force) -> 'ForceBatch':
+        r"""Batch from a Force whose fields are arrays (struct of arrays).
+
+        The fields are broadcast together and flattened.
+
+        """
+        data = np.empty((np.broadcast(*force).size, len(Force._fields)))
+        for i, field in enumerate(np.broadcast_arrays(*force)):
+            data[:, i] = field.ravel()
+        return cls(data)
+
+    def to_forces(self) -> List[Force]:
+        r"""List of (scalar) Force objects."""
+        return [Force(*row) for row in self.data.tolist()]
+
+    def to_force(self) -> Force:
+        r"""Force whose fields are views on the columns (struct of arrays)."""
+        return Force(*self.data.T)
+
+    @property
+    def fx(self) -> np.ndarray:
+        return self.data[:, 0]
+
+    @property
+    def fy(self) -> np.ndarray:
+        return self.data[:, 1]
+
+    @property
+    def fz(self) -> np.ndarray:
+        return self.data[:, 2]
+
+    @property
+    def px(self) -> np.ndarray:
+        return self.data[:, 3]
+
+    @property
+    def py(self) -> np.ndarray:
+        return self.data[:, 4]
+
+    @property
+    def pz(self) -> np.ndarray:
+        return self.data[:, 5]
+
+    @property
+    def forces(self) -> np.ndarray:
+        r"""(N, 3) view on the force vectors."""
+        return self.data[:, :3]
+
+    @property
+    def points(self) -> np.ndarray:
+        r"""(N, 3) view on the points of application."""
+        return self.data[:, 3:]
+
+    def __len__(self) -> int:
+        return self.data.shape[0]
+
+    def __getitem__(self, item: Union[int, slice, np.ndarray]) -> Union[Force, 'ForceBatch']:
+        if isinstance(item, (int, np.integer)):
+            return Force(*self.data[item].tolist())
+        return ForceBatch(self.data[item])
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, ForceBatch):
+            return NotImplemented
+        return np.array_equal(self.data, other.data)
+
+    def __repr__(self) -> str:
+        return f"ForceBatch({len(self)} forces)"
+
+    def __add__(self, other: 'ForceBatch') -> 'ForceBatch':
+        r"""Element wise sum of 2 batches of forces (see resultant())."""
+        if not isinstance(other, ForceBatch):
+            return NotImplemented
+        return ForceBatch(_resultant(np.stack([self.data, other.data])))
+
+    @classmethod
+    def resultant(cls, batches: Sequence['ForceBatch']) -> 'ForceBatch':
+        r"""Element wise sum of batches of forces of the same length.
+
+        The force vectors are summed. The point of application of the sum
+        is the point of its central axis closest to the average of the
+        points of application weighted by the magnitudes of the forces.
+        The moment of the sum about any point is then the exact moment of
+        the forces, less its component along the summed force (a couple
+        that no point of application can carry, 0 for coplanar or parallel
+        forces). Null sums are applied at the weighted average point.
+
+        Summing all the batches at once is exact where pairwise sums may not be.
+        Use moment() on each batch for the exact moment of a system of forces.
+
+        """
+        return cls(_resultant(np.stack([batch.data for batch in batches])))
+
+    def moment(self, point: Tuple[float, float, float] = (0., 0., 0.)) -> np.ndarray:
+        r"""Moments of the forces about a point.
+
+        Parameters
+        ----------
+        point : The x, y, z coordinates of the point
+
+        Returns a (N, 3) array of the moments (mx, my, mz)
+
+        """
+        return np.cross(self.points - np.asarray(point, dtype=np.float64), self.forces)
+
+
+def resultant_force(forces: Sequence[Force]) -> Force:
+    r"""Sum of (scalar) Force objects, scalar version of ForceBatch.resultant()."""
+    total_x = sum(force.fx for force in forces)
+    total_y = sum(force.fy for force in forces)
+    total_z = sum(force.fz for force in forces)
+
+    weights = [sqrt(force.fx ** 2 + force.fy ** 2 + force.fz ** 2) for force in forces]
+    weight_total = sum(weights)
+    if weight_total > 0.:
+        reference = [sum(weight * point for weight, point in zip(weights, points)) / weight_total
+                     for points in zip(*(force[3:] for force in forces))]
+    else:
+        reference = [sum(points) / len(forces) for points in zip(*(force[3:] for force in forces))]
+
+    mx = my = mz = 0.
+    for force in forces:
+        dx, dy, dz = force.px - reference[0], force.py - reference[1], force.pz - reference[2]
+        mx += dy * force.fz - dz * force.fy
+        my += dz * force.fx - dx * force.fz
+        mz += dx * force.fy - dy * force.fx
+
+    norm_squared = total_x ** 2 + total_y ** 2 + total_z ** 2
+    scale = 1. / norm_squared if norm_squared > 0. else 0.
+    return Force(total_x, total_y, total_z,
+                 reference[0] + (total_y * mz - total_z * my) * scale,
+                 reference[1] + (total_z * mx - total_x * mz) * scale,
+                 reference[2] + (total_x * my - total_y * mx) * scale)
+
+
+def _resultant(data: np.ndarray) -> np.ndarray:
+    r"""Sum of a (k, N, 6) stack of k batches of forces, see ForceBatch.resultant().
+    """
+    fx, fy, fz, px, py, pz = np.moveaxis(data, -1, 0)
+    total_x, total_y, total_z = fx.sum(axis=0), fy.sum(axis=0), fz.sum(axis=0)
+
+    weights = np.sqrt(fx * fx + fy * fy + fz * fz)
+    weight_total = weights.sum(axis=0)
+    weighted = weight_total > 0.
+    weight_total = np.where(weighted, weight_total, 1.)
+    reference_x, reference_y, reference_z = \
+        (np.where(weighted, (weights * p).sum(axis=0) / weight_total, p.mean(axis=0)) for p in (px, py, pz))
+
+    dx, dy, dz = px - reference_x, py - reference_y, pz - reference_z
+    mx = (dy * fz - dz * fy).sum(axis=0)
+    my = (dz * fx - dx * fz).sum(axis=0)
+    mz = (dx * fy - dy * fx).sum(axis=0)
+
+    # Closest point of the central axis: (p - reference) x total = moment, less its component along total
+    norm_squared = total_x * total_x + total_y * total_y + total_z * total_z
+    scale = np.where(norm_squared > 0., 1. / np.where(norm_squared > 0., norm_squared, 1.), 0.)
+    return np.stack([total_x, total_y, total_z,
+                     reference_x + (total_y * mz - total_z * my) * scale,
+                     reference_y + (total_z * mx - total_x * mz) * scale,
+                     reference_z + (total_x * my - total_y * mx) * scale], axis=-1)
@@ -0,0 +1,240 @@
+# coding: utf-8
+
+r"""Streaming true wind reconstruction from instrument log files.
+
+The delimited text logs (CSV) of apparent wind speed, apparent wind angle,
+boat speed and heel angle are read by chunks of a fixed number of rows,
+the true wind of each chunk is computed with true_wind_array() and the
+results are appended to one .npy file per column. The memory use depends
+on the chunk size, not on the size of the log.
+
+Malformed rows (missing or non numeric fields) and rows outside of the
+range of validity of the true wind computation (e.g. heel angle beyond
+89 degrees) do not abort the processing: their values are NaN in the
+output. Blank lines are skipped (as by np.loadtxt and pandas.read_csv),
+so output row i is the i-th non-blank data line of the log.
+
+"""
+
+import os
+from itertools import islice
+from time import perf_counter
+from typing import Dict, IO, Iterator, List, Sequence, Tuple, Union
+import numpy as np
+from ydeos_aerodynamics.true import true_wind_array
+
+# Names of the output columns, in order
+OUTPUT_COLUMNS = ('apparent_wind_speed', 'apparent_wind_angle', 'boatspeed', 'heel_angle',
+                  'true_wind_speed', 'true_wind_angle')
+
+# Size [bytes] reserved for the header of the .npy output files,
+# so that it can be rewritten with the final number of rows
+_NPY_HEADER_SIZE = 128
+
+
+class LogChunk:
+    r"""Rows of a log chunk, the values of the malformed rows are NaN.
+
+    Parameters
+    ----------
+    apparent_wind_speed : [m/s]
+    apparent_wind_angle : [degrees]
+    boatspeed : [m/s]
+    heel_angle : [degrees]
+    malformed : Mask of the malformed rows
+
+    """
+
+    __slots__ = ('apparent_wind_speed', 'apparent_wind_angle', 'boatspeed', 'heel_angle', 'malformed')
+
+    def __init__(self,
+                 apparent_wind_speed: np.ndarray,
+                 apparent_wind_angle: np.ndarray,
+                 boatspeed: np.ndarray,
+                 heel_angle: np.ndarray,
+                 malformed: np.ndarray):
+        self.apparent_wind_speed = apparent_wind_speed
+        self.apparent_wind_angle = apparent_wind_angle
+        self.boatspeed = boatspeed
+        self.heel_angle = heel_angle
+        self.malformed = malformed
+
+    def __len__(self) -> int:
+        return len(self.malformed)
+
+
+# Below this number of lines, a chunk with malformed rows is parsed line by line
+_MIN_BISECTION_SIZE = 64
+
+
+def _parse_values(lines: List[str], usecols: Sequence[int], delimiter: str) -> Tuple[np.ndarray, np.ndarray]:
+    r"""Values of the lines and mask of the malformed lines, whose values are NaN.
+
+    The lines are parsed at once with np.loadtxt. If some are malformed,
+    the lines are split in halves that are parsed separately, so that
+    only the few lines around the malformed ones end up parsed one by one.
+
+    """
+    try:
+        values = np.loadtxt(lines, delimiter=delimiter, usecols=usecols, comments=None, ndmin=2)
+        return values.reshape(len(lines), len(usecols)), np.zeros(len(lines), dtype=bool)
+    except (ValueError, IndexError):
+        pass
+    if len(lines) > _MIN_BISECTION_SIZE:
+        middle = len(lines) // 2
+        halves = (_parse_values(lines[:middle], usecols, delimiter),
+                  _parse_values(lines[middle:], usecols, delimiter))
+        return tuple(np.concatenate(parts) for parts in zip(*halves))
+    values = np.full((len(lines), len(usecols)), np.nan)
+    malformed = np.zeros(len(lines), dtype=bool)
+    for i, line in enumerate(lines):
+        fields = line.split(delimiter)
+        try:
+            values[i] = [float(fields[column]) for column in usecols]
+        except (ValueError, IndexError):
+            values[i] = np.nan
+            malformed[i] = True
+    return values, malformed
+
+
+def _parse_lines(lines: List[str], usecols: Sequence[int], delimiter: str) -> LogChunk:
+    r"""Parse the lines of a chunk, blank lines are ignored."""
+    lines = [line for line in lines if line.strip()]
+    if not lines:
+        return LogChunk(*np.empty((4, 0)), np.zeros(0, dtype=bool))
+    values, malformed = _parse_values(lines, usecols, delimiter)
+    return LogChunk(*values.T, malformed)
+
+
+def _open_text(source: Union[str, os.PathLike, IO[str]]) -> IO[str]:
+    if isinstance(source, (str, os.PathLike)):
+        return open(source, 'r', encoding='utf-8', errors='replace')
+    return source
+
+
+def read_log_chunks(source: Union[str, os.PathLike, IO[str]],
+                    chunk_size: int = 65536,
+                    columns: Sequence[Union[int, str]] = (0, 1, 2, 3),
+                    header: bool = True,
+                    delimiter: str = ',') -> Iterator[LogChunk]:
+    r"""Generator of the chunks of a delimited text log.
+
+    Parameters
+    ----------
+    source : Path of the log or text file object
+    chunk_size : Number of rows per chunk
+    columns : Columns of the apparent wind speed [m/s], apparent wind angle [degrees],
+              boat speed [m/s] and heel angle [degrees], as indices
+              or as names of the header
+    header : Is the first line a header
+    delimiter : The field delimiter
+
+    Blank lines are skipped: the rows of the chunks are the non-blank
+    data lines of the log, in order. A chunk can have less than
+    chunk_size rows (even none) if it contains blank lines.
+
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be strictly positive")
+    if len(columns) != 4:
+        raise ValueError("4 columns are required (aws, awa, boatspeed, heel)")
+
+    file = _open_text(source)
+    try:
+        usecols = list(columns)
+        if header:
+            names = [name.strip() for name in file.readline().rstrip('\r\n').split(delimiter)]
+            try:
+                usecols = [names.index(column) if isinstance(column, str) else column for column in columns]
+            except ValueError:
+                raise ValueError(f"Columns {columns} not all found in the header {names}")
+        elif any(isinstance(column, str) for column in columns):
+            raise ValueError("Columns can only be given by name if the log has a header")
+
+        while True:
+            lines = list(islice(file, chunk_size))
+            if not lines:
+                return
+            yield _parse_lines(lines, usecols, delimiter)
+    finally:
+        if file is not source:
+            file.close()
+
+
+class _NpyColumnWriter:
+    r"""1-D float64 .npy file written by appending chunks.
+
+    The header is written with the final number of rows on close().
+
+    """
+
+    def __init__(self, path: Union[str, os.PathLike]):
+        self._file = open(path, 'wb')
+        self._file.write(self._header(0))
+        self.size = 0
+
+    @staticmethod
+    def _header(size: int) -> bytes:
+        header = repr({'descr': '<f8', 'fortran_order': False, 'shape': (size,)}).encode('latin1')
+        preamble = np.lib.format.magic(1, 0) + (_NPY_HEADER_SIZE - 10).to_bytes(2, 'little')
+        return preamble + header.ljust(_NPY_HEADER_SIZE - len(preamble) - 1) + b'\n'
+
+    def write(self, values: np.ndarray) -> None:
+        self._file.write(np.ascontiguousarray(values, dtype='<f8').tobytes())
+        self.size += len(values)
+
+    def close(self) -> None:
+        self._file.seek(0)
+        self._file.write(self._header(self.size))
+        self._file.close()
+
+
+def true_wind_from_log(source: Union[str, os.PathLike, IO[str]],
+                       destination: Union[str, os.PathLike],
+                       chunk_size: int = 65536,
+                       columns: Sequence[Union[int, str]] = (0, 1, 2, 3),
+                       header: bool = True,
+                       delimiter: str = ',') -> Dict[str, float]:
+    r"""True wind of a log, written as one .npy file per column.
+
+    Parameters
+    ----------
+    source : Path of the log or text file object, see read_log_chunks()
+    destination : Directory of the output, created if needed. It contains
+                  one <column>.npy file per name of OUTPUT_COLUMNS,
+                  that can be memory mapped with np.load(path, mmap_mode='r')
+    chunk_size, columns, header, delimiter : see read_log_chunks()
+
+    Returns a dict with the number of "rows", of "malformed_rows", of
+    "invalid_rows" (well formed but outside of the range of validity
+    of the true wind computation), the "elapsed" time [s]
+    and the throughput in "rows_per_second"
+
+    """
+    start = perf_counter()
+    os.makedirs(destination, exist_ok=True)
+    writers = {name: _NpyColumnWriter(os.path.join(destination, f"{name}.npy")) for name in OUTPUT_COLUMNS}
+    nb_rows = nb_malformed = nb_invalid = 0
+    try:
+        for chunk in read_log_chunks(source, chunk_size, columns, header, delimiter):
+            true = true_wind_array(chunk.apparent_wind_speed,
+                                   chunk.apparent_wind_angle,
+                                   chunk.boatspeed,
+                                   chunk.heel_angle,
+                                   errors='nan')
+            for name, values in zip(OUTPUT_COLUMNS,
+                                    (chunk.apparent_wind_speed, chunk.apparent_wind_angle,
+                                     chunk.boatspeed, chunk.heel_angle, true.speed, true.angle)):
+                writers[name].write(values)
+            nb_rows += len(chunk)
+            nb_malformed += int(np.count_nonzero(chunk.malformed))
+            nb_invalid += int(np.count_nonzero(np.isnan(true.speed) & ~chunk.malformed))
+    finally:
+        for writer in writers.values():
+            writer.close()
+    elapsed = perf_counter() - start
+    return {"rows": nb_rows,
+            "malformed_rows": nb_malformed,
+            "invalid_rows": nb_invalid,
+            "elapsed": elapsed,
+            "rows_per_second": nb_rows / elapsed if elapsed > 0. else float('inf')}
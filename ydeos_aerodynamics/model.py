@@ -10,13 +10,18 @@ Todo:
 
 """
 
-from typing import Tuple, List
+from typing import Dict, Tuple, List, NamedTuple, Optional, TYPE_CHECKING
 import warnings
+from bisect import bisect_right
 from math import sqrt, cos, sin, radians, pi
+import numpy as np
 from scipy import interpolate
 from ydeos_aerodynamics.air import RHO_AIR_20C
 from ydeos_aerodynamics.force import Force
-from ydeos_aerodynamics.apparent import apparent_wind_angle, apparent_wind_speed
+from ydeos_aerodynamics.apparent import apparent_wind_jacobian_array, phi_up, WindState
+
+if TYPE_CHECKING:
+    from ydeos_aerodynamics.registry import SailCoefficientRegistry
 
 
 # Sail forces coefficients
@@ -45,11 +50,149 @@ class _Interpolant:
         # self._interpolant = interpolate.InterpolatedUnivariateSpline(x, y, k=1)
 
     def __call__(self, val: float) -> float:
+        if np.ndim(val) != 0:
+            val = np.asarray(val, dtype=float)
+            return np.where((val >= self._x[0]) & (val <= self._x[-1]),
+                            self._interpolant(val),
+                            0.)
         if self._x[-1] >= val >= self._x[0]:
             return self._interpolant(val)
         return 0
 
 
+class CoefficientTable:
+    """Precompiled lift and drag coefficients lookup table of a sail type.
+
+    The PCHIP segment polynomials of the lift and drag interpolants are
+    merged on the union of their breakpoints, so that cl and cd are
+    evaluated together after a single search of the segment. Each merged
+    segment keeps the origin of the polynomial it comes from, so that
+    the values are identical to the ones of the interpolants.
+    The coefficients are 0 outside of the range of definition of each curve.
+
+    Parameters
+    ----------
+    breakpoints : A 1-D array of m + 1 monotonically increasing merged breakpoints
+    origins : A (2, m) array, origin of the cl and cd polynomials of each segment
+    coefficients : A (2, 4, m) array, cl and cd polynomial coefficients
+                   of each segment, highest power first
+    bounds : A (2, 2) array, range of definition of cl and of cd
+
+    """
+
+    def __init__(self,
+                 breakpoints: np.ndarray,
+                 origins: np.ndarray,
+                 coefficients: np.ndarray,
+                 bounds: np.ndarray):
+        self.breakpoints = np.asarray(breakpoints, dtype=float)
+        self.origins = np.asarray(origins, dtype=float)
+        self.coefficients = np.asarray(coefficients, dtype=float)
+        self.bounds = np.asarray(bounds, dtype=float)
+        nb_segments = len(self.breakpoints) - 1
+        if self.origins.shape != (2, nb_segments) \
+                or self.coefficients.shape != (2, 4, nb_segments) \
+                or self.bounds.shape != (2, 2):
+            raise ValueError("Inconsistent coefficient table shapes")
+
+        # Python copies for the scalar path
+        self._breakpoints = self.breakpoints.tolist()
+        self._last_segment = nb_segments - 1
+        self._segments = [(tuple(self.origins[:, i].tolist()),
+                           tuple(self.coefficients[0, ::-1, i].tolist()),
+                           tuple(self.coefficients[1, ::-1, i].tolist()))
+                          for i in range(nb_segments)]
+        self._bounds = self.bounds.tolist()
+
+    @classmethod
+    def from_interpolants(cls,
+                          c_lift: _Interpolant,
+                          c_drag: _Interpolant) -> 'CoefficientTable':
+        """Build the table from the lift and drag interpolable objects."""
+        polynomials = (c_lift._interpolant, c_drag._interpolant)
+        breakpoints = np.union1d(polynomials[0].x, polynomials[1].x)
+        origins = np.empty((2, len(breakpoints) - 1))
+        coefficients = np.empty((2, 4, len(breakpoints) - 1))
+        for i, polynomial in enumerate(polynomials):
+            # Segment of the curve that contains each merged segment.
+            # Merged segments outside of the curve range use the closest
+            # curve segment and are masked at evaluation time
+            segments = np.clip(np.searchsorted(polynomial.x, breakpoints[:-1], side='right') - 1,
+                               0, len(polynomial.x) - 2)
+            origins[i] = polynomial.x[segments]
+            coefficients[i] = polynomial.c[:, segments]
+        bounds = np.array([[polynomial.x[0], polynomial.x[-1]] for polynomial in polynomials])
+        return cls(breakpoints, origins, coefficients, bounds)
+
+    def __call__(self, awa: float) -> Tuple[float, float]:
+        """Lift and drag coefficients at the apparent wind angle(s) awa.
+
+        Returns plain floats for a scalar awa and arrays for an array of awas
+
+        """
+        if isinstance(awa, (int, float)):
+            return self._scalar(awa)
+        if np.ndim(awa) == 0:
+            return self._scalar(float(awa))
+        awa = np.asarray(awa, dtype=float)
+        segments = np.clip(np.searchsorted(self.breakpoints, awa, side='right') - 1,
+                           0, self._last_segment)
+        # Same evaluation order as scipy's PPoly for identical values
+        dx = awa - self.origins[:, segments]
+        coefficients = self.coefficients[:, :, segments]
+        values = coefficients[:, 3] + coefficients[:, 2] * dx
+        dx_power = dx * dx
+        values = values + coefficients[:, 1] * dx_power
+        dx_power = dx_power * dx
+        values = values + coefficients[:, 0] * dx_power
+        bounds = self.bounds.reshape((2, 2) + (1,) * awa.ndim)
+        in_range = (awa >= bounds[:, 0]) & (awa <= bounds[:, 1])
+        values = np.where(in_range, values, 0.)
+        return values[0], values[1]
+
+    def derivative(self, awa: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Derivatives of the lift and drag coefficients [1/degree] at the apparent wind angle(s) awa.
+
+        The derivatives are 0 outside of the range of definition of each curve.
+        Returns floats for a scalar awa and arrays for an array of awas
+
+        """
+        scalar = np.ndim(awa) == 0
+        awa = np.asarray(awa, dtype=float)
+        segments = np.clip(np.searchsorted(self.breakpoints, awa, side='right') - 1,
+                           0, self._last_segment)
+        dx = awa - self.origins[:, segments]
+        coefficients = self.coefficients[:, :, segments]
+        values = coefficients[:, 2] + dx * (2. * coefficients[:, 1] + dx * 3. * coefficients[:, 0])
+        bounds = self.bounds.reshape((2, 2) + (1,) * awa.ndim)
+        in_range = (awa >= bounds[:, 0]) & (awa <= bounds[:, 1])
+        values = np.where(in_range, values, 0.)
+        if scalar:
+            return float(values[0]), float(values[1])
+        return values[0], values[1]
+
+    def _scalar(self, awa: float) -> Tuple[float, float]:
+        """Pure Python evaluation for a single apparent wind angle."""
+        segment = min(max(bisect_right(self._breakpoints, awa) - 1, 0), self._last_segment)
+        origins, cl_polynomial, cd_polynomial = self._segments[segment]
+        values = []
+        for origin, polynomial, (lower, upper) in zip(origins,
+                                                      (cl_polynomial, cd_polynomial),
+                                                      self._bounds):
+            if not lower <= awa <= upper:
+                values.append(0.)
+                continue
+            c_0, c_1, c_2, c_3 = polynomial
+            dx = awa - origin
+            dx_power = dx
+            value = c_0 + c_1 * dx_power
+            dx_power *= dx
+            value = value + c_2 * dx_power
+            dx_power *= dx
+            values.append(value + c_3 * dx_power)
+        return values[0], values[1]
+
+
 class ImsAeroModelCoefficients:
     """Build aerodynamic model coefficient interpolable objects."""
 
@@ -136,8 +279,7 @@ class ImsAeroModelCoefficients:
         for a given sail type and apparent wind angle
 
         """
-        c_lift, c_drag = ImsAeroModelCoefficients.coefficient_interp(sail_type)
-        return c_lift(awa), c_drag(awa)
+        return ImsAeroModelCoefficients.coefficient_table(sail_type)(awa)
 
     @staticmethod
     def coefficient_interp(sail_type: str) -> Tuple[_Interpolant, _Interpolant]:
@@ -148,11 +290,88 @@ class ImsAeroModelCoefficients:
 
         """
         try:
-            return (getattr(ImsAeroModelCoefficients, sail_type + '_cl'),
-                    getattr(ImsAeroModelCoefficients, sail_type + '_cd'))
-        except AttributeError:
+            return ImsAeroModelCoefficients._interpolants()[sail_type]
+        except KeyError:
             raise ValueError('Unknown sail type')
 
+    @staticmethod
+    def _interpolants() -> Dict[str, Tuple[_Interpolant, _Interpolant]]:
+        """Lift and drag interpolators of the sail types, by name.
+
+        The dict is built from the class attributes on first use
+
+        """
+        if not _INTERPOLANTS:
+            attributes = vars(ImsAeroModelCoefficients)
+            _INTERPOLANTS.update({name[:-len('_cl')]: (value, attributes[name[:-len('_cl')] + '_cd'])
+                                  for name, value in attributes.items()
+                                  if name.endswith('_cl') and isinstance(value, _Interpolant)})
+        return _INTERPOLANTS
+
+    @staticmethod
+    def sail_types() -> List[str]:
+        """Names of the sail types that have lift and drag coefficients."""
+        return list(ImsAeroModelCoefficients._interpolants())
+
+    @staticmethod
+    def mainsail_types() -> List[str]:
+        """Names of the mainsail types."""
+        return [sail_type for sail_type in ImsAeroModelCoefficients.sail_types()
+                if sail_type.startswith('main')]
+
+    @staticmethod
+    def frontsail_types() -> List[str]:
+        """Names of the frontsail (headsail and downwind sail) types."""
+        return [sail_type for sail_type in ImsAeroModelCoefficients.sail_types()
+                if not sail_type.startswith('main')]
+
+    @staticmethod
+    def coefficient_table(sail_type: str) -> CoefficientTable:
+        """Precompiled lift and drag coefficients table.
+
+        The table is built on first use and kept for the next calls
+
+        """
+        try:
+            return _COEFFICIENT_TABLES[sail_type]
+        except KeyError:
+            table = CoefficientTable.from_interpolants(
+                *ImsAeroModelCoefficients.coefficient_interp(sail_type))
+            _COEFFICIENT_TABLES[sail_type] = table
+            return table
+
+    @staticmethod
+    def coefficient_tables() -> Dict[str, CoefficientTable]:
+        """Precompiled lift and drag coefficients tables of all sail types."""
+        return {sail_type: ImsAeroModelCoefficients.coefficient_table(sail_type)
+                for sail_type in ImsAeroModelCoefficients.sail_types()}
+
+
+_INTERPOLANTS: Dict[str, Tuple[_Interpolant, _Interpolant]] = {}
+_COEFFICIENT_TABLES: Dict[str, CoefficientTable] = {}
+
+
+class Rig(NamedTuple):
+    r"""Sail plan, i.e. the parameters of aero_force() that are not the sailing state.
+
+    The field names are the aero_force() parameter names, so that a rig
+    can be passed as aero_force(..., **rig._asdict()).
+    A Rig is hashable and can be used as a cache key.
+
+    """
+
+    mainsail_type: str
+    mainsail_area: float
+    mainsail_coe: Tuple[float, float, float]
+    frontsail_type: str
+    frontsail_area: float
+    frontsail_coe: Tuple[float, float, float]
+    rig_z_max: float
+    fractionality: float = 0.8
+    overlap: float = 1.1
+    roach: float = 0.2
+    rho_air: float = RHO_AIR_20C
+
 
 def aero_force(tws: float,
                twa: float,
@@ -170,7 +389,9 @@ def aero_force(tws: float,
                fractionality: float = 0.8,
                overlap: float = 1.1,
                roach: float = 0.2,
-               rho_air: float = RHO_AIR_20C) -> Force:
+               rho_air: float = RHO_AIR_20C,
+               wind_state: Optional[WindState] = None,
+               registry: Optional['SailCoefficientRegistry'] = None) -> Force:
     r"""Aero force inspired by ORC 2013 model.
 
     tws : true wind speed [m/s], positive
@@ -198,23 +419,17 @@ def aero_force(tws: float,
     overlap : LPGcurrent/J, Realistic values are between 0.7 and 2.0
     roach : Mainsail Area /(P x E / 2) -1
     rho_air : air density [kg/m**3], must be >= 0
+    wind_state : Optional WindState of (tws, twa, boatspeed, heel_angle),
+                 to share the apparent wind computations with other
+                 force models (e.g. windage). It must have been built
+                 from the same sailing state.
+    registry : Optional SailCoefficientRegistry (see registry.py) resolving
+               mainsail_type and frontsail_type (names or integer ids),
+               ImsAeroModelCoefficients is used if None
 
     """
     # errors
-    if mainsail_area < 0.:
-        raise ValueError("mainsail_area must be positive or zero")
-    if frontsail_area < 0.:
-        raise ValueError("frontsail_area must be positive or zero")
-    if not 0 <= flat <= 1. or flat > 1.:
-        raise ValueError("wrong flat value")
-    if not 0 <= fractionality <= 1.:
-        raise ValueError("wrong fractionality value")
-    if overlap < 0.:
-        raise ValueError("overlap must be positive or zero")
-    if roach < -1.:
-        raise ValueError("roach must be greater than -1 or -1")
-    if rho_air <= 0.:
-        raise ValueError("rho_air must be strictly positive")
+    _check_parameters(mainsail_area, frontsail_area, flat, fractionality, overlap, roach, rho_air)
 
     # warnings
     if flat < 0.6:
@@ -226,30 +441,29 @@ def aero_force(tws: float,
     if roach < -0.2 or roach > 2.0:
         warnings.warn('roach realistic values are between -0.2 and 2.0')
 
-    mainsail_c_lift, mainsail_c_drag = \
-        ImsAeroModelCoefficients.coefficient_interp(mainsail_type)
-    frontsail_c_lift, frontsail_c_drag = \
-        ImsAeroModelCoefficients.coefficient_interp(frontsail_type)
+    coefficients = ImsAeroModelCoefficients if registry is None else registry
+    mainsail_table = coefficients.coefficient_table(mainsail_type)
+    frontsail_table = coefficients.coefficient_table(frontsail_type)
 
     twa_sign = twa / abs(twa) if twa != 0. else 0.
 
-    awa_phi_up = apparent_wind_angle(tws,
-                                     abs(twa),
-                                     boatspeed,
-                                     phi_up(heel_angle))
-
-    awa = apparent_wind_angle(tws, abs(twa), boatspeed, heel_angle)
-    aws = apparent_wind_speed(tws, abs(twa), boatspeed, heel_angle)
+    if wind_state is None:
+        wind_state = WindState(tws, twa, boatspeed, heel_angle)
+    awa_phi_up = abs(wind_state.phi_up.angle)
+    awa, aws = abs(wind_state.heeled.angle), wind_state.heeled.speed
 
     reference_area = mainsail_area + frontsail_area
 
+    mainsail_cl, mainsail_cd = mainsail_table(awa_phi_up)
+    frontsail_cl, frontsail_cd = frontsail_table(awa_phi_up)
+
     # Global Cl max
-    cl_max = (mainsail_c_lift(awa_phi_up) * (mainsail_area / reference_area)
-              + frontsail_c_lift(awa_phi_up) * (frontsail_area / reference_area))
+    cl_max = (mainsail_cl * (mainsail_area / reference_area)
+              + frontsail_cl * (frontsail_area / reference_area))
 
     # Global Cd
-    cdp = (mainsail_c_drag(awa_phi_up) * (mainsail_area / reference_area)
-           + frontsail_c_drag(awa_phi_up) * (frontsail_area / reference_area))
+    cdp = (mainsail_cd * (mainsail_area / reference_area)
+           + frontsail_cd * (frontsail_area / reference_area))
 
     # Centre of effort coordinates
     x_coe_main = mainsail_coe[0]
@@ -266,23 +480,19 @@ def aero_force(tws: float,
     else:
         x_coe = x_coe_main \
                 * (mainsail_area / reference_area) \
-                * (sqrt((mainsail_c_lift(awa_phi_up)) ** 2 +
-                        (mainsail_c_drag(awa_phi_up)) ** 2) /
+                * (sqrt(mainsail_cl ** 2 + mainsail_cd ** 2) /
                    sqrt(cl_max ** 2 + cdp ** 2)) \
                 + \
                 x_coe_front \
                 * (frontsail_area / reference_area) \
-                * (sqrt((frontsail_c_lift(awa_phi_up)) ** 2 +
-                        (frontsail_c_drag(awa_phi_up)) ** 2) /
+                * (sqrt(frontsail_cl ** 2 + frontsail_cd ** 2) /
                    sqrt(cl_max ** 2 + cdp ** 2))
 
         z_coe = z_coe_main * (mainsail_area / reference_area) \
-            * (sqrt((mainsail_c_lift(awa_phi_up)) ** 2 +
-                    (mainsail_c_drag(awa_phi_up)) ** 2) /
+            * (sqrt(mainsail_cl ** 2 + mainsail_cd ** 2) /
                 sqrt(cl_max ** 2 + cdp ** 2)) + \
             z_coe_front * (frontsail_area / reference_area) \
-            * (sqrt((frontsail_c_lift(awa_phi_up)) ** 2 +
-                    (frontsail_c_drag(awa_phi_up)) ** 2) /
+            * (sqrt(frontsail_cl ** 2 + frontsail_cd ** 2) /
                sqrt(cl_max ** 2 + cdp ** 2))
 
     z_coe_twist = z_coe * twist(flat, fractionality)
@@ -323,28 +533,398 @@ def aero_force(tws: float,
                  z_coe_twist * cos(radians(heel_angle)))  # TODO: X position
 
 
-def effective_span_correction(roach: float,
-                              fractionality: float,
-                              overlap: float) -> float:
-    """ORC 2013 eqn. [38]."""
-    return 1.1 + 0.08 * (roach - 0.2) + 0.5 * (0.68 + +0.31 * fractionality + 0.075 * overlap - 1.10)
+def _check_parameters(mainsail_area: float,
+                      frontsail_area: float,
+                      flat: float,
+                      fractionality: float,
+                      overlap: float,
+                      roach: float,
+                      rho_air: float) -> None:
+    r"""Errors of aero_force() on the rig and air parameters."""
+    if mainsail_area < 0.:
+        raise ValueError("mainsail_area must be positive or zero")
+    if frontsail_area < 0.:
+        raise ValueError("frontsail_area must be positive or zero")
+    if not 0 <= flat <= 1. or flat > 1.:
+        raise ValueError("wrong flat value")
+    if not 0 <= fractionality <= 1.:
+        raise ValueError("wrong fractionality value")
+    if overlap < 0.:
+        raise ValueError("overlap must be positive or zero")
+    if roach < -1.:
+        raise ValueError("roach must be greater than -1 or -1")
+    if rho_air <= 0.:
+        raise ValueError("rho_air must be strictly positive")
+
+
+def _check_parameters_array(mainsail_area: np.ndarray,
+                            frontsail_area: np.ndarray,
+                            flat: np.ndarray,
+                            fractionality: np.ndarray,
+                            overlap: np.ndarray,
+                            roach: np.ndarray,
+                            rho_air: np.ndarray) -> None:
+    r"""Errors and warnings (issued once for the whole arrays) of the vectorized aero force functions."""
+    # errors
+    if np.any(mainsail_area < 0.):
+        raise ValueError("mainsail_area must be positive or zero")
+    if np.any(frontsail_area < 0.):
+        raise ValueError("frontsail_area must be positive or zero")
+    if np.any((flat < 0.) | (flat > 1.)):
+        raise ValueError("wrong flat value")
+    if np.any((fractionality < 0.) | (fractionality > 1.)):
+        raise ValueError("wrong fractionality value")
+    if np.any(overlap < 0.):
+        raise ValueError("overlap must be positive or zero")
+    if np.any(roach < -1.):
+        raise ValueError("roach must be greater than -1 or -1")
+    if np.any(rho_air <= 0.):
+        raise ValueError("rho_air must be strictly positive")
+
+    # warnings
+    if np.any(flat < 0.6):
+        warnings.warn('flat realistic values are between 0.6 and 1.0')
+    if np.any(fractionality < 0.6):
+        warnings.warn('fractionality realistic values are between 0.6 and 1.0')
+    if np.any((overlap < 0.7) | (overlap > 2.0)):
+        warnings.warn('overlap realistic values are between 0.7 and 2.0')
+    if np.any((roach < -0.2) | (roach > 2.0)):
+        warnings.warn('roach realistic values are between -0.2 and 2.0')
+
+
+def aero_force_array(tws: np.ndarray,
+                     twa: np.ndarray,
+                     boatspeed: np.ndarray,
+                     heel_angle: np.ndarray,
+                     trim_angle: np.ndarray,
+                     mainsail_type: str,
+                     mainsail_area: float,
+                     mainsail_coe: Tuple[float, float, float],
+                     frontsail_type: str,
+                     frontsail_area: float,
+                     frontsail_coe: Tuple[float, float, float],
+                     rig_z_max: float,
+                     flat: np.ndarray = 1.0,
+                     fractionality: float = 0.8,
+                     overlap: float = 1.1,
+                     roach: float = 0.2,
+                     rho_air: float = RHO_AIR_20C,
+                     wind_state: Optional[WindState] = None,
+                     registry: Optional['SailCoefficientRegistry'] = None) -> Force:
+    r"""Aero force for whole arrays of sailing states.
+
+    Vectorized version of aero_force(): tws, twa, boatspeed, heel_angle,
+    trim_angle and flat can be any arrays that broadcast together,
+    the other parameters are the same as for aero_force(),
+    wind_state being built from arrays.
+
+    Returns a Force whose fields are arrays of the broadcast shape
+    (struct of arrays), with the same values as aero_force()
+    evaluated element by element.
 
+    """
+    tws, twa, boatspeed, heel_angle, trim_angle, flat = \
+        np.broadcast_arrays(*[np.asarray(value, dtype=float)
+                              for value in (tws, twa, boatspeed, heel_angle,
+                                            trim_angle, flat)])
+
+    _check_parameters_array(mainsail_area, frontsail_area, flat, fractionality, overlap, roach, rho_air)
+
+    coefficients = ImsAeroModelCoefficients if registry is None else registry
+    mainsail_table = coefficients.coefficient_table(mainsail_type)
+    frontsail_table = coefficients.coefficient_table(frontsail_type)
+
+    twa_sign = np.sign(twa)
+
+    if wind_state is None:
+        wind_state = WindState(tws, twa, boatspeed, heel_angle)
+    awa_phi_up = np.abs(wind_state.phi_up.angle)
+    awa, aws = np.abs(wind_state.heeled.angle), wind_state.heeled.speed
+
+    mainsail_cl, mainsail_cd = mainsail_table(awa_phi_up)
+    frontsail_cl, frontsail_cd = frontsail_table(awa_phi_up)
+
+    x_coe_main, _, z_coe_main = mainsail_coe
+    x_coe_front, _, z_coe_front = frontsail_coe
+
+    return _aero_force_from_coefficients(twa_sign, awa, aws, heel_angle, trim_angle, flat,
+                                         mainsail_cl, mainsail_cd, mainsail_area, x_coe_main, z_coe_main,
+                                         frontsail_cl, frontsail_cd, frontsail_area, x_coe_front, z_coe_front,
+                                         rig_z_max, fractionality, overlap, roach, rho_air)
+
+
+def _aero_force_from_coefficients(twa_sign: np.ndarray,
+                                  awa: np.ndarray,
+                                  aws: np.ndarray,
+                                  heel_angle: np.ndarray,
+                                  trim_angle: np.ndarray,
+                                  flat: np.ndarray,
+                                  mainsail_cl: np.ndarray,
+                                  mainsail_cd: np.ndarray,
+                                  mainsail_area: np.ndarray,
+                                  x_coe_main: np.ndarray,
+                                  z_coe_main: np.ndarray,
+                                  frontsail_cl: np.ndarray,
+                                  frontsail_cd: np.ndarray,
+                                  frontsail_area: np.ndarray,
+                                  x_coe_front: np.ndarray,
+                                  z_coe_front: np.ndarray,
+                                  rig_z_max: np.ndarray,
+                                  fractionality: np.ndarray,
+                                  overlap: np.ndarray,
+                                  roach: np.ndarray,
+                                  rho_air: np.ndarray,
+                                  tangent: Optional[Tuple[np.ndarray, ...]] = None):
+    r"""Vectorized aero force from the sails coefficients at the phi_up apparent wind angle.
+
+    awa is the unsigned apparent wind angle [degrees] at the heel angle.
+    Shared by aero_force_array(), aero_force_jacobian() and the fleet kernel,
+    where the rig parameters can also be arrays (one rig per row).
+
+    tangent is None (returns the Force) or the derivatives
+    (d_awa, d_aws, d_heel_angle, d_trim_angle, d_flat, d_mainsail_cl,
+    d_mainsail_cd, d_frontsail_cl, d_frontsail_cd) of the inputs along one
+    or several directions stacked on a leading axis: returns the Force
+    and the Force of its derivatives along these directions (forward mode).
 
-def phi_up(phi: float) -> float:
-    """Correction for the heel_angle used to interpolate the coefficient curves.
+    """
+    reference_area = mainsail_area + frontsail_area
+    coefficients = _force_coefficients(awa, flat,
+                                       mainsail_cl, mainsail_cd, mainsail_area, x_coe_main, z_coe_main,
+                                       frontsail_cl, frontsail_cd, frontsail_area, x_coe_front, z_coe_front,
+                                       rig_z_max, fractionality, overlap, roach,
+                                       tangent=None if tangent is None else tangent[:1] + tangent[4:])
+    if tangent is not None:
+        coefficients, (d_c_r, d_c_h, d_x_coe, d_z_coe) = coefficients
+    c_r, c_h, x_coe, z_coe = coefficients
+
+    twist_factor = twist(flat, fractionality)
+    z_coe_twist = z_coe * twist_factor
 
-    Defined on p49 (eqn. [43]) of ORC VPP documentation 2013
+    # Forces in boat coordinates
+    driving_force = 0.5 * c_r * rho_air * reference_area * aws ** 2
+    heeling_force = 0.5 * c_h * rho_air * reference_area * aws ** 2
 
-    In the VPP as the yacht heels the apparent wind angle seen
-    by the sails reduces, but on the water the crew have traveler and jib
-    lead controls that permit adjustment of angle of attack.
-    To reflect this the PHI_UP function modifies the heel angle
-    that is used in the calculation of the
-    apparent wind angle at which the collective curves of lift and drag
-    coefficient are evaluated.
+    heel = np.radians(heel_angle)
+    sin_heel, cos_heel = np.sin(heel), np.cos(heel)
+    trim = np.radians(trim_angle)
+    sin_trim = np.sin(trim)
+    force = Force(driving_force,
+                  twa_sign * heeling_force * cos_heel,
+                  - heeling_force * sin_heel,
+                  x_coe - z_coe_twist * sin_trim,
+                  twa_sign * z_coe_twist * sin_heel,
+                  z_coe_twist * cos_heel)
+    if tangent is None:
+        return force
+
+    _, d_aws, d_heel_angle, d_trim_angle, d_flat = tangent[:5]
+    # d twist / d flat is 0.203 + 0.451 * (1. - fractionality)
+    d_z_coe_twist = d_z_coe * twist_factor + z_coe * (0.203 + 0.451 * (1. - fractionality)) * d_flat
+    dynamic_pressure = 0.5 * rho_air * reference_area * aws ** 2
+    d_dynamic_pressure = rho_air * reference_area * aws * d_aws
+    d_driving_force = dynamic_pressure * d_c_r + c_r * d_dynamic_pressure
+    d_heeling_force = dynamic_pressure * d_c_h + c_h * d_dynamic_pressure
+    d_heel = np.radians(d_heel_angle)
+    return force, Force(d_driving_force,
+                        twa_sign * (d_heeling_force * cos_heel - heeling_force * sin_heel * d_heel),
+                        - d_heeling_force * sin_heel - heeling_force * cos_heel * d_heel,
+                        d_x_coe - d_z_coe_twist * sin_trim - z_coe_twist * np.cos(trim) * np.radians(d_trim_angle),
+                        twa_sign * (d_z_coe_twist * sin_heel + z_coe_twist * cos_heel * d_heel),
+                        d_z_coe_twist * cos_heel - z_coe_twist * sin_heel * d_heel)
+
+
+def _force_coefficients(awa: np.ndarray,
+                        flat: np.ndarray,
+                        mainsail_cl: np.ndarray,
+                        mainsail_cd: np.ndarray,
+                        mainsail_area: np.ndarray,
+                        x_coe_main: np.ndarray,
+                        z_coe_main: np.ndarray,
+                        frontsail_cl: np.ndarray,
+                        frontsail_cd: np.ndarray,
+                        frontsail_area: np.ndarray,
+                        x_coe_front: np.ndarray,
+                        z_coe_front: np.ndarray,
+                        rig_z_max: np.ndarray,
+                        fractionality: np.ndarray,
+                        overlap: np.ndarray,
+                        roach: np.ndarray,
+                        tangent: Optional[Tuple[np.ndarray, ...]] = None):
+    r"""Vectorized driving and heeling force coefficients and centre of effort of the rig.
+
+    Shared by _aero_force_from_coefficients() and the strip theory
+    (each strip being an element).
+
+    Returns the driving and heeling force coefficients (c_r, c_h) and the
+    x and z of the centre of effort, before twist, of each element.
+    If tangent is the derivatives (d_awa, d_flat, d_mainsail_cl, d_mainsail_cd,
+    d_frontsail_cl, d_frontsail_cd) of the inputs (stacked on a leading axis
+    for several directions), returns these values and their derivatives
+    (d_c_r, d_c_h, d_x_coe, d_z_coe).
 
     """
-    return 10 * (phi / 30.) ** 2
+    reference_area = mainsail_area + frontsail_area
+    mainsail_ratio = mainsail_area / reference_area
+    frontsail_ratio = frontsail_area / reference_area
+
+    # Global Cl max
+    cl_max = mainsail_cl * mainsail_ratio + frontsail_cl * frontsail_ratio
+
+    # Global Cd
+    cdp = mainsail_cd * mainsail_ratio + frontsail_cd * frontsail_ratio
+
+    global_coefficient = np.sqrt(cl_max ** 2 + cdp ** 2)
+    mainsail_coefficient = np.sqrt(mainsail_cl ** 2 + mainsail_cd ** 2)
+    frontsail_coefficient = np.sqrt(frontsail_cl ** 2 + frontsail_cd ** 2)
+    no_force = (cl_max ** 2 + cdp ** 2) == 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mainsail_weight = np.where(no_force, 1., mainsail_coefficient / global_coefficient)
+        frontsail_weight = np.where(no_force, 1., frontsail_coefficient / global_coefficient)
+
+    x_coe = x_coe_main * mainsail_ratio * mainsail_weight + x_coe_front * frontsail_ratio * frontsail_weight
+    z_coe = z_coe_main * mainsail_ratio * mainsail_weight + z_coe_front * frontsail_ratio * frontsail_weight
+
+    # Quadratic parasite drag (see aero_force())
+    kpp = 0.
+
+    heff = rig_z_max * effective_span_correction(roach, fractionality, overlap)
+
+    c_e = kpp + (reference_area / (pi * heff ** 2))
+
+    c_drag_sails = cdp + c_e * cl_max ** 2 * flat ** 2
+    c_lift = cl_max * flat
+
+    awa = np.radians(awa)
+    sin_awa, cos_awa = np.sin(awa), np.cos(awa)
+    c_r = c_lift * sin_awa - c_drag_sails * cos_awa
+    c_h = c_lift * cos_awa + c_drag_sails * sin_awa
+    if tangent is None:
+        return c_r, c_h, x_coe, z_coe
+
+    d_awa, d_flat, d_mainsail_cl, d_mainsail_cd, d_frontsail_cl, d_frontsail_cd = tangent
+    d_cl_max = d_mainsail_cl * mainsail_ratio + d_frontsail_cl * frontsail_ratio
+    d_cdp = d_mainsail_cd * mainsail_ratio + d_frontsail_cd * frontsail_ratio
+    with np.errstate(divide='ignore', invalid='ignore'):
+        d_global_coefficient = (cl_max * d_cl_max + cdp * d_cdp) / global_coefficient
+        d_mainsail_coefficient = np.where(mainsail_coefficient > 0.,
+                                          (mainsail_cl * d_mainsail_cl + mainsail_cd * d_mainsail_cd)
+                                          / mainsail_coefficient,
+                                          0.)
+        d_frontsail_coefficient = np.where(frontsail_coefficient > 0.,
+                                           (frontsail_cl * d_frontsail_cl + frontsail_cd * d_frontsail_cd)
+                                           / frontsail_coefficient,
+                                           0.)
+        d_mainsail_weight = np.where(no_force, 0.,
+                                     (d_mainsail_coefficient - mainsail_weight * d_global_coefficient)
+                                     / global_coefficient)
+        d_frontsail_weight = np.where(no_force, 0.,
+                                      (d_frontsail_coefficient - frontsail_weight * d_global_coefficient)
+                                      / global_coefficient)
+
+    d_x_coe = x_coe_main * mainsail_ratio * d_mainsail_weight + x_coe_front * frontsail_ratio * d_frontsail_weight
+    d_z_coe = z_coe_main * mainsail_ratio * d_mainsail_weight + z_coe_front * frontsail_ratio * d_frontsail_weight
+
+    d_c_lift = d_cl_max * flat + cl_max * d_flat
+    d_c_drag_sails = d_cdp + c_e * 2. * cl_max * flat * d_c_lift
+    d_awa = np.radians(d_awa)
+    d_c_r = d_c_lift * sin_awa - d_c_drag_sails * cos_awa + c_h * d_awa
+    d_c_h = d_c_lift * cos_awa + d_c_drag_sails * sin_awa - c_r * d_awa
+    return (c_r, c_h, x_coe, z_coe), (d_c_r, d_c_h, d_x_coe, d_z_coe)
+
+
+def aero_force_jacobian(tws: np.ndarray,
+                        twa: np.ndarray,
+                        boatspeed: np.ndarray,
+                        heel_angle: np.ndarray,
+                        trim_angle: np.ndarray,
+                        mainsail_type: str,
+                        mainsail_area: float,
+                        mainsail_coe: Tuple[float, float, float],
+                        frontsail_type: str,
+                        frontsail_area: float,
+                        frontsail_coe: Tuple[float, float, float],
+                        rig_z_max: float,
+                        flat: np.ndarray = 1.0,
+                        fractionality: float = 0.8,
+                        overlap: float = 1.1,
+                        roach: float = 0.2,
+                        rho_air: float = RHO_AIR_20C,
+                        registry: Optional['SailCoefficientRegistry'] = None) -> Tuple[Force, Dict[str, Force]]:
+    r"""Aero force and its partial derivatives, for whole arrays of sailing states.
+
+    The parameters are the same as for aero_force_array(), except wind_state:
+    the apparent winds are computed here with their derivatives
+    (apparent_wind_jacobian_array()). The force is identical to the one
+    of aero_force_array().
+    The derivatives are computed in closed form (forward mode) from the
+    derivatives of the PCHIP coefficient polynomials and of the apparent
+    wind formulas, along the 4 directions at once.
+
+    Returns (force, derivatives), derivatives is a dict keyed by the names
+    in JACOBIAN_VARIABLES (boatspeed, heel_angle, flat, trim_angle) whose
+    values are Force objects of the partial derivatives of each field
+    (per m/s, per degree for the angles).
+
+    """
+    tws, twa, boatspeed, heel_angle, trim_angle, flat = \
+        np.broadcast_arrays(*[np.asarray(value, dtype=float)
+                              for value in (tws, twa, boatspeed, heel_angle,
+                                            trim_angle, flat)])
+    _check_parameters_array(mainsail_area, frontsail_area, flat, fractionality, overlap, roach, rho_air)
+
+    coefficients = ImsAeroModelCoefficients if registry is None else registry
+    mainsail_table = coefficients.coefficient_table(mainsail_type)
+    frontsail_table = coefficients.coefficient_table(frontsail_type)
+
+    abs_twa = np.abs(twa)
+    apparent_phi_up = apparent_wind_jacobian_array(tws, abs_twa, boatspeed, phi_up(heel_angle))
+    apparent = apparent_wind_jacobian_array(tws, abs_twa, boatspeed, heel_angle)
+    awa_phi_up = apparent_phi_up.angle
+
+    mainsail_cl, mainsail_cd = mainsail_table(awa_phi_up)
+    frontsail_cl, frontsail_cd = frontsail_table(awa_phi_up)
+    d_mainsail_cl, d_mainsail_cd = mainsail_table.derivative(awa_phi_up)
+    d_frontsail_cl, d_frontsail_cd = frontsail_table.derivative(awa_phi_up)
+
+    # Derivatives of the primary variables along the JACOBIAN_VARIABLES directions
+    zeros = np.zeros(tws.shape)
+    ones = np.ones(tws.shape)
+    # d phi_up / d heel_angle
+    d_phi_up = 20. * heel_angle / 900.
+    d_awa_phi_up = np.stack((apparent_phi_up.angle_derivatives["boatspeed"],
+                             apparent_phi_up.angle_derivatives["heel_angle"] * d_phi_up,
+                             zeros, zeros))
+    d_awa = np.stack((apparent.angle_derivatives["boatspeed"], apparent.angle_derivatives["heel_angle"],
+                      zeros, zeros))
+    d_aws = np.stack((apparent.speed_derivatives["boatspeed"], apparent.speed_derivatives["heel_angle"],
+                      zeros, zeros))
+    d_heel_angle = np.stack((zeros, ones, zeros, zeros))
+    d_flat = np.stack((zeros, zeros, ones, zeros))
+    d_trim_angle = np.stack((zeros, zeros, zeros, ones))
+
+    x_coe_main, _, z_coe_main = mainsail_coe
+    x_coe_front, _, z_coe_front = frontsail_coe
+
+    force, tangent = _aero_force_from_coefficients(
+        np.sign(twa), apparent.angle, apparent.speed, heel_angle, trim_angle, flat,
+        mainsail_cl, mainsail_cd, mainsail_area, x_coe_main, z_coe_main,
+        frontsail_cl, frontsail_cd, frontsail_area, x_coe_front, z_coe_front,
+        rig_z_max, fractionality, overlap, roach, rho_air,
+        tangent=(d_awa, d_aws, d_heel_angle, d_trim_angle, d_flat,
+                 d_mainsail_cl * d_awa_phi_up, d_mainsail_cd * d_awa_phi_up,
+                 d_frontsail_cl * d_awa_phi_up, d_frontsail_cd * d_awa_phi_up))
+    return force, {name: Force(*(field[i] for field in tangent)) for i, name in enumerate(JACOBIAN_VARIABLES)}
+
+
+JACOBIAN_VARIABLES = ("boatspeed", "heel_angle", "flat", "trim_angle")
+
+
+def effective_span_correction(roach: float,
+                              fractionality: float,
+                              overlap: float) -> float:
+    """ORC 2013 eqn. [38]."""
+    return 1.1 + 0.08 * (roach - 0.2) + 0.5 * (0.68 + +0.31 * fractionality + 0.075 * overlap - 1.10)
 
 
 def twist(flat: float, fractionality: float) -> float:
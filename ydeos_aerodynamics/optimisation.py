@@ -0,0 +1,241 @@
+# coding: utf-8
+
+r"""Sail trim optimisation: flat (and heel) maximising the driving force.
+
+The optimisation is done for many sailing states at once. The candidate
+values are evaluated with aero_force_array over whole arrays of states:
+a coarse grid of candidates first, then a golden section search
+in the bracket around the best candidate of each state.
+
+An optional limit of the heeling moment makes the candidates that exceed it
+unfeasible. The best feasible point evaluated during the search is returned.
+
+"""
+
+from math import ceil, log, sqrt
+from typing import Callable, Optional, Tuple
+import numpy as np
+from ydeos_aerodynamics.force import Force
+from ydeos_aerodynamics.model import Rig, aero_force_array
+
+_INVERSE_GOLDEN_RATIO = (sqrt(5.) - 1.) / 2.
+
+
+class OptimalSailTrim:
+    r"""Result of maximise_driving_force(), arrays of the shape of the sailing states.
+
+    Parameters
+    ----------
+    flat : The optimal flat values
+    heel_angle : The optimal (or given) heel angles [degrees]
+    force : The aero force at the optimum
+    heeling_moment : The absolute value of the heeling moment at the optimum [N.m]
+    feasible : False where no evaluated point satisfies the heeling moment limit,
+               the returned trim is then the least heeling candidate evaluated
+
+    """
+
+    __slots__ = ('flat', 'heel_angle', 'force', 'heeling_moment', 'feasible')
+
+    def __init__(self,
+                 flat: np.ndarray,
+                 heel_angle: np.ndarray,
+                 force: Force,
+                 heeling_moment: np.ndarray,
+                 feasible: np.ndarray):
+        self.flat = flat
+        self.heel_angle = heel_angle
+        self.force = force
+        self.heeling_moment = heeling_moment
+        self.feasible = feasible
+
+    @property
+    def driving_force(self) -> np.ndarray:
+        r"""Driving force at the optimum [N]."""
+        return self.force.fx
+
+
+def heeling_moment(force: Force, point: Tuple[float, float, float] = (0., 0., 0.)) -> np.ndarray:
+    r"""Absolute value of the heeling moment (about the x axis through point) [N.m].
+
+    The fields of force can be scalars or arrays.
+
+    """
+    return np.abs((force.py - point[1]) * force.fz - (force.pz - point[2]) * force.fy)
+
+
+class _Search:
+    r"""Evaluations of the objective and best feasible point found so far."""
+
+    def __init__(self,
+                 rig: Rig,
+                 states: Tuple[np.ndarray, ...],
+                 trim_angle: float,
+                 max_heeling_moment: Optional[float],
+                 moment_point: Tuple[float, float, float]):
+        self.rig = rig
+        self.tws, self.twa, self.boatspeed = states
+        self.trim_angle = trim_angle
+        self.max_heeling_moment = max_heeling_moment
+        self.moment_point = moment_point
+        shape = self.tws.shape
+        self.best_value = np.full(shape, -np.inf)
+        self.best_flat = np.full(shape, np.nan)
+        self.best_heel = np.full(shape, np.nan)
+        self.least_moment = np.full(shape, np.inf)
+        self.least_moment_flat = np.full(shape, np.nan)
+        self.least_moment_heel = np.full(shape, np.nan)
+
+    def force(self, flat: np.ndarray, heel_angle: np.ndarray) -> Force:
+        return aero_force_array(self.tws, self.twa, self.boatspeed, heel_angle, self.trim_angle,
+                                flat=flat, **self.rig._asdict())
+
+    def __call__(self, flat: np.ndarray, heel_angle: np.ndarray) -> np.ndarray:
+        r"""Driving force, -inf where the heeling moment limit is exceeded.
+
+        flat and heel_angle have the shape of the states, or an extra
+        leading axis of candidates.
+
+        """
+        force = self.force(flat, heel_angle)
+        moment = heeling_moment(force, self.moment_point)
+        if self.max_heeling_moment is None:
+            value = force.fx
+        else:
+            value = np.where(moment <= self.max_heeling_moment, force.fx, -np.inf)
+
+        flat = np.broadcast_to(flat, value.shape)
+        heel_angle = np.broadcast_to(heel_angle, value.shape)
+        if value.ndim == self.tws.ndim:
+            value, moment, flat, heel_angle = value[None], moment[None], flat[None], heel_angle[None]
+        for candidate in zip(value, moment, flat, heel_angle):
+            self._update(*candidate)
+        return value.reshape(force.fx.shape)
+
+    def _update(self,
+                value: np.ndarray,
+                moment: np.ndarray,
+                flat: np.ndarray,
+                heel_angle: np.ndarray) -> None:
+        # on ties, the largest flat (the least depowered sail) wins
+        improved = (value > self.best_value) | ((value == self.best_value) & ~(flat <= self.best_flat))
+        self.best_value[improved] = value[improved]
+        self.best_flat[improved] = flat[improved]
+        self.best_heel[improved] = heel_angle[improved]
+        improved = moment < self.least_moment
+        self.least_moment[improved] = moment[improved]
+        self.least_moment_flat[improved] = flat[improved]
+        self.least_moment_heel[improved] = heel_angle[improved]
+
+
+def _golden_section_search(function: Callable[[np.ndarray], np.ndarray],
+                           lower: np.ndarray,
+                           upper: np.ndarray,
+                           nb_iterations: int) -> None:
+    r"""Vectorized golden section search of the maxima of function in [lower, upper].
+
+    function maps an array of abscissas (one per state) to an array of values.
+    On ties the search moves towards lower.
+
+    """
+    a, b = lower.copy(), upper.copy()
+    c = b - _INVERSE_GOLDEN_RATIO * (b - a)
+    d = a + _INVERSE_GOLDEN_RATIO * (b - a)
+    value_c, value_d = function(c), function(d)
+    for _ in range(nb_iterations):
+        left = value_c >= value_d
+        b = np.where(left, d, b)
+        a = np.where(left, a, c)
+        new = np.where(left, b - _INVERSE_GOLDEN_RATIO * (b - a), a + _INVERSE_GOLDEN_RATIO * (b - a))
+        value_new = function(new)
+        c, d = np.where(left, new, d), np.where(left, c, new)
+        value_c, value_d = np.where(left, value_new, value_d), np.where(left, value_c, value_new)
+
+
+def _bracket(candidates: np.ndarray, best: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    r"""Neighbouring candidates of the best candidates."""
+    spacing = candidates[1] - candidates[0] if len(candidates) > 1 else 0.
+    return (np.maximum(best - spacing, candidates[0]),
+            np.minimum(best + spacing, candidates[-1]))
+
+
+def maximise_driving_force(rig: Rig,
+                           tws: np.ndarray,
+                           twa: np.ndarray,
+                           boatspeed: np.ndarray,
+                           heel_angle: np.ndarray = 0.,
+                           trim_angle: float = 0.,
+                           max_heeling_moment: Optional[float] = None,
+                           flat_bounds: Tuple[float, float] = (0.6, 1.),
+                           heel_bounds: Optional[Tuple[float, float]] = None,
+                           nb_candidates: int = 9,
+                           xtol: float = 1e-6,
+                           moment_point: Tuple[float, float, float] = (0., 0., 0.)) -> OptimalSailTrim:
+    r"""Flat (and optionally heel) giving the maximum driving force, for many sailing states at once.
+
+    Parameters
+    ----------
+    rig : The sail plan
+    tws : true wind speeds [m/s]
+    twa : true wind angles [degrees]
+    boatspeed : [m/s]
+    heel_angle : [degrees], used if heel_bounds is None
+    trim_angle : [degrees], bow up is positive
+    max_heeling_moment : Optional limit of the absolute heeling moment [N.m]
+    flat_bounds : The flat search interval, the realistic values by default
+    heel_bounds : The heel angle search interval [degrees], None to keep heel_angle
+    nb_candidates : Number of candidates of the coarse grid, per optimised variable
+    xtol : Absolute tolerance of the golden section search
+    moment_point : The x, y, z coordinates of the point the heeling moment is computed about
+
+    The states (tws, twa, boatspeed and heel_angle) can be any arrays
+    that broadcast together. When several flat values give the same
+    driving force, the largest flat (the least depowered sail) is returned.
+
+    """
+    if not 0. <= flat_bounds[0] <= flat_bounds[1] <= 1.:
+        raise ValueError("wrong flat_bounds")
+    if heel_bounds is not None and not -90. < heel_bounds[0] <= heel_bounds[1] < 90.:
+        raise ValueError("wrong heel_bounds")
+    if nb_candidates < 2:
+        raise ValueError("nb_candidates must be at least 2")
+    if max_heeling_moment is not None and max_heeling_moment < 0.:
+        raise ValueError("max_heeling_moment must be positive or zero")
+
+    tws, twa, boatspeed, heel_angle = np.broadcast_arrays(*[np.asarray(value, dtype=float)
+                                                            for value in (tws, twa, boatspeed, heel_angle)])
+    search = _Search(rig, (tws, twa, boatspeed), trim_angle, max_heeling_moment, moment_point)
+    expand = (slice(None),) + (None,) * tws.ndim
+
+    flats = np.linspace(flat_bounds[0], flat_bounds[1], nb_candidates)
+    if heel_bounds is None:
+        heels = heel_angle[None]
+        search(flats[expand], heels)
+    else:
+        heels = np.linspace(heel_bounds[0], heel_bounds[1], nb_candidates)
+        for heel in heels:
+            search(flats[expand], heel)
+    # states without any feasible candidate start from the least heeling one
+    start_flat = np.where(np.isfinite(search.best_value), search.best_flat, search.least_moment_flat)
+    start_heel = np.where(np.isfinite(search.best_value), search.best_heel, search.least_moment_heel)
+
+    flat_lower, flat_upper = _bracket(flats, start_flat)
+    nb_iterations = max(int(ceil(log(xtol / max(flats[1] - flats[0], xtol)) / log(_INVERSE_GOLDEN_RATIO))), 0)
+    if heel_bounds is None:
+        _golden_section_search(lambda flat: search(flat, heel_angle), flat_lower, flat_upper, nb_iterations)
+    else:
+        heel_lower, heel_upper = _bracket(heels, start_heel)
+        heel_iterations = max(int(ceil(log(xtol / max(heels[1] - heels[0], xtol)) /
+                                       log(_INVERSE_GOLDEN_RATIO))), 0)
+        # alternate refinements of the flat and of the heel
+        for _ in range(2):
+            heel = np.where(np.isfinite(search.best_value), search.best_heel, start_heel)
+            _golden_section_search(lambda flat: search(flat, heel), flat_lower, flat_upper, nb_iterations)
+            flat = np.where(np.isfinite(search.best_value), search.best_flat, start_flat)
+            _golden_section_search(lambda heel_: search(flat, heel_), heel_lower, heel_upper, heel_iterations)
+
+    feasible = np.isfinite(search.best_value)
+    flat = np.where(feasible, search.best_flat, search.least_moment_flat)
+    heel = np.where(feasible, search.best_heel, search.least_moment_heel)
+    force = search.force(flat, heel)
+    return OptimalSailTrim(flat, heel, force, heeling_moment(force, moment_point), feasible)
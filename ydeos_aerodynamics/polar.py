@@ -0,0 +1,263 @@
+# coding: utf-8
+
+r"""Aero forces precomputed on a regular grid of sailing states (polar grid).
+
+The sails force (aero_force) and, optionally, the hull and mast windage
+of a rig are evaluated once on a TWS x TWA x boatspeed x heel x flat
+hypercube and stored as a dense array. Queries are answered by
+multilinear interpolation of the stored forces and of their moments.
+
+"""
+
+from time import perf_counter
+from typing import Dict, Optional, Sequence
+import numpy as np
+from ydeos_aerodynamics.force import Force, ForceBatch
+from ydeos_aerodynamics.model import Rig, aero_force
+from ydeos_aerodynamics.total import total_aero_force
+from ydeos_aerodynamics.windage import HullWindageModel, MastWindageModel
+
+
+class PolarGrid:
+    r"""Aero forces of a rig precomputed on a regular grid of sailing states.
+
+    Parameters
+    ----------
+    rig : The sail plan
+    tws : true wind speeds [m/s] of the grid, strictly increasing
+    twa : true wind angles [degrees] of the grid, strictly increasing
+    boatspeed : boat speeds [m/s] of the grid, strictly increasing
+    heel_angle : heel angles [degrees] of the grid, strictly increasing
+    flat : flat values of the grid, strictly increasing
+    trim_angle : [degrees], bow up is positive, the same for the whole grid
+    hull_windage : Optional hull windage model added to the sails force
+    mast_windage : Optional mast windage model added to the sails force
+
+    An axis with a single value is allowed, it can then only be queried
+    at that value.
+
+    """
+
+    axes_names = ('tws', 'twa', 'boatspeed', 'heel_angle', 'flat')
+
+    # Number of queries interpolated at once (bounds the temporaries)
+    block_size = 1024
+
+    def __init__(self,
+                 rig: Rig,
+                 tws: Sequence[float],
+                 twa: Sequence[float],
+                 boatspeed: Sequence[float],
+                 heel_angle: Sequence[float],
+                 flat: Sequence[float] = (1.,),
+                 trim_angle: float = 0.,
+                 hull_windage: Optional[HullWindageModel] = None,
+                 mast_windage: Optional[MastWindageModel] = None):
+        self.rig = rig
+        self.trim_angle = trim_angle
+        self.hull_windage = hull_windage
+        self.mast_windage = mast_windage
+
+        self.axes = tuple(np.asarray(axis, dtype=float) for axis in (tws, twa, boatspeed, heel_angle, flat))
+        for name, axis in zip(self.axes_names, self.axes):
+            if axis.ndim != 1 or len(axis) == 0:
+                raise ValueError(f"The {name} axis must be a non empty 1-D sequence")
+            if np.any(np.diff(axis) <= 0.):
+                raise ValueError(f"The {name} axis must be strictly increasing")
+
+        # Flat index stride of each axis in the grid
+        self._strides = tuple(int(stride) for stride in np.cumprod((self.shape + (1,))[:0:-1])[::-1])
+
+        start = perf_counter()
+        states = np.meshgrid(*self.axes, indexing='ij')
+        self.values = np.ascontiguousarray(
+            ForceBatch.from_force(self.evaluate(*states)).data.reshape(self.shape + (len(Force._fields),)))
+        self._table = _interpolation_table(self.values)
+        self.build_time = perf_counter() - start
+
+    @classmethod
+    def from_values(cls,
+                    rig: Rig,
+                    axes: Sequence[np.ndarray],
+                    values: np.ndarray,
+                    trim_angle: float = 0.,
+                    hull_windage: Optional[HullWindageModel] = None,
+                    mast_windage: Optional[MastWindageModel] = None) -> 'PolarGrid':
+        r"""Polar grid from already computed values (e.g. loaded from a file).
+
+        The axes and values are used as they are (no copy), the build time is 0.
+
+        """
+        grid = cls.__new__(cls)
+        grid.rig = rig
+        grid.trim_angle = trim_angle
+        grid.hull_windage = hull_windage
+        grid.mast_windage = mast_windage
+        grid.axes = tuple(axes)
+        if len(grid.axes) != len(cls.axes_names) or values.shape != grid.shape + (len(Force._fields),):
+            raise ValueError("The values do not match the axes")
+        grid._strides = tuple(int(stride) for stride in np.cumprod((grid.shape + (1,))[:0:-1])[::-1])
+        grid.values = values
+        grid._table = _interpolation_table(values)
+        grid.build_time = 0.
+        return grid
+
+    @property
+    def shape(self) -> tuple:
+        r"""Shape of the grid of sailing states."""
+        return tuple(len(axis) for axis in self.axes)
+
+    @property
+    def nbytes(self) -> int:
+        r"""Memory footprint [bytes] of the precomputed values and interpolation table."""
+        return self.values.nbytes + self._table.nbytes
+
+    def evaluate(self,
+                 tws: np.ndarray,
+                 twa: np.ndarray,
+                 boatspeed: np.ndarray,
+                 heel_angle: np.ndarray,
+                 flat: np.ndarray = 1.) -> Force:
+        r"""Direct evaluation of the total aero force (sails and windage).
+
+        The forces are summed with ForceBatch.resultant() (see total_aero_force()).
+        Returns a Force whose fields are arrays of the broadcast shape.
+
+        """
+        return total_aero_force(self.rig, tws, twa, boatspeed, heel_angle, self.trim_angle, flat,
+                                self.hull_windage, self.mast_windage)[0]
+
+    def __call__(self,
+                 tws: np.ndarray,
+                 twa: np.ndarray,
+                 boatspeed: np.ndarray,
+                 heel_angle: np.ndarray,
+                 flat: np.ndarray = 1.) -> Force:
+        r"""Multilinear interpolation of the precomputed forces.
+
+        The parameters can be any arrays that broadcast together.
+        The queries are interpolated in blocks of block_size (see _interpolate()).
+        Returns a Force whose fields are arrays of the broadcast shape.
+
+        Raises
+        ------
+        ValueError
+            if a sailing state is outside of the grid
+
+        """
+        queries = np.broadcast_arrays(*[np.asarray(value, dtype=float)
+                                        for value in (tws, twa, boatspeed, heel_angle, flat)])
+        shape = queries[0].shape
+        queries = [query.ravel() for query in queries]
+        for name, axis, query in zip(self.axes_names, self.axes, queries):
+            if np.any((query < axis[0]) | (query > axis[-1])):
+                raise ValueError(f"{name} is outside of the polar grid")
+
+        result = np.empty((queries[0].size, len(Force._fields)))
+        for start in range(0, len(result), self.block_size):
+            stop = start + self.block_size
+            self._interpolate([query[start:stop] for query in queries], result[start:stop])
+        return Force(*(field.reshape(shape) for field in result.T))
+
+    def _interpolate(self, queries: Sequence[np.ndarray], result: np.ndarray) -> None:
+        r"""Interpolation of a block of queries (1-D, inside the grid) into result.
+
+        The corners (rows of _interpolation_table()) are accumulated one by one,
+        the temporaries are of the size of the block. The forces are interpolated, the points of application
+        are the interpolated moments (force magnitude x point) divided by the
+        interpolated magnitude, so that the corners with a strong force weigh
+        more (the linear interpolation is used where all the corners have a
+        null force).
+
+        """
+        # Index of the lower corner and weights of the (lower, upper) corners along each axis
+        lower_index = np.zeros(len(result), dtype=np.intp)
+        corner_offsets = np.zeros(1, dtype=np.intp)
+        weights = np.ones((len(result), 1))
+        for axis, query, stride in zip(self.axes, queries, self._strides):
+            if len(axis) == 1:
+                continue
+            index = np.clip(np.searchsorted(axis, query, side='right') - 1, 0, len(axis) - 2)
+            fraction = (query - axis[index]) / (axis[index + 1] - axis[index])
+            lower_index += index * stride
+            corner_offsets = np.concatenate([corner_offsets, corner_offsets + stride])
+            weights = np.concatenate([weights * (1. - fraction)[:, None],
+                                      weights * fraction[:, None]], axis=1)
+
+        # Sums of the weighted forces, points, magnitudes and moments of the corners
+        sums = np.zeros((len(result), self._table.shape[1]))
+        for weight, offset in zip(weights.T, corner_offsets):
+            sums += weight[:, None] * self._table[lower_index + offset]
+        result[:, :3] = sums[:, :3]
+        magnitude = sums[:, 6:7]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            result[:, 3:] = np.where(magnitude > 0., sums[:, 7:] / magnitude, sums[:, 3:6])
+
+    def _evaluate_scalar(self,
+                         tws: float,
+                         twa: float,
+                         boatspeed: float,
+                         heel_angle: float,
+                         flat: float) -> ForceBatch:
+        r"""Direct evaluation with the scalar functions, for reference timings."""
+        forces = [aero_force(tws, twa, boatspeed, heel_angle, self.trim_angle, flat=flat, **self.rig._asdict())]
+        if self.hull_windage is not None:
+            forces.append(self.hull_windage(tws, twa, boatspeed, heel_angle))
+        if self.mast_windage is not None:
+            forces.append(self.mast_windage(tws, twa, boatspeed, heel_angle, self.trim_angle))
+        return ForceBatch.from_forces(forces)
+
+    def error_report(self, nb_samples: int = 10000, seed: int = 0) -> Dict[str, float]:
+        r"""Interpolation error and lookup speedup against direct evaluation.
+
+        The sailing states are drawn uniformly inside the grid.
+        The scalar evaluation time is measured on (at most) 1000 of them.
+
+        Returns a dict with the build time [s], the memory footprint [bytes],
+        the evaluation times per sailing state [s] with the scalar functions,
+        with the vectorized functions and by interpolation, the corresponding
+        lookup speedups and the max and RMS absolute interpolation errors
+        of each Force field.
+
+        """
+        rng = np.random.default_rng(seed)
+        states = [rng.uniform(axis[0], axis[-1], nb_samples) for axis in self.axes]
+
+        nb_scalar_samples = min(nb_samples, 1000)
+        start = perf_counter()
+        for state in zip(*(axis_states[:nb_scalar_samples].tolist() for axis_states in states)):
+            self._evaluate_scalar(*state)
+        scalar_time = (perf_counter() - start) / nb_scalar_samples
+
+        start = perf_counter()
+        direct = self.evaluate(*states)
+        direct_time = (perf_counter() - start) / nb_samples
+
+        start = perf_counter()
+        interpolated = self(*states)
+        interpolation_time = (perf_counter() - start) / nb_samples
+
+        report = {"build_time": self.build_time,
+                  "nbytes": self.nbytes,
+                  "scalar_time": scalar_time,
+                  "direct_time": direct_time,
+                  "interpolation_time": interpolation_time,
+                  "speedup_vs_scalar": scalar_time / interpolation_time,
+                  "speedup_vs_direct": direct_time / interpolation_time}
+        for field in Force._fields:
+            error = np.abs(getattr(interpolated, field) - getattr(direct, field))
+            report[f"{field}_max_error"] = float(np.max(error))
+            report[f"{field}_rms_error"] = float(np.sqrt(np.mean(error ** 2)))
+        return report
+
+
+def _interpolation_table(values: np.ndarray) -> np.ndarray:
+    r"""Forces, points, force magnitudes and moments (magnitude x point) of the grid nodes.
+
+    Returns a (number of nodes, 10) array, the rows in the order of the
+    flattened values.
+
+    """
+    values = values.reshape(-1, len(Force._fields))
+    magnitude = np.sqrt(np.sum(values[:, :3] ** 2, axis=1))[:, None]
+    return np.ascontiguousarray(np.hstack([values, magnitude, magnitude * values[:, 3:]]))
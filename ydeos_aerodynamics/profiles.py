@@ -3,6 +3,10 @@
 r"""Wind profiles (i.e. variation of wind speed with altitude)."""
 
 from math import log
+from typing import Optional, Sequence
+import numpy as np
+
+PROFILES = ('power_law', 'logarithmic')
 
 
 def power_law(wind_speed_known: float,
@@ -94,3 +98,183 @@ def logarithmic(wind_speed_known: float,
     if roughness_length <= 0.:
         raise ValueError("Roughness length must be strictly positive")
     return wind_speed_known * log(height / roughness_length) / log(height_reference / roughness_length)
+
+
+def power_law_factor_array(height_reference: np.ndarray,
+                           height: np.ndarray,
+                           alpha: np.ndarray = 0.11) -> np.ndarray:
+    r"""Ratio of the wind speed at height to the wind speed at height_reference
+    for the power law profile.
+
+    The parameters are the same as for power_law()
+    but can be any arrays that broadcast together.
+
+    Raises
+    ------
+    ValueError
+        if any of the inputs is invalid (see power_law())
+
+    """
+    height_reference, height, alpha = (np.asarray(value, dtype=float)
+                                       for value in (height_reference, height, alpha))
+    if np.any(height_reference <= 0.):
+        raise ValueError("Height reference should be strictly positive")
+    if np.any(height < 0.):
+        raise ValueError("Height should be positive or zero")
+    if np.any(alpha <= 0.):
+        raise ValueError("alpha must be strictly positive")
+    return (height / height_reference)**alpha
+
+
+def logarithmic_factor_array(height_reference: np.ndarray,
+                             height: np.ndarray,
+                             roughness_length: np.ndarray = 0.0002) -> np.ndarray:
+    r"""Ratio of the wind speed at height to the wind speed at height_reference
+    for the logarithmic profile.
+
+    The parameters are the same as for logarithmic()
+    but can be any arrays that broadcast together.
+
+    Raises
+    ------
+    ValueError
+        if any of the inputs is invalid (see logarithmic())
+
+    """
+    height_reference, height, roughness_length = (np.asarray(value, dtype=float)
+                                                  for value in (height_reference, height, roughness_length))
+    if np.any(height_reference <= 0.):
+        raise ValueError("Height reference should be strictly positive")
+    if np.any(height <= 0.):
+        raise ValueError("Height should be strictly positive")
+    if np.any(roughness_length <= 0.):
+        raise ValueError("Roughness length must be strictly positive")
+    return np.log(height / roughness_length) / np.log(height_reference / roughness_length)
+
+
+def _check_wind_speed_known(wind_speed_known: np.ndarray) -> np.ndarray:
+    wind_speed_known = np.asarray(wind_speed_known, dtype=float)
+    if np.any(wind_speed_known < 0.):
+        raise ValueError("Wind speed known should be positive or zero")
+    return wind_speed_known
+
+
+def power_law_array(wind_speed_known: np.ndarray,
+                    height_reference: np.ndarray,
+                    height: np.ndarray,
+                    alpha: np.ndarray = 0.11) -> np.ndarray:
+    r"""Wind profile power law, vectorized version of power_law().
+
+    The parameters can be any arrays that broadcast together,
+    e.g. wind_speed_known[:, None] and height[None, :] for the wind speeds
+    of every sample at every height.
+    The inputs are validated once for the whole arrays.
+
+    Returns an array of wind speeds at height
+
+    Raises
+    ------
+    ValueError
+        if any of the inputs is invalid (see power_law())
+
+    """
+    return _check_wind_speed_known(wind_speed_known) * power_law_factor_array(height_reference, height, alpha)
+
+
+def logarithmic_array(wind_speed_known: np.ndarray,
+                      height_reference: np.ndarray,
+                      height: np.ndarray,
+                      roughness_length: np.ndarray = 0.0002) -> np.ndarray:
+    r"""Logarithmic wind profile, vectorized version of logarithmic().
+
+    The parameters can be any arrays that broadcast together,
+    e.g. wind_speed_known[:, None] and height[None, :] for the wind speeds
+    of every sample at every height.
+    The inputs are validated once for the whole arrays.
+
+    Returns an array of wind speeds at height
+
+    Raises
+    ------
+    ValueError
+        if any of the inputs is invalid (see logarithmic())
+
+    """
+    return _check_wind_speed_known(wind_speed_known) * logarithmic_factor_array(height_reference, height,
+                                                                                roughness_length)
+
+
+class HeightFactorTable:
+    r"""Precomputed wind speed ratios from a reference height to fixed heights.
+
+    Parameters
+    ----------
+    height_reference : The height at which the wind speed is known
+                       (e.g. the masthead sensor height)
+    heights : The heights at which the wind speed is wanted
+              (e.g. 10 m, the centres of effort of the sails)
+    parameters : The alpha values (power law) or roughness lengths
+                 (logarithmic profile) of the table
+    profile : 'power_law' or 'logarithmic'
+
+    factors is a (len(parameters), len(heights)) array,
+    correcting a whole log is a single multiply:
+
+    >>> table = HeightFactorTable(height_reference=1.7, heights=(10.,))
+    >>> tws_10m = table(tws_masthead)[..., 0]
+
+    """
+
+    __slots__ = ('profile', 'height_reference', 'heights', 'parameters', 'factors')
+
+    def __init__(self,
+                 height_reference: float,
+                 heights: Sequence[float],
+                 parameters: Sequence[float] = (0.11,),
+                 profile: str = 'power_law'):
+        if profile not in PROFILES:
+            raise ValueError(f"profile must be one of {PROFILES}")
+        self.profile = profile
+        self.height_reference = float(height_reference)
+        self.heights = np.atleast_1d(np.asarray(heights, dtype=float))
+        self.parameters = np.atleast_1d(np.asarray(parameters, dtype=float))
+        factor_array = power_law_factor_array if profile == 'power_law' else logarithmic_factor_array
+        self.factors = factor_array(self.height_reference, self.heights[None, :], self.parameters[:, None])
+
+    def _parameter_index(self, parameter: Optional[float]) -> int:
+        if parameter is None:
+            if len(self.parameters) != 1:
+                raise ValueError("The parameter must be given for a table of several parameters")
+            return 0
+        index = np.flatnonzero(self.parameters == parameter)
+        if len(index) == 0:
+            raise ValueError(f"{parameter} is not a parameter of the table")
+        return int(index[0])
+
+    def factor(self, height: float, parameter: Optional[float] = None) -> float:
+        r"""Precomputed factor of a height and parameter of the table.
+
+        Raises
+        ------
+        ValueError
+            if the height or the parameter is not in the table
+
+        """
+        index = np.flatnonzero(self.heights == height)
+        if len(index) == 0:
+            raise ValueError(f"{height} is not a height of the table")
+        return float(self.factors[self._parameter_index(parameter), index[0]])
+
+    def __call__(self, wind_speed_known: np.ndarray, parameter: Optional[float] = None) -> np.ndarray:
+        r"""Wind speeds at the heights of the table.
+
+        Parameters
+        ----------
+        wind_speed_known : wind speeds at height_reference, any shape
+        parameter : The alpha or roughness length, may be omitted
+                    if the table has a single parameter
+
+        Returns an array of shape wind_speed_known.shape + (len(heights),)
+
+        """
+        return _check_wind_speed_known(wind_speed_known)[..., None] * self.factors[self._parameter_index(parameter)]
@@ -0,0 +1,209 @@
+# coding: utf-8
+
+r"""Registry of sail coefficient sets, resolved by name or integer id.
+
+Sail types are registered from CSV or JSON files (one sail type per file)
+or from in-memory curves. Registering a file does not read it: the file is
+read, and its interpolants and CoefficientTable are built, the first time
+the sail type is used, then kept. The start-up cost does not grow with
+the size of the inventory.
+
+CSV format (header required, empty cells where a curve is not defined)::
+
+    awa,cl,cd
+    0.,0.,0.034
+    7.,0.948,0.017
+    ...
+
+JSON format::
+
+    {"cl": {"awa": [0., 7., ...], "value": [0., 0.948, ...]},
+     "cd": {"awa": [0., 7., ...], "value": [0.034, 0.017, ...]}}
+
+"""
+
+import json
+import os
+from threading import Lock
+from typing import Callable, Dict, List, Sequence, Tuple, Union
+import numpy as np
+from ydeos_aerodynamics.model import CoefficientTable, ImsAeroModelCoefficients, _Interpolant
+
+# Sail type name or integer id
+Sail = Union[str, int]
+
+Curves = Tuple[Sequence[float], Sequence[float], Sequence[float], Sequence[float]]
+
+FILE_EXTENSIONS = ('.csv', '.json')
+
+
+def read_coefficients_csv(path: Union[str, os.PathLike]) -> Curves:
+    r"""Lift and drag curves of a CSV coefficients file.
+
+    Returns the awa and values of cl, the awa and values of cd
+
+    """
+    data = np.genfromtxt(path, delimiter=',', names=True, dtype=float)
+    if data.dtype.names is None or not {'awa', 'cl', 'cd'} <= set(data.dtype.names):
+        raise ValueError(f"{path} must have awa, cl and cd columns")
+    data = np.atleast_1d(data)
+    cl_defined = ~np.isnan(data['cl'])
+    cd_defined = ~np.isnan(data['cd'])
+    return (data['awa'][cl_defined].tolist(), data['cl'][cl_defined].tolist(),
+            data['awa'][cd_defined].tolist(), data['cd'][cd_defined].tolist())
+
+
+def read_coefficients_json(path: Union[str, os.PathLike]) -> Curves:
+    r"""Lift and drag curves of a JSON coefficients file.
+
+    Returns the awa and values of cl, the awa and values of cd
+
+    """
+    with open(path) as f:
+        content = json.load(f)
+    try:
+        return (content["cl"]["awa"], content["cl"]["value"],
+                content["cd"]["awa"], content["cd"]["value"])
+    except (KeyError, TypeError):
+        raise ValueError(f"{path} must define the awa and value of cl and cd")
+
+
+def _interpolants(awa_cl: Sequence[float],
+                  cl: Sequence[float],
+                  awa_cd: Sequence[float],
+                  cd: Sequence[float]) -> Tuple[_Interpolant, _Interpolant]:
+    for awa in (awa_cl, awa_cd):
+        if len(awa) < 2 or np.any(np.diff(awa) <= 0.):
+            raise ValueError("The awa of a coefficient curve must be strictly increasing, with 2 values or more")
+    return _Interpolant(list(awa_cl), list(cl)), _Interpolant(list(awa_cd), list(cd))
+
+
+class SailCoefficientRegistry:
+    r"""Sail coefficient sets, resolved by name or integer id.
+
+    The ids are given in registration order, starting at 0.
+    The registry is safe to use from several threads.
+
+    Parameters
+    ----------
+    builtin : Register the sail types of ImsAeroModelCoefficients first
+              (they keep the ids of their ImsAeroModelCoefficients.sail_types() order)
+
+    """
+
+    def __init__(self, builtin: bool = True):
+        self._ids: Dict[str, int] = {}
+        self._names: List[str] = []
+        self._loaders: List[Callable[[], Tuple[_Interpolant, _Interpolant]]] = []
+        self._interpolants: Dict[int, Tuple[_Interpolant, _Interpolant]] = {}
+        self._tables: Dict[int, CoefficientTable] = {}
+        self._lock = Lock()
+        if builtin:
+            for sail_type in ImsAeroModelCoefficients.sail_types():
+                self._register(sail_type, lambda name=sail_type: ImsAeroModelCoefficients.coefficient_interp(name))
+
+    def _register(self, name: str, loader: Callable[[], Tuple[_Interpolant, _Interpolant]]) -> int:
+        with self._lock:
+            if name in self._ids:
+                raise ValueError(f"The sail type {name} is already registered")
+            self._ids[name] = len(self._names)
+            self._names.append(name)
+            self._loaders.append(loader)
+            return self._ids[name]
+
+    def register(self,
+                 name: str,
+                 awa_cl: Sequence[float],
+                 cl: Sequence[float],
+                 awa_cd: Sequence[float],
+                 cd: Sequence[float]) -> int:
+        r"""Register a sail type from its lift and drag curves, returns its id."""
+        interpolants = _interpolants(awa_cl, cl, awa_cd, cd)
+        return self._register(name, lambda: interpolants)
+
+    def register_file(self, path: Union[str, os.PathLike], name: str = None) -> int:
+        r"""Register a sail type from a CSV or JSON file, returns its id.
+
+        The file is not read until the sail type is used.
+
+        Parameters
+        ----------
+        path : The file path, with a .csv or .json extension
+        name : The name of the sail type, defaults to the file name without extension
+
+        """
+        stem, extension = os.path.splitext(os.path.basename(path))
+        if extension.lower() not in FILE_EXTENSIONS:
+            raise ValueError(f"Coefficient files must have one of the {FILE_EXTENSIONS} extensions")
+        read = read_coefficients_csv if extension.lower() == '.csv' else read_coefficients_json
+        return self._register(stem if name is None else name, lambda: _interpolants(*read(path)))
+
+    def register_directory(self, directory: Union[str, os.PathLike]) -> List[int]:
+        r"""Register all the CSV and JSON files of a directory (sorted by name), returns their ids."""
+        return [self.register_file(os.path.join(directory, file_name))
+                for file_name in sorted(os.listdir(directory))
+                if os.path.splitext(file_name)[1].lower() in FILE_EXTENSIONS]
+
+    def sail_id(self, sail: Sail) -> int:
+        r"""Integer id of a sail type name (or id)."""
+        if isinstance(sail, (int, np.integer)):
+            if not 0 <= sail < len(self._names):
+                raise ValueError(f"Unknown sail id {sail}")
+            return int(sail)
+        try:
+            return self._ids[sail]
+        except KeyError:
+            raise ValueError(f"Unknown sail type {sail}")
+
+    def sail_name(self, sail: Sail) -> str:
+        r"""Name of a sail type id (or name)."""
+        return self._names[self.sail_id(sail)]
+
+    def sail_types(self) -> List[str]:
+        r"""Names of the registered sail types, in id order."""
+        return list(self._names)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __contains__(self, sail: Sail) -> bool:
+        try:
+            self.sail_id(sail)
+        except ValueError:
+            return False
+        return True
+
+    def is_loaded(self, sail: Sail) -> bool:
+        r"""Has the sail type been read and its interpolants built?"""
+        return self.sail_id(sail) in self._interpolants
+
+    def coefficient_interp(self, sail: Sail) -> Tuple[_Interpolant, _Interpolant]:
+        r"""Lift and drag coefficient interpolators of a sail type (loaded on first use).
+
+        Raises
+        ------
+        ValueError
+            if the sail type is unknown or its file is not valid
+
+        """
+        sail_id = self.sail_id(sail)
+        try:
+            return self._interpolants[sail_id]
+        except KeyError:
+            with self._lock:
+                if sail_id not in self._interpolants:
+                    self._interpolants[sail_id] = self._loaders[sail_id]()
+                return self._interpolants[sail_id]
+
+    def coefficient_table(self, sail: Sail) -> CoefficientTable:
+        r"""Precompiled lift and drag coefficients table of a sail type (built on first use)."""
+        sail_id = self.sail_id(sail)
+        try:
+            return self._tables[sail_id]
+        except KeyError:
+            table = CoefficientTable.from_interpolants(*self.coefficient_interp(sail_id))
+            return self._tables.setdefault(sail_id, table)
+
+    def coefficient(self, sail: Sail, awa: float) -> Tuple[float, float]:
+        r"""Lift and drag coefficients of a sail type at the apparent wind angle(s) awa."""
+        return self.coefficient_table(sail)(awa)
@@ -0,0 +1,281 @@
+# coding: utf-8
+
+r"""Versioned memory-mappable binary format for precomputed tables.
+
+File layout (little endian)::
+
+    magic       8 bytes   b"YDEOSAER"
+    version     uint32
+    header size uint32    size of the JSON header, in bytes
+    header      JSON      kind, checksum of the inputs, metadata and
+                          descriptors (offset, dtype, shape) of the arrays
+    arrays      raw       C ordered, each starting at a multiple of 64 bytes
+
+The arrays of a loaded file are read-only views on a single np.memmap of
+the file (no copy), so that processes loading the same file share its
+memory through the page cache.
+
+The checksum is a SHA-256 of the inputs the arrays were computed from.
+It is compared with the checksum of the current inputs when loading,
+a file computed from other inputs (stale) raises a ValueError.
+
+"""
+
+import hashlib
+import json
+import os
+from typing import Dict, Optional, Tuple, Union
+import numpy as np
+from ydeos_aerodynamics import __version__
+from ydeos_aerodynamics.model import CoefficientTable, ImsAeroModelCoefficients, Rig, _COEFFICIENT_TABLES
+from ydeos_aerodynamics.polar import PolarGrid
+from ydeos_aerodynamics.windage import HullWindageModel, MastWindageModel
+
+MAGIC = b"YDEOSAER"
+VERSION = 1
+ALIGNMENT = 64
+
+_HULL_WINDAGE_PARAMETERS = ('freeboard_average', 'loa', 'beam_max', 'rho_air')
+_MAST_WINDAGE_PARAMETERS = ('mast_x', 'mast_z_bottom', 'mast_z_top', 'mast_front_area', 'mast_side_area', 'rho_air')
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def write_arrays(path: Union[str, os.PathLike],
+                 kind: str,
+                 arrays: Dict[str, np.ndarray],
+                 checksum: str,
+                 metadata: Optional[dict] = None) -> None:
+    r"""Write named arrays to a file in the memory-mappable format.
+
+    Parameters
+    ----------
+    path : The file path
+    kind : The kind of content, checked when reading
+    arrays : The arrays, by name
+    checksum : Checksum of the inputs the arrays were computed from
+    metadata : JSON serializable data stored in the header
+
+    """
+    arrays = {name: np.ascontiguousarray(array, dtype=np.asarray(array).dtype.newbyteorder('<'))
+              for name, array in arrays.items()}
+    descriptors = {}
+    offset = 0
+    for name, array in arrays.items():
+        descriptors[name] = {"offset": offset, "dtype": array.dtype.str, "shape": list(array.shape)}
+        offset = _aligned(offset + array.nbytes)
+    header = json.dumps({"kind": kind,
+                         "checksum": checksum,
+                         "metadata": metadata or {},
+                         "arrays": descriptors}).encode('utf-8')
+    # the arrays start at the first aligned offset after the header
+    data_offset = _aligned(len(MAGIC) + 8 + len(header))
+    header = header.ljust(data_offset - len(MAGIC) - 8)
+
+    with open(path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(VERSION.to_bytes(4, 'little'))
+        f.write(len(header).to_bytes(4, 'little'))
+        f.write(header)
+        for name, array in arrays.items():
+            f.seek(data_offset + descriptors[name]["offset"])
+            f.write(array.tobytes())
+        f.truncate(data_offset + offset)
+
+
+def read_header(path: Union[str, os.PathLike]) -> Tuple[dict, int]:
+    r"""Header of a file and offset of its arrays.
+
+    Raises
+    ------
+    ValueError
+        if the file is not in the format or in another version of the format
+
+    """
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a ydeos_aerodynamics binary file")
+        version = int.from_bytes(f.read(4), 'little')
+        if version != VERSION:
+            raise ValueError(f"{path} has format version {version}, version {VERSION} is required")
+        header_size = int.from_bytes(f.read(4), 'little')
+        header = json.loads(f.read(header_size).decode('utf-8'))
+    return header, len(MAGIC) + 8 + header_size
+
+
+def read_arrays(path: Union[str, os.PathLike],
+                kind: str,
+                checksum: Optional[str] = None) -> Tuple[Dict[str, np.ndarray], dict]:
+    r"""Memory map the arrays of a file.
+
+    Parameters
+    ----------
+    path : The file path
+    kind : The expected kind of content
+    checksum : The checksum of the current inputs, None not to check it
+
+    Returns the read-only arrays by name (views on a np.memmap of the file)
+    and the metadata
+
+    Raises
+    ------
+    ValueError
+        if the file is not in the format, is of another kind or is stale
+
+    """
+    header, data_offset = read_header(path)
+    if header["kind"] != kind:
+        raise ValueError(f"{path} contains {header['kind']}, not {kind}")
+    if checksum is not None and header["checksum"] != checksum:
+        raise ValueError(f"{path} is stale: it was computed from other inputs")
+    memory_map = np.memmap(path, dtype=np.uint8, mode='r')
+    arrays = {}
+    for name, descriptor in header["arrays"].items():
+        dtype = np.dtype(descriptor["dtype"])
+        start = data_offset + descriptor["offset"]
+        size = int(np.prod(descriptor["shape"])) * dtype.itemsize
+        arrays[name] = memory_map[start:start + size].view(dtype).reshape(descriptor["shape"])
+    return arrays, header["metadata"]
+
+
+def _sha256(*parts: Union[str, np.ndarray]) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, np.ndarray):
+            digest.update(np.ascontiguousarray(part, dtype='<f8').tobytes())
+        else:
+            digest.update(part.encode('utf-8'))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+# Coefficient tables
+
+def coefficient_tables_checksum() -> str:
+    r"""Checksum of the lift and drag curves of ImsAeroModelCoefficients."""
+    parts = []
+    for sail_type in ImsAeroModelCoefficients.sail_types():
+        parts.append(sail_type)
+        for interpolant in ImsAeroModelCoefficients.coefficient_interp(sail_type):
+            parts.extend((np.asarray(interpolant._x), np.asarray(interpolant._y)))
+    return _sha256(*parts)
+
+
+def save_coefficient_tables(path: Union[str, os.PathLike]) -> None:
+    r"""Save the coefficient tables (PCHIP segment coefficients) of all sail types."""
+    arrays = {}
+    for sail_type, table in ImsAeroModelCoefficients.coefficient_tables().items():
+        for name in ('breakpoints', 'origins', 'coefficients', 'bounds'):
+            arrays[f"{sail_type}/{name}"] = getattr(table, name)
+    write_arrays(path, "coefficient_tables", arrays, coefficient_tables_checksum(),
+                 {"sail_types": ImsAeroModelCoefficients.sail_types()})
+
+
+def load_coefficient_tables(path: Union[str, os.PathLike], install: bool = True) -> Dict[str, CoefficientTable]:
+    r"""Load the coefficient tables of all sail types.
+
+    Parameters
+    ----------
+    path : The file path
+    install : Make ImsAeroModelCoefficients.coefficient_table() (and therefore
+              aero_force) use the loaded tables instead of building them
+
+    Raises
+    ------
+    ValueError
+        if the file is stale (the coefficient curves have changed)
+
+    """
+    arrays, metadata = read_arrays(path, "coefficient_tables", coefficient_tables_checksum())
+    tables = {sail_type: CoefficientTable(*(arrays[f"{sail_type}/{name}"]
+                                            for name in ('breakpoints', 'origins', 'coefficients', 'bounds')))
+              for sail_type in metadata["sail_types"]}
+    if install:
+        _COEFFICIENT_TABLES.update(tables)
+    return tables
+
+
+# Polar grids
+
+def _polar_grid_inputs(grid: PolarGrid) -> dict:
+    r"""JSON serializable inputs of a polar grid."""
+    return {"rig": grid.rig._asdict(),
+            "trim_angle": grid.trim_angle,
+            "hull_windage": None if grid.hull_windage is None else
+            {name: getattr(grid.hull_windage, name) for name in _HULL_WINDAGE_PARAMETERS},
+            "mast_windage": None if grid.mast_windage is None else
+            {name: getattr(grid.mast_windage, name) for name in _MAST_WINDAGE_PARAMETERS}}
+
+
+def model_fingerprint(grid: PolarGrid) -> str:
+    r"""Fingerprint of the force models a polar grid is computed with.
+
+    The total aero force of the grid (grid.evaluate()) at the nodes made of
+    the first, middle and last values of each axis, formatted with 12
+    significant digits so that the last bit of the floating point results
+    does not matter. Any change of the models that affects the grid changes it,
+    whether or not the version of the package was bumped.
+
+    """
+    probes = np.meshgrid(*[np.unique(axis[[0, len(axis) // 2, -1]]) for axis in grid.axes], indexing='ij')
+    force = grid.evaluate(*probes)
+    return " ".join(f"{value:.11e}" for value in np.concatenate([field.ravel() for field in force]))
+
+
+def polar_grid_checksum(grid: PolarGrid) -> str:
+    r"""Checksum of the inputs of a polar grid.
+
+    It covers the rig, the trim angle, the windage models, the grid axes,
+    the coefficient curves, the version of the package and the models
+    themselves through model_fingerprint(): the models are evaluated,
+    the version is not relied upon to be bumped when they change.
+
+    """
+    return _sha256(__version__,
+                   json.dumps(_polar_grid_inputs(grid), sort_keys=True),
+                   coefficient_tables_checksum(),
+                   model_fingerprint(grid),
+                   *grid.axes)
+
+
+def save_polar_grid(path: Union[str, os.PathLike], grid: PolarGrid) -> None:
+    r"""Save a polar grid: its axes, its precomputed values and its inputs."""
+    arrays = {f"axes/{name}": axis for name, axis in zip(grid.axes_names, grid.axes)}
+    arrays["values"] = grid.values
+    write_arrays(path, "polar_grid", arrays, polar_grid_checksum(grid), _polar_grid_inputs(grid))
+
+
+def load_polar_grid(path: Union[str, os.PathLike], rig: Optional[Rig] = None) -> PolarGrid:
+    r"""Load a polar grid without recomputing its values.
+
+    Parameters
+    ----------
+    path : The file path
+    rig : The expected rig, None not to check it
+
+    Raises
+    ------
+    ValueError
+        if the file is stale (computed with other coefficient curves, other
+        force models or another version of the package) or not computed for rig
+
+    """
+    arrays, metadata = read_arrays(path, "polar_grid")
+    hull_windage = metadata["hull_windage"]
+    mast_windage = metadata["mast_windage"]
+    rig_fields = dict(metadata["rig"],
+                      mainsail_coe=tuple(metadata["rig"]["mainsail_coe"]),
+                      frontsail_coe=tuple(metadata["rig"]["frontsail_coe"]))
+    grid = PolarGrid.from_values(Rig(**rig_fields),
+                                 tuple(arrays[f"axes/{name}"] for name in PolarGrid.axes_names),
+                                 arrays["values"],
+                                 trim_angle=metadata["trim_angle"],
+                                 hull_windage=None if hull_windage is None else HullWindageModel(**hull_windage),
+                                 mast_windage=None if mast_windage is None else MastWindageModel(**mast_windage))
+    if rig is not None and Rig(*rig) != grid.rig:
+        raise ValueError(f"{path} was not computed for the rig {rig}")
+    if polar_grid_checksum(grid) != read_header(path)[0]["checksum"]:
+        raise ValueError(f"{path} is stale: it was computed from other inputs")
+    return grid
@@ -0,0 +1,157 @@
+# coding: utf-8
+
+r"""Height resolved aero force (strip theory).
+
+The rig is split into horizontal strips. Each strip sees the true wind speed
+of its height above the water (wind gradient, see profiles.py), hence its
+own apparent wind speed and angle (twist of the apparent wind).
+The force coefficients of aero_force() are evaluated for each strip and the
+strip forces are integrated over the rig.
+
+All the strips of all the sailing states are evaluated in a single
+vectorized batch of shape (*states, nb_strips).
+
+"""
+
+from typing import Optional, Tuple
+import numpy as np
+from ydeos_aerodynamics.air import RHO_AIR_20C
+from ydeos_aerodynamics.apparent import WindState
+from ydeos_aerodynamics.force import Force
+from ydeos_aerodynamics.model import ImsAeroModelCoefficients, _check_parameters_array, _force_coefficients, twist
+from ydeos_aerodynamics.profiles import PROFILES, power_law_factor_array, logarithmic_factor_array
+
+
+def strip_heights(rig_z_max: float, nb_strips: int) -> Tuple[np.ndarray, np.ndarray]:
+    r"""Heights and area fractions of the strips of a rig.
+
+    The strips split [0, rig_z_max] evenly. The sail area is distributed
+    triangularly (the chord decreases linearly from the foot to the head).
+
+    Returns the z of the strip centres [m] and the area fractions (sum to 1)
+
+    """
+    if nb_strips < 1:
+        raise ValueError("nb_strips must be at least 1")
+    if rig_z_max <= 0.:
+        raise ValueError("rig_z_max must be strictly positive")
+    bounds = np.linspace(0., 1., nb_strips + 1)
+    # integral of 2 (1 - z) between the strip bounds
+    area_fractions = np.diff(2. * bounds - bounds ** 2)
+    return rig_z_max * (bounds[:-1] + bounds[1:]) / 2., area_fractions
+
+
+def aero_force_strips(tws: np.ndarray,
+                      twa: np.ndarray,
+                      boatspeed: np.ndarray,
+                      heel_angle: np.ndarray,
+                      trim_angle: np.ndarray,
+                      mainsail_type: str,
+                      mainsail_area: float,
+                      mainsail_coe: Tuple[float, float, float],
+                      frontsail_type: str,
+                      frontsail_area: float,
+                      frontsail_coe: Tuple[float, float, float],
+                      rig_z_max: float,
+                      flat: np.ndarray = 1.0,
+                      fractionality: float = 0.8,
+                      overlap: float = 1.1,
+                      roach: float = 0.2,
+                      rho_air: float = RHO_AIR_20C,
+                      nb_strips: int = 20,
+                      profile: Optional[str] = 'power_law',
+                      profile_parameter: float = 0.11,
+                      height_reference: float = 10.,
+                      height_offset: float = 0.) -> Force:
+    r"""Height resolved aero force, strip theory version of aero_force_array().
+
+    The parameters up to rho_air are the same as for aero_force_array(),
+    tws being the true wind speed at height_reference.
+
+    nb_strips : The number of horizontal strips of the rig
+    profile : The wind profile, 'power_law', 'logarithmic'
+              or None for a uniform wind (no gradient)
+    profile_parameter : alpha of the power law or roughness length [m]
+                        of the logarithmic profile
+    height_reference : The height [m] above the water of tws
+    height_offset : The height [m] above the water of z = 0 of the rig
+                    (e.g. the freeboard)
+
+    The induced drag is that of the whole rig. The centre of effort is the
+    aero_force() one, averaged over the strips weighted by their force,
+    with its height scaled by the shift of the force weighted strip height.
+    With a uniform wind, all the strips see the same apparent wind
+    and the result is aero_force_array() (to rounding).
+
+    Returns a Force whose fields are arrays of the broadcast shape
+    of the sailing states
+
+    """
+    if profile is not None and profile not in PROFILES:
+        raise ValueError(f"profile must be None or one of {PROFILES}")
+    tws, twa, boatspeed, heel_angle, trim_angle, flat = \
+        np.broadcast_arrays(*[np.asarray(value, dtype=float)
+                              for value in (tws, twa, boatspeed, heel_angle,
+                                            trim_angle, flat)])
+
+    _check_parameters_array(mainsail_area, frontsail_area, flat, fractionality, overlap, roach, rho_air)
+    z_strips, area_fractions = strip_heights(rig_z_max, nb_strips)
+
+    mainsail_table = ImsAeroModelCoefficients.coefficient_table(mainsail_type)
+    frontsail_table = ImsAeroModelCoefficients.coefficient_table(frontsail_type)
+
+    twa_sign = np.sign(twa)
+    abs_twa = np.abs(twa)[..., None]
+    boatspeed_strips = boatspeed[..., None]
+    heel_strips = heel_angle[..., None]
+
+    # Local true wind speed of each strip, (*states, nb_strips)
+    if profile is None:
+        tws_strips = np.broadcast_to(tws[..., None], tws.shape + (nb_strips,))
+    else:
+        heights = height_offset + z_strips * np.cos(np.radians(heel_strips))
+        factor_array = power_law_factor_array if profile == 'power_law' else logarithmic_factor_array
+        tws_strips = tws[..., None] * factor_array(height_reference, heights, profile_parameter)
+
+    # The apparent winds at the heel and phi_up() angles share their components, as in aero_force_fleet()
+    wind_state = WindState(tws_strips, abs_twa, boatspeed_strips, heel_strips)
+    awa_phi_up = wind_state.phi_up.angle
+    awa, aws = wind_state.heeled.angle, wind_state.heeled.speed
+
+    mainsail_cl, mainsail_cd = mainsail_table(awa_phi_up)
+    frontsail_cl, frontsail_cd = frontsail_table(awa_phi_up)
+
+    # Force coefficients and centre of effort of each strip, as in aero_force_array()
+    x_coe_main, _, z_coe_main = mainsail_coe
+    x_coe_front, _, z_coe_front = frontsail_coe
+    c_r, c_h, x_coe, z_coe = _force_coefficients(awa, flat[..., None],
+                                                 mainsail_cl, mainsail_cd, mainsail_area, x_coe_main, z_coe_main,
+                                                 frontsail_cl, frontsail_cd, frontsail_area, x_coe_front, z_coe_front,
+                                                 rig_z_max, fractionality, overlap, roach)
+
+    # Strip forces, (*states, nb_strips)
+    reference_area = mainsail_area + frontsail_area
+    dynamic_pressure = 0.5 * rho_air * reference_area * area_fractions * aws ** 2
+    driving_strips = c_r * dynamic_pressure
+    heeling_strips = c_h * dynamic_pressure
+
+    # Force weighted averages over the strips (area weighted if there is no force)
+    magnitude = np.hypot(driving_strips, heeling_strips)
+    total_magnitude = magnitude.sum(axis=-1, keepdims=True)
+    weights = np.where(total_magnitude > 0.,
+                       magnitude / np.where(total_magnitude > 0., total_magnitude, 1.),
+                       area_fractions)
+    x_coe = np.sum(weights * x_coe, axis=-1)
+    z_shift = np.sum(weights * z_strips, axis=-1) / np.sum(area_fractions * z_strips)
+    z_coe_twist = np.sum(weights * z_coe, axis=-1) * z_shift * twist(flat, fractionality)
+
+    driving_force = driving_strips.sum(axis=-1)
+    heeling_force = heeling_strips.sum(axis=-1)
+
+    heel_angle = np.radians(heel_angle)
+    return Force(driving_force,
+                 twa_sign * heeling_force * np.cos(heel_angle),
+                 - heeling_force * np.sin(heel_angle),
+                 x_coe - z_coe_twist * np.sin(np.radians(trim_angle)),
+                 twa_sign * z_coe_twist * np.sin(heel_angle),
+                 z_coe_twist * np.cos(heel_angle))
@@ -0,0 +1,172 @@
+# coding: utf-8
+
+r"""Parallel sweeps of aero_force over rigs and grids of sailing states.
+
+The sweep space (rigs x grid of sailing states) is split into chunks of
+a fixed number of sailing states. The chunks are evaluated by the workers
+of a ProcessPoolExecutor that write their results directly into a shared
+memory block: only the chunk bounds are sent to the workers and nothing
+but None comes back, large arrays are never pickled. Where
+multiprocessing.shared_memory is not available (Python < 3.8), the
+workers return the chunk results, that are pickled.
+
+The chunking does not depend on the number of workers and each chunk is
+always evaluated the same way, so that the results are identical
+whatever the number of workers.
+
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.util import Finalize
+from typing import Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+from ydeos_aerodynamics.force import Force
+from ydeos_aerodynamics.model import ImsAeroModelCoefficients, Rig, aero_force_array
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:  # Python < 3.8
+    shared_memory = None
+
+# State of a worker process, set by _init_worker()
+_WORKER = {}
+
+
+def sail_combinations(rig: Rig) -> List[Rig]:
+    r"""Copies of a rig with every mainsail type x frontsail type pair.
+
+    The areas and centres of effort of the sails are those of rig.
+
+    """
+    return [rig._replace(mainsail_type=mainsail_type, frontsail_type=frontsail_type)
+            for mainsail_type in ImsAeroModelCoefficients.mainsail_types()
+            for frontsail_type in ImsAeroModelCoefficients.frontsail_types()]
+
+
+def _attach(name: Optional[str],
+            shape: Tuple[int, ...],
+            rigs: Sequence[Rig],
+            axes: Sequence[np.ndarray],
+            trim_angle: float) -> None:
+    r"""Set the state of the current process, attached to the shared memory block of the results if any."""
+    memory = None if name is None else shared_memory.SharedMemory(name=name)
+    _WORKER.update(memory=memory,
+                   values=None if memory is None else np.ndarray(shape, dtype=np.float64, buffer=memory.buf),
+                   rigs=rigs,
+                   axes=axes,
+                   trim_angle=trim_angle)
+
+
+def _detach() -> None:
+    r"""Reset the state of the current process, close its view of the shared memory block."""
+    _WORKER.pop("values", None)
+    memory = _WORKER.pop("memory", None)
+    if memory is not None:
+        memory.close()
+
+
+def _init_worker(*initargs) -> None:
+    r"""Initialize a worker process, see _attach(). The shared memory is closed when the worker exits."""
+    _attach(*initargs)
+    Finalize(None, _detach, exitpriority=10)
+
+
+def _evaluate_chunk(rig_index: int, start: int, stop: int) -> Optional[np.ndarray]:
+    r"""Evaluate the sailing states [start, stop) of a rig.
+
+    The results are written into the shared memory, or returned (as a (stop - start, 6) array)
+    if there is no shared memory.
+
+    """
+    values = _WORKER["values"]
+    axes = _WORKER["axes"]
+    indices = np.unravel_index(np.arange(start, stop), tuple(len(axis) for axis in axes))
+    tws, twa, boatspeed, heel_angle, flat = (axis[index] for axis, index in zip(axes, indices))
+    force = aero_force_array(tws, twa, boatspeed, heel_angle, _WORKER["trim_angle"],
+                             flat=flat, **_WORKER["rigs"][rig_index]._asdict())
+    if values is None:
+        return np.stack(np.broadcast_arrays(*force), axis=-1)
+    chunk = values.reshape(len(_WORKER["rigs"]), -1, len(Force._fields))[rig_index, start:stop]
+    for i, field in enumerate(force):
+        chunk[:, i] = field
+    return None
+
+
+def _store(values: np.ndarray,
+           chunks: Sequence[Tuple[int, int, int]],
+           results: Iterable[Optional[np.ndarray]]) -> None:
+    r"""Write the returned chunk results (if not already in the shared memory) into values."""
+    for (rig_index, start, stop), result in zip(chunks, results):
+        if result is not None:
+            values.reshape(values.shape[0], -1, len(Force._fields))[rig_index, start:stop] = result
+
+
+def sweep(rigs: Sequence[Rig],
+          tws: Sequence[float],
+          twa: Sequence[float],
+          boatspeed: Sequence[float],
+          heel_angle: Sequence[float],
+          flat: Sequence[float] = (1.,),
+          trim_angle: float = 0.,
+          nb_workers: Optional[int] = None,
+          chunk_size: int = 65536) -> np.ndarray:
+    r"""aero_force of several rigs on a grid of sailing states, in parallel.
+
+    Parameters
+    ----------
+    rigs : The sail plans, see also sail_combinations()
+    tws : true wind speeds [m/s] of the grid
+    twa : true wind angles [degrees] of the grid
+    boatspeed : boat speeds [m/s] of the grid
+    heel_angle : heel angles [degrees] of the grid
+    flat : flat values of the grid
+    trim_angle : [degrees], bow up is positive, the same for the whole grid
+    nb_workers : Number of worker processes, None for the number of CPUs.
+                 With 1 worker, the chunks are evaluated in the calling process.
+    chunk_size : Number of sailing states evaluated by a worker at once
+
+    Returns a (len(rigs), len(tws), len(twa), len(boatspeed), len(heel_angle), len(flat), 6)
+    array, the last axis is Force (fx, fy, fz, px, py, pz).
+
+    """
+    if len(rigs) == 0:
+        raise ValueError("At least one rig is required")
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be strictly positive")
+    if nb_workers is not None and nb_workers < 1:
+        raise ValueError("nb_workers must be strictly positive")
+
+    rigs = [Rig(*rig) for rig in rigs]
+    axes = tuple(np.asarray(axis, dtype=float).ravel() for axis in (tws, twa, boatspeed, heel_angle, flat))
+    grid_size = int(np.prod([len(axis) for axis in axes]))
+    shape = (len(rigs),) + tuple(len(axis) for axis in axes) + (len(Force._fields),)
+    chunks = [(rig_index, start, min(start + chunk_size, grid_size))
+              for rig_index in range(len(rigs))
+              for start in range(0, grid_size, chunk_size)]
+
+    if shared_memory is None:
+        memory = None
+        values = np.empty(shape)
+    else:
+        memory = shared_memory.SharedMemory(create=True, size=max(int(np.prod(shape)) * 8, 1))
+        values = np.ndarray(shape, dtype=np.float64, buffer=memory.buf)
+    try:
+        initargs = (None if memory is None else memory.name, shape, rigs, axes, trim_angle)
+        if nb_workers == 1:
+            _attach(*initargs)
+            try:
+                _store(values, chunks, map(_evaluate_chunk, *zip(*chunks)))
+            finally:
+                _detach()
+        else:
+            with ProcessPoolExecutor(max_workers=nb_workers,
+                                     initializer=_init_worker,
+                                     initargs=initargs) as executor:
+                # consuming the results raises the exceptions of the workers
+                _store(values, chunks, executor.map(_evaluate_chunk, *zip(*chunks)))
+        return values if memory is None else values.copy()
+    finally:
+        if memory is not None:
+            del values
+            memory.close()
+            memory.unlink()
@@ -0,0 +1,87 @@
+# coding: utf-8
+
+r"""Total aero force of a boat: sails, hull windage and mast windage.
+
+The apparent wind is computed once (WindState) and shared by the sails
+force model and the windage models.
+
+"""
+
+from typing import List, Optional, Tuple
+import numpy as np
+from ydeos_aerodynamics.apparent import WindState
+from ydeos_aerodynamics.force import Force, ForceBatch, resultant_force
+from ydeos_aerodynamics.model import Rig, aero_force, aero_force_array
+from ydeos_aerodynamics.windage import HullWindageModel, MastWindageModel
+
+
+def _moment(forces: List[Force], point: Tuple[float, float, float]) -> np.ndarray:
+    r"""Scalar version of the sum of ForceBatch.moment()."""
+    mx = my = mz = 0.
+    for force in forces:
+        rx, ry, rz = force.px - point[0], force.py - point[1], force.pz - point[2]
+        mx += ry * force.fz - rz * force.fy
+        my += rz * force.fx - rx * force.fz
+        mz += rx * force.fy - ry * force.fx
+    return np.array([mx, my, mz])
+
+
+def total_aero_force(rig: Rig,
+                     tws: np.ndarray,
+                     twa: np.ndarray,
+                     boatspeed: np.ndarray,
+                     heel_angle: np.ndarray,
+                     trim_angle: np.ndarray = 0.,
+                     flat: np.ndarray = 1.,
+                     hull_windage: Optional[HullWindageModel] = None,
+                     mast_windage: Optional[MastWindageModel] = None,
+                     moment_point: Tuple[float, float, float] = (0., 0., 0.)) -> Tuple[Force, np.ndarray]:
+    r"""Sum of the sails force and of the hull and mast windage.
+
+    Parameters
+    ----------
+    rig : The sail plan
+    tws : true wind speed [m/s], positive
+    twa : true wind angle [degrees], between -180 and 180
+    boatspeed : [m/s]
+    heel_angle : [degrees], between -90 and 90
+    trim_angle : [degrees], bow up is positive
+    flat : FLAT parameter, between 0 and 1.
+    hull_windage : Optional hull windage model
+    mast_windage : Optional mast windage model
+    moment_point : The x, y, z coordinates of the point the moment is computed about
+
+    The sailing state parameters are floats or arrays that broadcast together.
+
+    Returns the summed Force (see ForceBatch.resultant()) and the exact moment
+    of the forces about moment_point, an array of shape (*broadcast shape, 3).
+    The moment of the summed Force about moment_point is that exact moment,
+    less its (small) component along the summed force.
+    The Force fields are floats for float parameters.
+
+    """
+    if all(np.ndim(value) == 0 for value in (tws, twa, boatspeed, heel_angle, trim_angle, flat)):
+        wind_state = WindState(tws, twa, boatspeed, heel_angle)
+        forces = [aero_force(tws, twa, boatspeed, heel_angle, trim_angle, flat=flat,
+                             wind_state=wind_state, **rig._asdict())]
+        if hull_windage is not None:
+            forces.append(hull_windage(tws, twa, boatspeed, heel_angle, wind_state=wind_state))
+        if mast_windage is not None:
+            forces.append(mast_windage(tws, twa, boatspeed, heel_angle, trim_angle, wind_state=wind_state))
+        forces = [Force(*(float(field) for field in force)) for force in forces]
+        return resultant_force(forces), _moment(forces, moment_point)
+
+    tws, twa, boatspeed, heel_angle, trim_angle, flat = \
+        np.broadcast_arrays(*[np.asarray(value, dtype=float)
+                              for value in (tws, twa, boatspeed, heel_angle, trim_angle, flat)])
+    wind_state = WindState(tws, twa, boatspeed, heel_angle)
+    batches = [ForceBatch.from_force(aero_force_array(tws, twa, boatspeed, heel_angle, trim_angle, flat=flat,
+                                                      wind_state=wind_state, **rig._asdict()))]
+    if hull_windage is not None:
+        batches.append(ForceBatch.from_force(hull_windage(tws, twa, boatspeed, heel_angle, wind_state=wind_state)))
+    if mast_windage is not None:
+        batches.append(ForceBatch.from_force(mast_windage(tws, twa, boatspeed, heel_angle, trim_angle,
+                                                          wind_state=wind_state)))
+    total = ForceBatch.resultant(batches)
+    moment = sum(batch.moment(moment_point) for batch in batches)
+    return Force(*(field.reshape(tws.shape) for field in total.data.T)), moment.reshape(tws.shape + (3,))
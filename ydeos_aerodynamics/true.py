@@ -6,8 +6,10 @@ http://www.sailnet.com/forums/general-discussion-sailing-related/50411-apparent-
 
 """
 
-from typing import Dict
-from math import cos, sin, radians, degrees, atan, sqrt
+from typing import Dict, Tuple
+from math import cos, sin, radians, degrees, atan, sqrt, pi
+import numpy as np
+from ydeos_aerodynamics.apparent import _apply_validity, _broadcast_floats, _outside
 
 
 def true_wind_angle(apparent_wind_speed: float,
@@ -122,12 +124,353 @@ def true_wind(apparent_wind_speed: float,
                  positive when the boat heels to leeward
                  negative when the boat heels to windward
 
+    Returns a dict with the true wind "speed" [m/s] and "angle" [degrees],
+    same values as true_wind_speed() and true_wind_angle(),
+    but the inputs are checked once and the trigonometric terms
+    are computed once.
+
+    """
+    if apparent_wind_speed < 0.:
+        raise ValueError('The apparent wind speed must be positive')
+    if apparent_wind_angle < -180. or apparent_wind_angle > 180.:
+        raise ValueError('The apparent wind angle must be between -180 and 180')
+    if heel_angle < -89. or heel_angle > 89.:
+        raise ValueError("Cannot compute the true wind from a boat"
+                         "heeled more than 89 degrees")
+
+    sign = apparent_wind_angle / abs(apparent_wind_angle) if apparent_wind_angle != 0. else 0.
+    apparent_wind_angle = abs(apparent_wind_angle)
+    apparent_wind_angle /= cos(radians(heel_angle))
+    y = 90. - apparent_wind_angle
+    a = apparent_wind_speed * cos(radians(y))
+    bb = apparent_wind_speed * sin(radians(y))
+    b = bb - boatspeed
+
+    return {"speed": sqrt(a * a + b * b),
+            "angle": sign * (90. - degrees(atan(b / a))) if a != 0. else 0.}
+
+
+def _true_wind_components_derivatives(apparent_wind_speed,
+                                      sign,
+                                      abs_apparent_wind_angle,
+                                      cos_y,
+                                      sin_y,
+                                      cos_heel,
+                                      sin_heel,
+                                      zero=0.,
+                                      one=1.) -> Dict:
+    r"""Derivatives (d a, d b) of the true wind components with respect to each variable.
+
+    Works with floats and arrays (pass arrays of zeros and ones
+    for zero and one), sign is the sign of the apparent wind angle
+    (1 for a null angle, the limit of the derivatives on both sides)
+    and y is 90 - |awa| / cos(heel) [radians].
+
+    """
+    # d y / d apparent_wind_angle and d y / d heel_angle
+    d_y_d_awa = -sign / cos_heel * (pi / 180.)
+    d_y_d_heel = -abs_apparent_wind_angle * sin_heel / cos_heel ** 2 * (pi / 180.) ** 2
+    return {"apparent_wind_speed": (cos_y, sin_y),
+            "apparent_wind_angle": (-apparent_wind_speed * sin_y * d_y_d_awa,
+                                    apparent_wind_speed * cos_y * d_y_d_awa),
+            "boatspeed": (zero, -one),
+            "heel_angle": (-apparent_wind_speed * sin_y * d_y_d_heel,
+                           apparent_wind_speed * cos_y * d_y_d_heel)}
+
+
+def true_wind_jacobian(apparent_wind_speed: float,
+                       apparent_wind_angle: float,
+                       boatspeed: float,
+                       heel_angle: float = 0.) -> Dict:
+    r"""True wind with its partial derivatives.
+
+    The parameters are the same as for true_wind().
+
+    Returns a dict with the true wind "speed" [m/s] and "angle" [degrees],
+    same values as true_wind(), and the "speed_derivatives" and
+    "angle_derivatives" dicts keyed by the names of the variables
+    (apparent_wind_speed, apparent_wind_angle, boatspeed, heel_angle).
+    The derivatives with respect to angles are per degree,
+    they are NaN if the true wind speed is 0.
+
+    """
+    if apparent_wind_speed < 0.:
+        raise ValueError('The apparent wind speed must be positive')
+    if apparent_wind_angle < -180. or apparent_wind_angle > 180.:
+        raise ValueError('The apparent wind angle must be between -180 and 180')
+    if heel_angle < -89. or heel_angle > 89.:
+        raise ValueError("Cannot compute the true wind from a boat"
+                         "heeled more than 89 degrees")
+
+    sign = apparent_wind_angle / abs(apparent_wind_angle) if apparent_wind_angle != 0. else 0.
+    heel = radians(heel_angle)
+    cos_heel, sin_heel = cos(heel), sin(heel)
+    # same expressions as true_wind()
+    y = 90. - abs(apparent_wind_angle) / cos_heel
+    cos_y, sin_y = cos(radians(y)), sin(radians(y))
+    a = apparent_wind_speed * cos_y
+    b = apparent_wind_speed * sin_y - boatspeed
+    speed = sqrt(a * a + b * b)
+    true = {"speed": speed,
+            "angle": sign * (90. - degrees(atan(b / a))) if a != 0. else 0.}
+
+    # The angle derivatives are the same on both sides of a null angle
+    sign = sign if apparent_wind_angle != 0. else 1.
+    true["speed_derivatives"], true["angle_derivatives"] = {}, {}
+    for name, (d_a, d_b) in _true_wind_components_derivatives(apparent_wind_speed, sign,
+                                                              abs(apparent_wind_angle), cos_y, sin_y,
+                                                              cos_heel, sin_heel).items():
+        if speed == 0.:
+            true["speed_derivatives"][name] = true["angle_derivatives"][name] = float('nan')
+            continue
+        true["speed_derivatives"][name] = (a * d_a + b * d_b) / speed
+        true["angle_derivatives"][name] = -sign * degrees((a * d_b - b * d_a) / speed ** 2)
+    return true
+
+
+class TrueWind:
+    r"""True wind speeds [m/s] and angles [degrees] of a batch."""
+
+    __slots__ = ('speed', 'angle')
+
+    def __init__(self, speed: np.ndarray, angle: np.ndarray):
+        self.speed = speed
+        self.angle = angle
+
+    def __repr__(self) -> str:
+        return f"TrueWind(speed={self.speed!r}, angle={self.angle!r})"
+
+
+_INVALID_APPARENT_WIND_MESSAGE = "The apparent wind speed must be positive, " \
+                                  "the apparent wind angle between -180 and 180 " \
+                                  "and the heel angle between -89 and 89"
+
+
+def true_wind_validity(apparent_wind_speed: np.ndarray,
+                       apparent_wind_angle: np.ndarray,
+                       heel_angle: np.ndarray = 0.) -> np.ndarray:
+    r"""Mask of the valid inputs of the true wind computations.
+
+    Parameters
+    ----------
+    apparent_wind_speed : apparent wind speed [m/s], must be >= 0
+    apparent_wind_angle : apparent wind angle [degrees],
+                          must be between -180 and 180
+    heel_angle : [degrees], must be between -89 and 89
+
+    Returns a boolean array, True where the scalar functions
+    would not raise a ValueError
+
+    """
+    apparent_wind_speed, apparent_wind_angle, heel_angle = \
+        _broadcast_floats(apparent_wind_speed, apparent_wind_angle, heel_angle)
+    return ~_true_wind_invalid(apparent_wind_speed, apparent_wind_angle, heel_angle)
+
+
+def _true_wind_invalid(apparent_wind_speed: np.ndarray,
+                       apparent_wind_angle: np.ndarray,
+                       heel_angle: np.ndarray) -> np.ndarray:
+    r"""Single mask of the invalid rows (broadcast float arrays)."""
+    invalid = np.asarray(np.less(apparent_wind_speed, 0.))
+    _outside(apparent_wind_angle, 180., invalid)
+    return _outside(heel_angle, 89., invalid)
+
+
+def _true_wind_components(apparent_wind_speed: np.ndarray,
+                          apparent_wind_angle: np.ndarray,
+                          boatspeed: np.ndarray,
+                          heel_angle: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    r"""Components (a, b) of the true wind, as in the scalar functions, the temporaries reused in place."""
+    y = np.asarray(np.abs(apparent_wind_angle))
+    y /= np.cos(np.radians(heel_angle))
+    np.subtract(90., y, out=y)
+    np.radians(y, out=y)
+    a = np.cos(y)
+    a *= apparent_wind_speed
+    b = np.sin(y, out=y)
+    b *= apparent_wind_speed
+    b -= boatspeed
+    return a, b
+
+
+def _true_wind_speed_from_components(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    r"""True wind speed [m/s] from its components, sqrt(a * a + b * b)."""
+    speed = np.asarray(np.square(a))
+    speed += np.square(b)
+    return np.sqrt(speed, out=speed)
+
+
+def _true_wind_angle_from_components(apparent_wind_angle: np.ndarray,
+                                     a: np.ndarray,
+                                     b: np.ndarray) -> np.ndarray:
+    r"""Signed true wind angle [degrees] from its components, computed in place."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        twa = np.asarray(np.divide(b, a))
+    np.arctan(twa, out=twa)
+    np.degrees(twa, out=twa)
+    np.subtract(90., twa, out=twa)
+    twa *= np.sign(apparent_wind_angle)
+    np.copyto(twa, 0., where=a == 0.)
+    return twa
+
+
+def true_wind_angle_array(apparent_wind_speed: np.ndarray,
+                          apparent_wind_angle: np.ndarray,
+                          boatspeed: np.ndarray,
+                          heel_angle: np.ndarray = 0.,
+                          errors: str = 'raise') -> np.ndarray:
+    r"""True wind angle, vectorized version of true_wind_angle().
+
+    The parameters are the same as for true_wind_angle()
+    but can be any arrays that broadcast together.
+    errors : 'raise' to raise a single ValueError listing the invalid rows,
+             'nan' to return NaN for the invalid rows
+             (see true_wind_validity())
+
+    Returns an array of true wind angles [degrees]
+
+    Raises
+    ------
+    ValueError
+        if any of the inputs is invalid (see true_wind_angle())
+        and errors is 'raise'
+
     """
-    return {"speed": true_wind_speed(apparent_wind_speed,
-                                     apparent_wind_angle,
-                                     boatspeed,
-                                     heel_angle),
-            "angle": true_wind_angle(apparent_wind_speed,
-                                     apparent_wind_angle,
-                                     boatspeed,
-                                     heel_angle)}
+    apparent_wind_speed, apparent_wind_angle, boatspeed, heel_angle = \
+        _broadcast_floats(apparent_wind_speed, apparent_wind_angle, boatspeed, heel_angle)
+    invalid = _true_wind_invalid(apparent_wind_speed, apparent_wind_angle, heel_angle)
+
+    a, b = _true_wind_components(apparent_wind_speed, apparent_wind_angle, boatspeed, heel_angle)
+    twa = _true_wind_angle_from_components(apparent_wind_angle, a, b)
+    return _apply_validity(invalid, twa, errors, _INVALID_APPARENT_WIND_MESSAGE)
+
+
+def true_wind_speed_array(apparent_wind_speed: np.ndarray,
+                          apparent_wind_angle: np.ndarray,
+                          boatspeed: np.ndarray,
+                          heel_angle: np.ndarray = 0.,
+                          errors: str = 'raise') -> np.ndarray:
+    r"""True wind speed, vectorized version of true_wind_speed().
+
+    The parameters are the same as for true_wind_speed()
+    but can be any arrays that broadcast together.
+    errors : 'raise' to raise a single ValueError listing the invalid rows,
+             'nan' to return NaN for the invalid rows
+             (see true_wind_validity())
+
+    Returns an array of true wind speeds [m/s]
+
+    Raises
+    ------
+    ValueError
+        if any of the inputs is invalid (see true_wind_speed())
+        and errors is 'raise'
+
+    """
+    apparent_wind_speed, apparent_wind_angle, boatspeed, heel_angle = \
+        _broadcast_floats(apparent_wind_speed, apparent_wind_angle, boatspeed, heel_angle)
+    invalid = _true_wind_invalid(apparent_wind_speed, apparent_wind_angle, heel_angle)
+
+    a, b = _true_wind_components(apparent_wind_speed, apparent_wind_angle, boatspeed, heel_angle)
+    return _apply_validity(invalid, _true_wind_speed_from_components(a, b), errors, _INVALID_APPARENT_WIND_MESSAGE)
+
+
+def true_wind_array(apparent_wind_speed: np.ndarray,
+                    apparent_wind_angle: np.ndarray,
+                    boatspeed: np.ndarray,
+                    heel_angle: np.ndarray = 0.,
+                    errors: str = 'raise') -> TrueWind:
+    r"""True wind speed and angle, vectorized version of true_wind().
+
+    The parameters are the same as for true_wind_speed_array().
+    The inputs are checked once and the trigonometric terms
+    are computed once for the speed and the angle.
+
+    Returns a TrueWind with the speed [m/s] and angle [degrees] arrays
+
+    """
+    apparent_wind_speed, apparent_wind_angle, boatspeed, heel_angle = \
+        _broadcast_floats(apparent_wind_speed, apparent_wind_angle, boatspeed, heel_angle)
+    invalid = _true_wind_invalid(apparent_wind_speed, apparent_wind_angle, heel_angle)
+
+    a, b = _true_wind_components(apparent_wind_speed, apparent_wind_angle, boatspeed, heel_angle)
+    return TrueWind(_apply_validity(invalid,
+                                    _true_wind_speed_from_components(a, b),
+                                    errors,
+                                    _INVALID_APPARENT_WIND_MESSAGE),
+                    _apply_validity(invalid,
+                                    _true_wind_angle_from_components(apparent_wind_angle, a, b),
+                                    errors,
+                                    _INVALID_APPARENT_WIND_MESSAGE))
+
+
+class TrueWindJacobian:
+    r"""True wind speeds [m/s] and angles [degrees] of a batch with their partial derivatives.
+
+    speed_derivatives and angle_derivatives are dicts of arrays keyed by the
+    names of the variables: apparent_wind_speed, apparent_wind_angle,
+    boatspeed and heel_angle. The derivatives with respect to angles are per degree.
+
+    """
+
+    __slots__ = ('speed', 'angle', 'speed_derivatives', 'angle_derivatives')
+
+    def __init__(self,
+                 speed: np.ndarray,
+                 angle: np.ndarray,
+                 speed_derivatives: Dict[str, np.ndarray],
+                 angle_derivatives: Dict[str, np.ndarray]):
+        self.speed = speed
+        self.angle = angle
+        self.speed_derivatives = speed_derivatives
+        self.angle_derivatives = angle_derivatives
+
+    def __repr__(self) -> str:
+        return f"TrueWindJacobian(speed={self.speed!r}, angle={self.angle!r})"
+
+
+def true_wind_jacobian_array(apparent_wind_speed: np.ndarray,
+                             apparent_wind_angle: np.ndarray,
+                             boatspeed: np.ndarray,
+                             heel_angle: np.ndarray = 0.,
+                             errors: str = 'raise') -> TrueWindJacobian:
+    r"""True wind speed and angle with their partial derivatives, vectorized version of true_wind_jacobian().
+
+    The parameters are the same as for true_wind_array(), the speeds
+    and angles are identical to the ones of true_wind_array().
+
+    Returns a TrueWindJacobian
+
+    """
+    apparent_wind_speed, apparent_wind_angle, boatspeed, heel_angle = \
+        _broadcast_floats(apparent_wind_speed, apparent_wind_angle, boatspeed, heel_angle)
+    invalid = _true_wind_invalid(apparent_wind_speed, apparent_wind_angle, heel_angle)
+
+    heel = np.radians(heel_angle)
+    cos_heel, sin_heel = np.cos(heel), np.sin(heel)
+    # same expressions as _true_wind_components()
+    y = np.radians(90. - np.abs(apparent_wind_angle) / cos_heel)
+    cos_y, sin_y = np.cos(y), np.sin(y)
+    a = apparent_wind_speed * cos_y
+    b = apparent_wind_speed * sin_y - boatspeed
+    speed = _true_wind_speed_from_components(a, b)
+    angle = _true_wind_angle_from_components(apparent_wind_angle, a, b)
+
+    # The angle derivatives are the same on both sides of a null angle
+    sign = np.where(apparent_wind_angle < 0., -1., 1.)
+    speed_derivatives, angle_derivatives = {}, {}
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for name, (d_a, d_b) in _true_wind_components_derivatives(apparent_wind_speed, sign,
+                                                                  np.abs(apparent_wind_angle), cos_y, sin_y,
+                                                                  cos_heel, sin_heel,
+                                                                  np.zeros_like(a), np.ones_like(a)).items():
+            speed_derivatives[name] = _apply_validity(invalid, (a * d_a + b * d_b) / speed,
+                                                      errors, _INVALID_APPARENT_WIND_MESSAGE)
+            angle_derivatives[name] = _apply_validity(invalid,
+                                                      -sign * np.degrees((a * d_b - b * d_a) / speed ** 2),
+                                                      errors, _INVALID_APPARENT_WIND_MESSAGE)
+
+    return TrueWindJacobian(_apply_validity(invalid, speed, errors, _INVALID_APPARENT_WIND_MESSAGE),
+                            _apply_validity(invalid, angle, errors, _INVALID_APPARENT_WIND_MESSAGE),
+                            speed_derivatives,
+                            angle_derivatives)
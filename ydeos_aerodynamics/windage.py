@@ -8,11 +8,152 @@ r"""Windage.
 """
 
 from math import sin, cos, radians
+from typing import Optional
 import numpy as np
-from scipy.interpolate import RectBivariateSpline, UnivariateSpline
+from scipy.interpolate import RectBivariateSpline
 from ydeos_aerodynamics.air import RHO_AIR_20C
 from ydeos_aerodynamics.force import Force
-from ydeos_aerodynamics.apparent import apparent_wind_angle, apparent_wind_speed
+from ydeos_aerodynamics.apparent import apparent_wind, apparent_wind_array, WindState
+
+
+def _all_scalars(*values) -> bool:
+    r"""True if none of the values is an array."""
+    return all(np.ndim(value) == 0 for value in values)
+
+
+class HullWindageModel:
+    r"""Hull windage model, built once per hull.
+
+    The reference area surface only depends on the hull dimensions.
+    It is fitted once, then the model can be evaluated for as many
+    sailing states as needed.
+
+    Parameters
+    ----------
+    freeboard_average : Freeboard height average of the hull [m], must be >= 0
+    loa : overall length of the hull [m], must be >= 0
+    beam_max : maximum beam of the hull[m], must be >= 0
+    rho_air : air density [kg/m**3], must be >= 0
+
+    """
+
+    awas = [0., 90., 180.]
+    heel_angle_samples = [0., 10., 20., 30., 40., 50., 60., 70., 80., 90.]
+    c_drag = 0.68
+
+    def __init__(self,
+                 freeboard_average: float,
+                 loa: float,
+                 beam_max: float,
+                 rho_air: float = RHO_AIR_20C):
+        if freeboard_average <= 0.:
+            raise ValueError("freeboard_average must be strictly positive")
+        if loa <= 0.:
+            raise ValueError("loa must be strictly positive")
+        if beam_max <= 0.:
+            raise ValueError("beam_max must be strictly positive")
+        if rho_air <= 0.:
+            raise ValueError("rho_air must be strictly positive")
+
+        self.freeboard_average = freeboard_average
+        self.loa = loa
+        self.beam_max = beam_max
+        self.rho_air = rho_air
+
+        half_deck_surface = (loa * beam_max * 0.7) / 2.
+        hull_side_area_upright = loa * freeboard_average
+
+        # Build a 2D interpolable surface
+        arefs = []
+        for awa in self.awas:
+            values = []
+            for heel_angle_sample in self.heel_angle_samples:
+                if awa != 90.:
+                    values.append(freeboard_average * beam_max)
+                else:
+                    values.append(hull_side_area_upright +
+                                  half_deck_surface
+                                  * sin(radians(heel_angle_sample)))
+            arefs.append(values)
+        arefs = np.array(arefs)
+        self._aref_interpolant = RectBivariateSpline(self.awas,
+                                                     self.heel_angle_samples,
+                                                     arefs,
+                                                     kx=1)
+
+    def __call__(self,
+                 tws: float,
+                 twa: float,
+                 boatspeed: float,
+                 heel_angle: float,
+                 wind_state: Optional[WindState] = None) -> Force:
+        r"""Hull windage for a sailing state or for arrays of sailing states.
+
+        Parameters
+        ----------
+        tws : true wind speed [m/s], positive
+        twa : true wind angle [degrees], between -180 and 180
+        boatspeed : [m/s]
+        heel_angle : [degrees], between -90 and 90
+        wind_state : Optional WindState of the same sailing state,
+                     its upright apparent wind is used
+
+        Returns a Force object, representing the hull windage,
+        with array fields if any of the parameters is an array.
+        The x-coordinate of the point of application is loa/2
+
+        """
+        if not _all_scalars(tws, twa, boatspeed, heel_angle):
+            return self._evaluate_arrays(tws, twa, boatspeed, heel_angle, wind_state)
+
+        if wind_state is None:
+            apparent = apparent_wind(tws, twa, boatspeed, heel_angle=0.)
+            awa, aws = apparent["angle"], apparent["speed"]
+        else:
+            awa, aws = wind_state.upright.angle, wind_state.upright.speed
+
+        z_ce = 0.66 * (self.freeboard_average + self.beam_max * sin(radians(heel_angle)))
+
+        aref = float(self._aref_interpolant.ev(abs(awa), abs(heel_angle)))
+
+        drag = 0.5 * self.rho_air * self.c_drag * aref * aws ** 2
+
+        # positive with awa  positive (stbd), negative on port
+        return Force(-drag * cos(radians(awa)),
+                     drag * sin(radians(awa)),
+                     0,
+                     self.loa / 2.,
+                     0.,
+                     z_ce)
+
+    def _evaluate_arrays(self,
+                         tws: np.ndarray,
+                         twa: np.ndarray,
+                         boatspeed: np.ndarray,
+                         heel_angle: np.ndarray,
+                         wind_state: Optional[WindState] = None) -> Force:
+        r"""Vectorized hull windage."""
+        tws, twa, boatspeed, heel_angle = \
+            np.broadcast_arrays(*[np.asarray(value, dtype=float)
+                                  for value in (tws, twa, boatspeed, heel_angle)])
+
+        apparent = apparent_wind_array(tws, twa, boatspeed, heel_angle=0.) if wind_state is None \
+            else wind_state.upright
+        awa, aws = apparent.angle, apparent.speed
+
+        z_ce = 0.66 * (self.freeboard_average + self.beam_max * np.sin(np.radians(heel_angle)))
+
+        aref = self._aref_interpolant.ev(np.abs(awa), np.abs(heel_angle))
+
+        drag = 0.5 * self.rho_air * self.c_drag * aref * aws ** 2
+
+        awa = np.radians(awa)
+        return Force(-drag * np.cos(awa),
+                     drag * np.sin(awa),
+                     np.zeros_like(drag),
+                     np.full_like(drag, self.loa / 2.),
+                     np.zeros_like(drag),
+                     z_ce)
 
 
 def windage_hull(tws: float,
@@ -52,61 +193,164 @@ def windage_hull(tws: float,
     Returns a Force object, representing the hull windage,
     The x-coordinate of the point of application is loa/2
 
+    Use a HullWindageModel to evaluate the windage of the same hull
+    many times.
+
     """
-    if freeboard_average <= 0.:
-        raise ValueError("freeboard_average must be strictly positive")
-    if loa <= 0.:
-        raise ValueError("loa must be strictly positive")
-    if beam_max <= 0.:
-        raise ValueError("beam_max must be strictly positive")
-    if rho_air <= 0.:
-        raise ValueError("rho_air must be strictly positive")
-
-    half_deck_surface = (loa * beam_max * 0.7) / 2.
-    hull_side_area_upright = loa * freeboard_average
-
-    # Build a 2D interpolable surface
-    awas = [0., 90., 180.]
-    heel_angle_samples = [0., 10., 20., 30., 40., 50., 60., 70., 80., 90.]
-    arefs = []
-    for awa in awas:
-        values = []
-        for heel_angle_sample in heel_angle_samples:
-            if awa != 90.:
-                values.append(freeboard_average * beam_max)
-            else:
-                values.append(hull_side_area_upright +
-                              half_deck_surface
-                              * sin(radians(heel_angle_sample)))
-        arefs.append(values)
-    arefs = np.array(arefs)
-    aref_interpolant = RectBivariateSpline(awas,
-                                           heel_angle_samples,
-                                           arefs,
-                                           kx=1)
-
-    awa = apparent_wind_angle(tws, twa, boatspeed, heel_angle=0.)
-    aws = apparent_wind_speed(tws, twa, boatspeed, heel_angle=0.)
-
-    z_ce = 0.66 * (freeboard_average + beam_max * sin(radians(heel_angle)))
-
-    # aref = aref_interpolant.ev(abs(awa), abs(heel_angle))[0]
-    aref = aref_interpolant.ev(abs(awa), abs(heel_angle))
+    return HullWindageModel(freeboard_average,
+                            loa,
+                            beam_max,
+                            rho_air)(tws, twa, boatspeed, heel_angle)
 
-    c_drag = 0.68
-    drag = 0.5 * rho_air * c_drag * aref * aws ** 2
 
-    # back = drag * cos(radians(awa))
+class MastWindageModel:
+    r"""Mast windage model, built once per rig.
 
-    # positive with awa  positive (stbd), negative on port
-    # side = drag * sin(radians(awa))
+    The drag area (S x Cd) of the mast is a quadratic of the apparent wind
+    angle that goes through (0, 0.4 x mast_front_area),
+    (90, 0.6 x mast_side_area) and (180, 0.4 x mast_front_area).
+    Its coefficients only depend on the mast areas and are computed once.
 
-    return Force(-drag * cos(radians(awa)),
-                 drag * sin(radians(awa)),
-                 0,
-                 loa / 2.,
-                 0.,
-                 z_ce)
+    Parameters
+    ----------
+    mast_x : mast x position
+    mast_z_bottom : Altitude of the lowest part of the mast that is
+                    exposed to the wind.
+                    Must be > 0.
+    mast_z_top : Altitude of the highest part of the mast that is
+                 exposed to the wind.
+                 Must be > 0.
+    mast_front_area : Frontal area of the mast [m**2] that is
+                      exposed to the wind.
+                      Must be >= 0.
+    mast_side_area : Lateral area of the mast [m**2] that is
+                     exposed to the wind.
+                     Must be >= 0.
+    rho_air : air density [kg/m**3], must be >= 0
+
+    """
+
+    def __init__(self,
+                 mast_x: float,
+                 mast_z_bottom: float,
+                 mast_z_top: float,
+                 mast_front_area: float,
+                 mast_side_area: float,
+                 rho_air: float = RHO_AIR_20C):
+        if mast_z_bottom <= 0.:
+            raise ValueError("mast_z_bottom must be strictly positive")
+        if mast_z_top <= 0.:
+            raise ValueError("mast_z_top must be strictly positive")
+        if mast_z_top <= mast_z_bottom:
+            raise ValueError("mast_z_top must be strictly above mast_z_bottom")
+        if mast_front_area <= 0.:
+            raise ValueError("mast_front_area must be strictly positive")
+        if mast_side_area <= 0.:
+            raise ValueError("mast_side_area must be strictly positive")
+        if rho_air <= 0.:
+            raise ValueError("rho_air must be strictly positive")
+
+        self.mast_x = mast_x
+        self.mast_z_bottom = mast_z_bottom
+        self.mast_z_top = mast_z_top
+        self.mast_front_area = mast_front_area
+        self.mast_side_area = mast_side_area
+        self.rho_air = rho_air
+
+        # The upright centre of effort is always at the same altitude.
+        self.upright_centre_of_effort_altitude = (mast_z_bottom + mast_z_top) / 2.
+
+        # Quadratic through (0, front), (90, side) and (180, front)
+        self._s_times_c_drag_front = 0.4 * mast_front_area
+        self._s_times_c_drag_curvature = (0.6 * mast_side_area - 0.4 * mast_front_area) / 8100.
+
+    def s_times_c_drag(self, awa: float) -> float:
+        r"""Drag area [m**2] of the mast at the apparent wind angle(s) awa."""
+        awa = abs(awa)
+        return self._s_times_c_drag_front + self._s_times_c_drag_curvature * awa * (180. - awa)
+
+    def __call__(self,
+                 tws: float,
+                 twa: float,
+                 boatspeed: float,
+                 heel_angle: float,
+                 trim_angle: float,
+                 wind_state: Optional[WindState] = None) -> Force:
+        r"""Mast windage for a sailing state or for arrays of sailing states.
+
+        Parameters
+        ----------
+        tws : true wind speed [m/s], positive
+        twa : true wind angle [degrees], between -180 and 180
+        boatspeed : [m/s]
+        heel_angle : [degrees], between -90 and 90
+        trim_angle : [degrees], bow up is positive.
+        wind_state : Optional WindState of the same sailing state,
+                     its upright apparent wind is used
+
+        Returns a Force object, representing the mast windage,
+        with array fields if any of the parameters is an array.
+        The x-coordinate of the point of application is mast_x
+
+        """
+        if not _all_scalars(tws, twa, boatspeed, heel_angle, trim_angle):
+            return self._evaluate_arrays(tws, twa, boatspeed, heel_angle, trim_angle, wind_state)
+
+        if twa == 0.:
+            sign = 0.
+        else:
+            sign = twa / abs(twa) if boatspeed != 0. else 0.
+
+        if wind_state is None:
+            apparent = apparent_wind(tws, twa, boatspeed, heel_angle=0.)
+            awa, aws = apparent["angle"], apparent["speed"]
+        else:
+            awa, aws = wind_state.upright.angle, wind_state.upright.speed
+
+        drag = 0.5 * self.rho_air * self.s_times_c_drag(awa) * aws ** 2
+
+        x_force = -drag * cos(radians(awa))
+
+        # positive with awa  positive (stbd), negative on port
+        y_force = drag * sin(radians(awa))
+
+        z_ce = self.upright_centre_of_effort_altitude
+        return Force(x_force,
+                     y_force,
+                     0,
+                     self.mast_x - z_ce * sin(radians(trim_angle)),
+                     z_ce * sin(radians(heel_angle)) * sign,
+                     z_ce * cos(radians(heel_angle)))
+
+    def _evaluate_arrays(self,
+                         tws: np.ndarray,
+                         twa: np.ndarray,
+                         boatspeed: np.ndarray,
+                         heel_angle: np.ndarray,
+                         trim_angle: np.ndarray,
+                         wind_state: Optional[WindState] = None) -> Force:
+        r"""Vectorized mast windage."""
+        tws, twa, boatspeed, heel_angle, trim_angle = \
+            np.broadcast_arrays(*[np.asarray(value, dtype=float)
+                                  for value in (tws, twa, boatspeed, heel_angle, trim_angle)])
+
+        sign = np.where(boatspeed != 0., np.sign(twa), 0.)
+
+        apparent = apparent_wind_array(tws, twa, boatspeed, heel_angle=0.) if wind_state is None \
+            else wind_state.upright
+        awa, aws = apparent.angle, apparent.speed
+
+        drag = 0.5 * self.rho_air * self.s_times_c_drag(awa) * aws ** 2
+
+        awa = np.radians(awa)
+        heel_angle = np.radians(heel_angle)
+        z_ce = self.upright_centre_of_effort_altitude
+        return Force(-drag * np.cos(awa),
+                     drag * np.sin(awa),
+                     np.zeros_like(drag),
+                     self.mast_x - z_ce * np.sin(np.radians(trim_angle)),
+                     z_ce * np.sin(heel_angle) * sign,
+                     z_ce * np.cos(heel_angle))
 
 
 def windage_mast_with_sail(tws: float,
@@ -152,54 +396,13 @@ def windage_mast_with_sail(tws: float,
     Returns a Force object, representing the hull windage.
     The x-coordinate of the point of application is mast_x
 
-    """
-    if mast_z_bottom <= 0.:
-        raise ValueError("mast_z_bottom must be strictly positive")
-    if mast_z_top <= 0.:
-        raise ValueError("mast_z_top must be strictly positive")
-    if mast_z_top <= mast_z_bottom:
-        raise ValueError("mast_z_top must be strictly above mast_z_bottom")
-    if mast_front_area <= 0.:
-        raise ValueError("mast_front_area must be strictly positive")
-    if mast_side_area <= 0.:
-        raise ValueError("mast_side_area must be strictly positive")
-    if rho_air <= 0.:
-        raise ValueError("rho_air must be strictly positive")
-
-    # The upright centre of effort is always at the same altitude.
-    upright_centre_of_effort_altitude = (mast_z_bottom + mast_z_top) / 2.
-
-    # Build a 1D interpolable object
-    awas = [0., 90., 180.]
-    s_times_c_drag = []
-    for awa in awas:
-        if awa != 90.:
-            s_times_c_drag.append(0.4 * mast_front_area)
-        else:
-            s_times_c_drag.append(0.6 * mast_side_area)
-    s_times_c_drag_interpolant = UnivariateSpline(awas,
-                                                  s_times_c_drag,
-                                                  k=2,
-                                                  s=0)
-
-    if twa == 0.:
-        sign = 0.
-    else:
-        sign = twa / abs(twa) if boatspeed != 0. else 0.
-
-    awa = apparent_wind_angle(tws, twa, boatspeed, heel_angle=0.)
-    aws = apparent_wind_speed(tws, twa, boatspeed, heel_angle=0.)
+    Use a MastWindageModel to evaluate the windage of the same mast
+    many times.
 
-    drag = 0.5 * rho_air * s_times_c_drag_interpolant(abs(awa)) * aws ** 2
-
-    x_force = -drag * cos(radians(awa))
-
-    # positive with awa  positive (stbd), negative on port
-    y_force = drag * sin(radians(awa))
-
-    return Force(x_force,
-                 y_force,
-                 0,
-                 mast_x - upright_centre_of_effort_altitude * sin(radians(trim_angle)),
-                 upright_centre_of_effort_altitude * sin(radians(heel_angle)) * sign,
-                 upright_centre_of_effort_altitude * cos(radians(heel_angle)))
+    """
+    return MastWindageModel(mast_x,
+                            mast_z_bottom,
+                            mast_z_top,
+                            mast_front_area,
+                            mast_side_area,
+                            rho_air)(tws, twa, boatspeed, heel_angle, trim_angle)